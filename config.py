@@ -8,7 +8,7 @@ TYPES_FICHIERS = {
     "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp"],
     "Vidéos": [".mp4", ".avi", ".mov", ".mkv"],
     "Musique": [".mp3", ".wav", ".aac", ".flac"],
-    "Archives": [".zip", ".rar", ".tar", ".gz", ".7z"],
+    "Archives": [".zip", ".rar", ".tar", ".gz", ".7z", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz"],
     "Exécutables": [".exe", ".msi", ".bat", ".sh", ".apk"],
     "Feuilles de calcul": [".xls", ".xlsx", ".csv", ".ods"],
     "Présentations": [".ppt", ".pptx", ".odp"],
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+# Ce fichier tient un catalogue local des fichiers (SQLite en WAL) : chemin, taille, dates de modification
+# et de changement, extension, catégorie et hash éventuel, ainsi que les dossiers parcourus.
+# L'interface (liste des fichiers, statistiques) et les doublons interrogent le catalogue au lieu de reparcourir
+# le disque. Il est rempli par rafraichir() et tenu à jour par le service de surveillance (core/watcher.py) :
+# une racine surveillée n'a pas besoin d'être rafraîchie tant que la surveillance tourne.
+# Le rafraîchissement est incrémental : un dossier dont la date de modification n'a pas changé n'a ni gagné
+# ni perdu d'entrée, il n'est pas relu (ses fichiers connus sont seulement revérifiés par stat).
+
+import os
+import time
+import sqlite3
+import threading
+import atexit
+import logging
+from collections import namedtuple
+
+from core.classification import categorie_fichier, extension_fichier
+from core.quarantine import NOM_QUARANTAINE
+from core.scanner import FichierScanne, stat_entree
+
+# Configuration
+CATALOG_FILE = os.path.join("json", "catalogue.sqlite")
+UTILISER_CATALOGUE = True
+TAILLE_LOT_CATALOGUE = 5000  # Lignes écrites par transaction pendant un rafraîchissement
+RAFRAICHISSEMENT_INCREMENTAL = True  # Ne pas relire les dossiers dont la date de modification n'a pas changé
+VERIFIER_FICHIERS = True  # Revérifier (stat) les fichiers des dossiers non relus : détecte les contenus modifiés
+# Un dossier modifié depuis moins de cette marge sera relu la prochaine fois : une entrée ajoutée dans la même
+# unité de temps que sa lecture ne changerait pas sa date (systèmes de fichiers à dates grossières)
+MARGE_MTIME_NS = 2 * 10**9
+
+logger = logging.getLogger('organizer')
+
+FichierCatalogue = namedtuple("FichierCatalogue",
+                              "chemin nom taille mtime_ns ctime_ns extension categorie hash")
+
+COLONNES = "chemin, taille, mtime_ns, ctime_ns, extension, categorie, hash"
+
+
+def _bornes_prefixe(dossier):
+    """Plage [début, fin) des chemins situés sous dossier (requête par intervalle sur la clé primaire)."""
+    prefixe = dossier.rstrip(os.sep) + os.sep
+    return prefixe, prefixe[:-1] + chr(ord(os.sep) + 1)
+
+
+def _ligne_fichier(chemin, st):
+    nom = os.path.basename(chemin)
+    return (chemin, os.path.dirname(chemin), st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino,
+            extension_fichier(nom), categorie_fichier(nom))
+
+
+class CatalogueFichiers:
+    """Catalogue SQLite des fichiers et dossiers, interrogeable par dossier, taille ou catégorie."""
+
+    def __init__(self, chemin=CATALOG_FILE):
+        self.chemin = chemin
+        self.verrou = threading.RLock()
+        self.surveilles = {}  # Racine surveillée dans ce processus → récursive
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("PRAGMA synchronous=NORMAL")
+        self.connexion.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS fichiers (
+                chemin TEXT PRIMARY KEY,
+                dossier TEXT NOT NULL,
+                taille INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                ctime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                extension TEXT NOT NULL,
+                categorie TEXT NOT NULL,
+                hash TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_fichiers_dossier ON fichiers (dossier);
+            CREATE INDEX IF NOT EXISTS idx_fichiers_taille ON fichiers (taille);
+            CREATE INDEX IF NOT EXISTS idx_fichiers_categorie ON fichiers (categorie);
+            CREATE TABLE IF NOT EXISTS dossiers (
+                chemin TEXT PRIMARY KEY,
+                parent TEXT NOT NULL,
+                mtime_ns INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_dossiers_parent ON dossiers (parent);
+            """
+        )
+        self.connexion.commit()
+
+    # --- Mise à jour ---
+
+    def _inserer(self, lignes):
+        self.connexion.executemany(
+            "INSERT INTO fichiers (chemin, dossier, taille, mtime_ns, ctime_ns, inode, extension, categorie) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (chemin) DO UPDATE SET "
+            "taille = excluded.taille, mtime_ns = excluded.mtime_ns, ctime_ns = excluded.ctime_ns, "
+            "inode = excluded.inode, extension = excluded.extension, categorie = excluded.categorie, "
+            "hash = CASE WHEN fichiers.inode = excluded.inode AND fichiers.taille = excluded.taille "
+            "AND fichiers.mtime_ns = excluded.mtime_ns THEN fichiers.hash END",
+            lignes,
+        )
+
+    def enregistrer(self, chemins):
+        """Met à jour des chemins précis : fichier présent → métadonnées actuelles, absent → retiré."""
+        presents, absents = [], []
+        for chemin in chemins:
+            st = FichierScanne.depuis_chemin(chemin).stat_ou_none()
+            if st is not None:
+                presents.append(_ligne_fichier(chemin, st))
+            else:
+                absents.append(chemin)
+        parents = {ligne[1] for ligne in presents}
+        with self.verrou:
+            with self.connexion:
+                self._inserer(presents)
+                self.connexion.executemany("DELETE FROM fichiers WHERE chemin = ?", ((c,) for c in absents))
+                # Dossiers apparus (créés par l'organisation ou signalés par la surveillance), pas encore parcourus
+                self.connexion.executemany(
+                    "INSERT OR IGNORE INTO dossiers (chemin, parent, mtime_ns) VALUES (?, ?, NULL)",
+                    ((dossier, os.path.dirname(dossier)) for dossier in parents))
+
+    def retirer(self, chemins):
+        """Retire des fichiers, ou des dossiers avec tout leur contenu."""
+        with self.verrou:
+            with self.connexion:
+                for chemin in chemins:
+                    debut, fin = _bornes_prefixe(chemin)
+                    self.connexion.execute("DELETE FROM fichiers WHERE chemin = ? OR (chemin >= ? AND chemin < ?)",
+                                           (chemin, debut, fin))
+                    self.connexion.execute("DELETE FROM dossiers WHERE chemin = ? OR (chemin >= ? AND chemin < ?)",
+                                           (chemin, debut, fin))
+
+    def enregistrer_hashes(self, empreintes):
+        """
+        Renseigne le hash de fichiers catalogués : (chemin, taille, mtime_ns, hash) pour chaque fichier.
+        Une ligne dont la taille ou la date ne correspond plus (fichier modifié depuis le hash) est laissée sans hash.
+        """
+        with self.verrou:
+            with self.connexion:
+                self.connexion.executemany(
+                    "UPDATE fichiers SET hash = ? WHERE chemin = ? AND taille = ? AND mtime_ns = ?",
+                    ((valeur, chemin, taille, mtime_ns) for chemin, taille, mtime_ns, valeur in empreintes))
+
+    def _connus(self, racine, recursif):
+        """
+        Fichiers et dossiers catalogués dans la portée d'un parcours.
+
+        Returns:
+            (fichiers, dossiers) : dossier → {chemin: (inode, taille, mtime_ns, ctime_ns)}
+            et chemin → (parent, mtime_ns) pour la racine, ses sous-dossiers directs
+            et, si recursif, toute l'arborescence
+        """
+        condition = "dossier = ?"
+        condition_dossiers = "chemin = ? OR parent = ?"
+        parametres = [racine]
+        if recursif:
+            condition += " OR (chemin >= ? AND chemin < ?)"
+            condition_dossiers += " OR (chemin >= ? AND chemin < ?)"
+            parametres += _bornes_prefixe(racine)
+        fichiers = {}
+        with self.verrou:
+            for chemin, dossier, *identite in self.connexion.execute(
+                    f"SELECT chemin, dossier, inode, taille, mtime_ns, ctime_ns FROM fichiers WHERE {condition}",
+                    parametres):
+                fichiers.setdefault(dossier, {})[chemin] = tuple(identite)
+            dossiers = {chemin: (parent, mtime_ns) for chemin, parent, mtime_ns in self.connexion.execute(
+                f"SELECT chemin, parent, mtime_ns FROM dossiers WHERE {condition_dossiers}",
+                [racine, *parametres])}
+        return fichiers, dossiers
+
+    def rafraichir(self, racine, recursif=True, exclusions=(), forcer=False,
+                   incremental=RAFRAICHISSEMENT_INCREMENTAL, verifier=VERIFIER_FICHIERS):
+        """
+        Met le catalogue en accord avec le disque pour racine (et ses sous-dossiers si recursif).
+        Seuls les fichiers nouveaux ou modifiés sont réécrits. Une racine surveillée par le service de surveillance
+        est déjà à jour et n'est pas reparcourue (sauf forcer).
+
+        En mode incrémental, un dossier dont st_mtime_ns est celui enregistré n'est pas relu : ses fichiers et
+        sous-dossiers sont repris du catalogue. Sans vérification, ses fichiers ne sont pas non plus revérifiés
+        (une archive inchangée ne coûte alors qu'un stat par dossier).
+
+        Args:
+            racine: Dossier à cataloguer
+            recursif: Parcourir aussi les sous-dossiers
+            exclusions: Préfixes de dossiers à ignorer
+            forcer: Parcourir même si la racine est surveillée
+            incremental: Ne pas relire les dossiers inchangés
+            verifier: Revérifier par stat les fichiers des dossiers non relus (modifications de contenu)
+
+        Returns:
+            Nombre de fichiers ajoutés ou modifiés
+        """
+        racine = os.path.abspath(racine)
+        if not forcer and self.est_surveille(racine, recursif):
+            return 0
+        connus, dossiers_connus = self._connus(racine, recursif)
+        sous_dossiers = {}
+        for chemin, (parent, _) in dossiers_connus.items():
+            sous_dossiers.setdefault(parent, []).append(chemin)
+        limite_mtime = time.time_ns() - MARGE_MTIME_NS
+        vus = set()
+        lignes, dossiers = [], []
+        modifies = 0
+        relus = parcourus = 0
+        a_parcourir = [racine]
+        while a_parcourir:
+            if len(lignes) >= TAILLE_LOT_CATALOGUE:
+                modifies += len(lignes)
+                with self.verrou, self.connexion:
+                    self._inserer(lignes)
+                lignes = []
+            courant = a_parcourir.pop()
+            if exclusions and any(courant.startswith(e) for e in exclusions):
+                continue
+            fichiers_connus = connus.get(courant, {})
+            try:
+                st_dossier = os.stat(courant)
+            except OSError as e:
+                logger.error(f"Impossible de parcourir le dossier {courant} : {e}")
+                continue
+            parcourus += 1
+            # Date à retenir : aucune si le dossier est trop récent pour que sa date soit fiable
+            mtime_dossier = st_dossier.st_mtime_ns if st_dossier.st_mtime_ns < limite_mtime else None
+            inchange = mtime_dossier is not None and dossiers_connus.get(courant, (None, None))[1] == mtime_dossier
+            if incremental and inchange:
+                for chemin, identite in fichiers_connus.items():
+                    if not verifier:
+                        vus.add(chemin)
+                        continue
+                    try:
+                        st = os.stat(chemin)
+                    except OSError:
+                        continue  # Retiré du catalogue avec les disparus
+                    vus.add(chemin)
+                    if identite != (st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns):
+                        lignes.append(_ligne_fichier(chemin, st))
+                for chemin in sous_dossiers.get(courant, ()):
+                    if recursif:
+                        a_parcourir.append(chemin)
+                    else:
+                        dossiers.append((chemin, courant, dossiers_connus[chemin][1]))
+                dossiers.append((courant, os.path.dirname(courant), mtime_dossier))
+                continue
+            relus += 1
+            try:
+                with os.scandir(courant) as entrees:
+                    for entree in entrees:
+                        try:
+                            if entree.is_file():
+                                st = stat_entree(entree)
+                                vus.add(entree.path)
+                                if fichiers_connus.get(entree.path) != (st.st_ino, st.st_size, st.st_mtime_ns,
+                                                                        st.st_ctime_ns):
+                                    lignes.append(_ligne_fichier(entree.path, st))
+                            elif entree.is_dir(follow_symlinks=False) and entree.name != NOM_QUARANTAINE:
+                                if recursif:
+                                    a_parcourir.append(entree.path)
+                                else:
+                                    # Sous-dossier non parcouru : sa date enregistrée reste valable
+                                    mtime_connu = dossiers_connus.get(entree.path, (None, None))[1]
+                                    dossiers.append((entree.path, courant, mtime_connu))
+                        except OSError as e:
+                            logger.warning(f"Impossible de lire {entree.path} : {e}")
+            except OSError as e:
+                logger.error(f"Impossible de parcourir le dossier {courant} : {e}")
+                continue
+            dossiers.append((courant, os.path.dirname(courant), mtime_dossier))
+        modifies += len(lignes)
+        disparus = [chemin for fichiers_connus in connus.values() for chemin in fichiers_connus if chemin not in vus]
+        with self.verrou:
+            with self.connexion:
+                self._inserer(lignes)
+                self.connexion.executemany("DELETE FROM fichiers WHERE chemin = ?", ((c,) for c in disparus))
+                if recursif:
+                    debut, fin = _bornes_prefixe(racine)
+                    self.connexion.execute("DELETE FROM dossiers WHERE chemin >= ? AND chemin < ?", (debut, fin))
+                else:
+                    self.connexion.execute("DELETE FROM dossiers WHERE parent = ?", (racine,))
+                self.connexion.executemany(
+                    "INSERT OR REPLACE INTO dossiers (chemin, parent, mtime_ns) VALUES (?, ?, ?)", dossiers)
+        logger.info(f"Catalogue de {racine} rafraîchi : {len(vus)} fichier(s), {modifies} ajouté(s) ou modifié(s), "
+                    f"{len(disparus)} retiré(s), {relus} dossier(s) relu(s) sur {parcourus}.")
+        return modifies
+
+    # --- Surveillance ---
+
+    def marquer_surveille(self, racine, recursif):
+        """Indique que le service de surveillance tient désormais cette racine à jour."""
+        with self.verrou:
+            self.surveilles[os.path.abspath(racine)] = recursif
+
+    def demarquer_surveille(self, racine):
+        with self.verrou:
+            self.surveilles.pop(os.path.abspath(racine), None)
+
+    def est_surveille(self, dossier, recursif=False):
+        """Le dossier (et ses sous-dossiers si recursif) est-il couvert par une racine surveillée ?"""
+        dossier = os.path.abspath(dossier)
+        with self.verrou:
+            if self.surveilles.get(dossier) is True or (dossier in self.surveilles and not recursif):
+                return True
+            courant = os.path.dirname(dossier)
+            while True:
+                if self.surveilles.get(courant) is True:
+                    return True
+                parent = os.path.dirname(courant)
+                if parent == courant:
+                    return False
+                courant = parent
+
+    # --- Requêtes ---
+
+    def fichiers(self, dossier, recursif=False, categorie=None):
+        """Fichiers catalogués d'un dossier (FichierCatalogue), triés par chemin."""
+        dossier = os.path.abspath(dossier)
+        if recursif:
+            debut, fin = _bornes_prefixe(dossier)
+            condition, parametres = "(dossier = ? OR (chemin >= ? AND chemin < ?))", [dossier, debut, fin]
+        else:
+            condition, parametres = "dossier = ?", [dossier]
+        if categorie:
+            condition += " AND categorie = ?"
+            parametres.append(categorie)
+        with self.verrou:
+            lignes = self.connexion.execute(
+                f"SELECT {COLONNES} FROM fichiers WHERE {condition} ORDER BY chemin", parametres).fetchall()
+        return [FichierCatalogue(chemin, os.path.basename(chemin), *reste) for chemin, *reste in lignes]
+
+    def compter(self, dossier):
+        """Retourne (fichiers, sous-dossiers) directement contenus dans dossier."""
+        dossier = os.path.abspath(dossier)
+        with self.verrou:
+            fichiers = self.connexion.execute("SELECT COUNT(*) FROM fichiers WHERE dossier = ?", (dossier,)).fetchone()[0]
+            dossiers = self.connexion.execute("SELECT COUNT(*) FROM dossiers WHERE parent = ?", (dossier,)).fetchone()[0]
+        return fichiers, dossiers
+
+    def chemins_de_taille(self, taille, racine=None):
+        """Fichiers d'une taille donnée (index sur la taille), éventuellement limités à une arborescence."""
+        requete, parametres = "SELECT chemin FROM fichiers WHERE taille = ?", [taille]
+        if racine:
+            requete += " AND chemin >= ? AND chemin < ?"
+            parametres += _bornes_prefixe(os.path.abspath(racine))
+        with self.verrou:
+            return [ligne[0] for ligne in self.connexion.execute(requete, parametres)]
+
+    def statistiques(self, racine, limite=10):
+        """
+        Statistiques d'une arborescence calculées par le catalogue.
+
+        Returns:
+            Dictionnaire {"fichiers", "taille", "extensions": {ext: (nombre, taille)},
+                          "categories": {categorie: (nombre, taille)}, "plus_volumineux": [(chemin, taille)]}
+        """
+        racine = os.path.abspath(racine)
+        debut, fin = _bornes_prefixe(racine)
+        portee = "(dossier = ? OR (chemin >= ? AND chemin < ?))"
+        parametres = (racine, debut, fin)
+        with self.verrou:
+            nombre, taille = self.connexion.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(taille), 0) FROM fichiers WHERE {portee}", parametres).fetchone()
+            extensions = {ext: (n, t) for ext, n, t in self.connexion.execute(
+                f"SELECT extension, COUNT(*), SUM(taille) FROM fichiers WHERE {portee} GROUP BY extension", parametres)}
+            categories = {cat: (n, t) for cat, n, t in self.connexion.execute(
+                f"SELECT categorie, COUNT(*), SUM(taille) FROM fichiers WHERE {portee} GROUP BY categorie", parametres)}
+            plus_volumineux = self.connexion.execute(
+                f"SELECT chemin, taille FROM fichiers WHERE {portee} ORDER BY taille DESC LIMIT ?",
+                (*parametres, limite)).fetchall()
+        return {"fichiers": nombre, "taille": taille, "extensions": extensions, "categories": categories,
+                "plus_volumineux": plus_volumineux}
+
+    def fermer(self):
+        with self.verrou:
+            self.connexion.close()
+
+
+_catalogue = None
+_verrou_catalogue = threading.Lock()
+
+
+def obtenir_catalogue():
+    """Retourne le catalogue partagé, ou None s'il est désactivé ou ne peut pas être ouvert."""
+    global _catalogue
+    if not UTILISER_CATALOGUE:
+        return None
+    with _verrou_catalogue:
+        if _catalogue is None:
+            try:
+                _catalogue = CatalogueFichiers()
+                atexit.register(_catalogue.fermer)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Catalogue des fichiers indisponible ({CATALOG_FILE}) : {e}")
+                _catalogue = False
+        return _catalogue or None
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# Ce fichier construit, une seule fois à l'import, l'index extension → catégorie à partir de config.TYPES_FICHIERS.
+# Tous les modules (organisation, renommage, interface) classent les fichiers avec cet index :
+# une recherche dans un dictionnaire au lieu d'un parcours de toutes les listes d'extensions.
+# Les extensions composées (.tar.gz...) sont reconnues avant l'extension simple.
+
+from config import TYPES_FICHIERS
+
+CATEGORIE_PAR_DEFAUT = "Autres"
+
+# Index extension (en minuscules, avec le point) → catégorie
+CATEGORIE_PAR_EXTENSION = {
+    extension.lower(): categorie
+    for categorie, extensions in TYPES_FICHIERS.items()
+    for extension in extensions
+}
+
+# Extensions composées de plusieurs suffixes, à tester en premier
+EXTENSIONS_COMPOSEES = frozenset(ext for ext in CATEGORIE_PAR_EXTENSION if ext.count(".") > 1)
+
+# Libellé utilisé dans les noms générés (Images → image, Feuilles de calcul → feuilles-de-calcul)
+LIBELLE_PAR_CATEGORIE = {
+    categorie: categorie.lower().rstrip('s').replace(' ', '-')
+    for categorie in list(TYPES_FICHIERS) + [CATEGORIE_PAR_DEFAUT]
+}
+
+
+def extension_fichier(nom_fichier):
+    """
+    Retourne l'extension d'un fichier en minuscules, en tenant compte des extensions composées.
+    Exemple : "Sauvegarde.TAR.GZ" → ".tar.gz", "photo.jpg" → ".jpg", ".bashrc" → "".
+    """
+    nom = nom_fichier.lower()
+    point = nom.rfind(".")
+    if point <= 0 or nom[point - 1] in "/\\":
+        return ""
+    if EXTENSIONS_COMPOSEES:
+        point_precedent = nom.rfind(".", 0, point)
+        if point_precedent > 0 and nom[point_precedent:] in EXTENSIONS_COMPOSEES:
+            return nom[point_precedent:]
+    return nom[point:]
+
+
+def categorie_fichier(nom_fichier):
+    """Retourne le dossier de type (Images, Documents...) correspondant à l'extension du fichier."""
+    return CATEGORIE_PAR_EXTENSION.get(extension_fichier(nom_fichier), CATEGORIE_PAR_DEFAUT)
+
+
+def libelle_categorie(categorie):
+    """Retourne le libellé court d'une catégorie pour les noms de fichiers générés."""
+    return LIBELLE_PAR_CATEGORIE.get(categorie) or categorie.lower().rstrip('s').replace(' ', '-')
+
+
+# Banc d'essai : index compilé contre parcours linéaire des listes d'extensions
+if __name__ == "__main__":
+    import os
+    import time
+    import random
+
+    def categorie_lineaire(nom_fichier):
+        extension = os.path.splitext(nom_fichier)[1].lower()
+        for categorie, extensions in TYPES_FICHIERS.items():
+            if extension in extensions:
+                return categorie
+        return CATEGORIE_PAR_DEFAUT
+
+    extensions = list(CATEGORIE_PAR_EXTENSION) + [".inconnu", ".dat", ""]
+    noms = [f"fichier_{i}{random.choice(extensions).upper() if i % 3 == 0 else random.choice(extensions)}"
+            for i in range(1_000_000)]
+
+    for libelle, fonction in (("Parcours linéaire", categorie_lineaire), ("Index compilé", categorie_fichier)):
+        debut = time.perf_counter()
+        for nom in noms:
+            fonction(nom)
+        duree = time.perf_counter() - debut
+        print(f"{libelle:<18} : {duree:.3f} s pour {len(noms):,} noms ({duree / len(noms) * 1e9:.0f} ns/nom)")
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+# Ce fichier exécute par lots les déplacements et suppressions de fichiers.
+# Un déplacement sur le même périphérique est un renommage instantané (lien physique puis suppression de
+# l'ancien nom, qui contrairement à os.rename n'écrase jamais un fichier apparu entre-temps à la destination).
+# Les déplacements entre périphériques (copie + suppression) passent par un pool de threads borné.
+# Une destination occupée au moment de l'exécution reçoit un nouveau nom libre (IndexNoms) au lieu d'être écrasée.
+# Les échecs sont replacés dans une file de reprise avec un délai croissant, sans bloquer le reste du lot.
+# Avec une quarantaine, une suppression devient un renommage vers la quarantaine (réversible),
+# et une restauration ("restaurer") remet un objet de la quarantaine à sa place.
+# "lien" et "reflink" remplacent un doublon (source) par un lien vers l'original (destination).
+
+import os
+import time
+import errno
+import heapq
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from core.links import remplacer_par_lien
+from core.name_index import IndexNoms
+
+logger = logging.getLogger('organizer')
+
+# Configuration
+WORKERS_COPIE = 4  # Copies simultanées entre périphériques
+TENTATIVES_MAX = 3  # Nombre total de tentatives par opération
+DELAI_REPRISE = 0.5  # Délai avant la première reprise (secondes), doublé à chaque échec
+# Erreurs de liaison qu'une nouvelle tentative ne corrigera pas (autre périphérique, reflink non supporté...)
+ERREURS_LIAISON_DEFINITIVES = {errno.EXDEV, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY, errno.EPERM, errno.EMLINK}
+# Erreurs de os.link sur un système de fichiers sans liens physiques (FAT, certains partages réseau...)
+ERREURS_LIEN_NON_SUPPORTE = {errno.EPERM, errno.EOPNOTSUPP, errno.EMLINK, errno.ENOSYS, errno.EINVAL}
+
+
+def renommer_sans_ecraser(source, destination):
+    """
+    Renomme source en destination sur le même périphérique, sans jamais remplacer un fichier existant.
+    Lève FileExistsError si la destination existe (os.rename l'écraserait sans erreur sous POSIX).
+    """
+    if os.name == "nt":
+        os.rename(source, destination)  # Refuse déjà une destination existante
+        return
+    try:
+        os.link(source, destination, follow_symlinks=False)  # Échoue atomiquement si la destination existe
+    except FileExistsError:
+        raise
+    except (OSError, NotImplementedError) as e:
+        if isinstance(e, OSError) and e.errno not in ERREURS_LIEN_NON_SUPPORTE:
+            raise
+        # Pas de lien physique possible : vérification puis renommage (fenêtre de concurrence réduite)
+        if os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), destination)
+        os.rename(source, destination)
+        return
+    os.unlink(source)
+
+
+def deplacer_sans_ecraser(source, destination, copier=False):
+    """
+    Déplace (ou copie) source vers destination, y compris entre périphériques, sans écraser la destination.
+    La copie est écrite sous un nom temporaire du dossier de destination puis renommée sans écraser.
+    """
+    if not copier:
+        try:
+            renommer_sans_ecraser(source, destination)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    if os.path.lexists(destination):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), destination)
+    dossier, nom = os.path.split(destination)
+    temporaire = os.path.join(dossier, f".{nom}.{os.getpid()}.copie")
+    shutil.copy2(source, temporaire, follow_symlinks=False)
+    try:
+        renommer_sans_ecraser(temporaire, destination)
+    except BaseException:
+        os.remove(temporaire)
+        raise
+    if not copier:
+        os.remove(source)
+
+
+class OperationFichier:
+    """
+    Déplacement ("deplacer"), suppression ("supprimer"), restauration depuis la quarantaine ("restaurer")
+    ou remplacement d'un doublon par un lien vers l'original ("lien", "reflink").
+    """
+
+    __slots__ = ("type_action", "source", "destination", "tentatives", "succes", "erreur", "donnees")
+
+    def __init__(self, type_action, source, destination=None, donnees=None):
+        self.type_action = type_action
+        self.source = source
+        self.destination = destination
+        self.donnees = donnees  # Informations libres de l'appelant (action planifiée, libellé...)
+        self.tentatives = 0
+        self.succes = False
+        self.erreur = None
+
+    def __repr__(self):
+        return f"OperationFichier({self.type_action!r}, {self.source!r}, {self.destination!r})"
+
+
+class ExecuteurFichiers:
+    """Exécute un lot d'opérations sur fichiers avec chemin rapide même-périphérique et reprises différées."""
+
+    def __init__(self, workers=WORKERS_COPIE, tentatives_max=TENTATIVES_MAX, delai_reprise=DELAI_REPRISE,
+                 quarantaine=None, index_noms=None):
+        self.workers = workers
+        self.quarantaine = quarantaine  # MagasinQuarantaine, ou None pour supprimer définitivement
+        # IndexNoms du plan, pour attribuer un autre nom à une destination occupée entre-temps
+        # (sans index, un index est construit au premier conflit à partir des destinations du lot)
+        self.index_noms = index_noms
+        self._lot = []
+        self.tentatives_max = tentatives_max
+        self.delai_reprise = delai_reprise
+        self._peripheriques = {}  # dossier → st_dev
+        self._dossiers_crees = set()
+
+    def _peripherique(self, dossier):
+        if dossier not in self._peripheriques:
+            self._peripheriques[dossier] = os.stat(dossier).st_dev
+        return self._peripheriques[dossier]
+
+    def _preparer_dossier(self, dossier):
+        if dossier and dossier not in self._dossiers_crees:
+            if not os.path.isdir(dossier):
+                os.makedirs(dossier, exist_ok=True)
+                logger.info(f"Dossier créé: {dossier}")
+            self._dossiers_crees.add(dossier)
+
+    def _meme_peripherique(self, operation):
+        dossier_source = os.path.dirname(operation.source) or "."
+        dossier_destination = os.path.dirname(operation.destination) or "."
+        return self._peripherique(dossier_source) == self._peripherique(dossier_destination)
+
+    def _lancer(self, operation, pool, en_cours, reprises):
+        """Exécute l'opération immédiatement si elle est rapide, sinon la confie au pool de copie."""
+        operation.tentatives += 1
+        try:
+            if operation.type_action == "supprimer":
+                if self.quarantaine is not None:
+                    # La destination devient l'objet en quarantaine (pour restaurer le fichier)
+                    operation.destination = self.quarantaine.mettre_en_quarantaine(operation.source)
+                else:
+                    os.remove(operation.source)
+                self._terminer(operation)
+                return
+            if operation.type_action == "restaurer":
+                self.quarantaine.restaurer(operation.source, operation.destination)
+                self._terminer(operation)
+                return
+            if operation.type_action in ("lien", "reflink"):
+                remplacer_par_lien(operation.source, operation.destination, operation.type_action)
+                self._terminer(operation)
+                return
+            self._preparer_dossier(os.path.dirname(operation.destination))
+            if self._meme_peripherique(operation):
+                renommer_sans_ecraser(operation.source, operation.destination)
+                self._terminer(operation)
+                return
+        except FileExistsError as e:
+            self._destination_occupee(operation, e, pool, en_cours, reprises)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:  # EXDEV : montage lié, on passe par une copie
+                self._planifier_reprise(operation, e, reprises)
+                return
+        en_cours[pool.submit(deplacer_sans_ecraser, operation.source, operation.destination)] = operation
+
+    def _destination_occupee(self, operation, erreur, pool, en_cours, reprises):
+        """Réserve un autre nom pour une destination apparue depuis la planification et relance l'opération."""
+        if operation.type_action not in ("deplacer", "restaurer") or operation.tentatives >= self.tentatives_max:
+            self._planifier_reprise(operation, erreur, reprises)
+            return
+        if self.index_noms is None:
+            self.index_noms = IndexNoms()
+            for autre in self._lot:
+                if autre.type_action in ("deplacer", "restaurer") and not autre.succes and autre is not operation:
+                    self.index_noms.occuper(autre.destination)  # Noms promis aux autres opérations du lot
+        occupee = operation.destination
+        operation.destination = self.index_noms.reserver(occupee)
+        logger.warning(f"Destination {occupee} apparue entre-temps : {operation.source} → {operation.destination}")
+        self._lancer(operation, pool, en_cours, reprises)
+
+    def _terminer(self, operation):
+        operation.succes = True
+        operation.erreur = None
+
+    def _planifier_reprise(self, operation, erreur, reprises):
+        operation.erreur = erreur
+        definitive = (isinstance(erreur, FileExistsError)  # Une reprise ne libérerait pas la destination
+                      or (operation.type_action in ("lien", "reflink")
+                          and getattr(erreur, "errno", None) in ERREURS_LIAISON_DEFINITIVES))
+        if operation.tentatives >= self.tentatives_max or definitive:
+            logger.error(f"Échec définitif pour {operation.source}: {erreur}")
+            return
+        delai = self.delai_reprise * (2 ** (operation.tentatives - 1))
+        logger.warning(f"Erreur sur {operation.source} ({erreur}), nouvelle tentative dans {delai:.1f}s")
+        heapq.heappush(reprises, (time.monotonic() + delai, id(operation), operation))
+
+    def executer(self, operations):
+        """
+        Exécute toutes les opérations et retourne la liste (chaque opération porte succes/erreur).
+        Les reprises sont traitées pendant que les copies entre périphériques continuent.
+        """
+        operations = list(operations)
+        self._lot = operations
+        reprises = []  # Tas (échéance, id, opération)
+        en_cours = {}  # Future → opération
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for operation in operations:
+                self._lancer(operation, pool, en_cours, reprises)
+
+            while en_cours or reprises:
+                delai = max(0.0, reprises[0][0] - time.monotonic()) if reprises else None
+                if en_cours:
+                    terminees, _ = wait(list(en_cours), timeout=delai, return_when=FIRST_COMPLETED)
+                    for future in terminees:
+                        operation = en_cours.pop(future)
+                        erreur = future.exception()
+                        if erreur is None:
+                            self._terminer(operation)
+                        elif isinstance(erreur, FileExistsError):
+                            self._destination_occupee(operation, erreur, pool, en_cours, reprises)
+                        else:
+                            self._planifier_reprise(operation, erreur, reprises)
+                elif delai:
+                    time.sleep(delai)
+
+                maintenant = time.monotonic()
+                while reprises and reprises[0][0] <= maintenant:
+                    _, _, operation = heapq.heappop(reprises)
+                    self._lancer(operation, pool, en_cours, reprises)
+
+        return operations
+
+
+def executer_operations(operations, workers=WORKERS_COPIE, quarantaine=None, index_noms=None):
+    """Raccourci : exécute un lot d'OperationFichier avec un exécuteur par défaut."""
+    return ExecuteurFichiers(workers, quarantaine=quarantaine, index_noms=index_noms).executer(operations)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# Ce fichier gère un cache persistant des hash de fichiers.
+# Chaque hash est associé à l'identité du fichier (périphérique, inode, taille, dates de modification et de
+# changement d'état en ns) : tant que ces valeurs ne changent pas, le fichier n'a pas besoin d'être relu.
+# Le cache est stocké dans une base SQLite et invalidé automatiquement lorsqu'un fichier est modifié.
+# Les entrées des fichiers supprimés ou remplacés ne sont plus jamais lues : celles qui n'ont pas servi depuis
+# HASH_CACHE_AGE_MAX_JOURS sont purgées à l'ouverture du cache, pour que la base ne grossisse pas sans fin.
+
+import os
+import time
+import sqlite3
+import threading
+import atexit
+import logging
+
+# Configuration
+HASH_CACHE_FILE = os.path.join("json", "hash_cache.sqlite")
+COMMIT_INTERVALLE = 500  # Nombre d'écritures avant une validation sur disque
+HASH_CACHE_AGE_MAX_JOURS = 90  # Entrées non utilisées depuis ce délai supprimées à l'ouverture
+
+logger = logging.getLogger('organizer')
+
+
+class CacheHash:
+    """Cache SQLite des hash de fichiers indexé par identité de fichier."""
+
+    def __init__(self, chemin=HASH_CACHE_FILE):
+        self.chemin = chemin
+        self.verrou = threading.Lock()
+        self.ecritures_en_attente = 0
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("PRAGMA synchronous=NORMAL")
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS hashes (
+                   device INTEGER NOT NULL,
+                   inode INTEGER NOT NULL,
+                   type_hash TEXT NOT NULL,
+                   taille INTEGER NOT NULL,
+                   mtime_ns INTEGER NOT NULL,
+                   hash TEXT NOT NULL,
+                   chemin TEXT,
+                   PRIMARY KEY (device, inode, type_hash)
+               )"""
+        )
+        # Bases créées avant la purge : ctime_ns NULL invalide l'entrée, vu NULL la rend purgeable
+        existantes = {ligne[1] for ligne in self.connexion.execute("PRAGMA table_info(hashes)")}
+        for colonne in ("ctime_ns", "vu"):
+            if colonne not in existantes:
+                self.connexion.execute(f"ALTER TABLE hashes ADD COLUMN {colonne} INTEGER")
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_hashes_vu ON hashes (vu)")
+        self.connexion.commit()
+        self._vus = set()  # Clés lues depuis la dernière validation (date d'utilisation à mettre à jour)
+
+    def lire(self, st, type_hash):
+        """Retourne le hash en cache si l'identité du fichier n'a pas changé, sinon None."""
+        if not st.st_ino:
+            return None  # Identité inconnue (inode à 0) : la clé serait partagée par d'autres fichiers
+        with self.verrou:
+            ligne = self.connexion.execute(
+                "SELECT taille, mtime_ns, ctime_ns, hash FROM hashes WHERE device = ? AND inode = ? AND type_hash = ?",
+                (st.st_dev, st.st_ino, type_hash),
+            ).fetchone()
+            if ligne is None:
+                return None
+            taille, mtime_ns, ctime_ns, valeur = ligne
+            # ctime change aussi quand un inode recyclé reçoit un autre fichier de même taille et même mtime
+            if taille != st.st_size or mtime_ns != st.st_mtime_ns or ctime_ns != st.st_ctime_ns:
+                return None  # Fichier modifié depuis le calcul : l'entrée sera remplacée
+            self._vus.add((st.st_dev, st.st_ino, type_hash))
+        return valeur
+
+    def enregistrer(self, st, type_hash, valeur, chemin=None):
+        """Enregistre (ou remplace) le hash d'un fichier."""
+        if not st.st_ino:
+            return
+        with self.verrou:
+            self.connexion.execute(
+                "INSERT OR REPLACE INTO hashes (device, inode, type_hash, taille, mtime_ns, ctime_ns, hash, chemin, vu) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (st.st_dev, st.st_ino, type_hash, st.st_size, st.st_mtime_ns, st.st_ctime_ns, valeur, chemin,
+                 int(time.time())),
+            )
+            self.ecritures_en_attente += 1
+            if self.ecritures_en_attente >= COMMIT_INTERVALLE:
+                self.connexion.commit()
+                self.ecritures_en_attente = 0
+
+    def valider(self):
+        """Écrit sur disque les entrées en attente et la date d'utilisation des entrées lues."""
+        with self.verrou:
+            if self._vus:
+                self.connexion.executemany(
+                    "UPDATE hashes SET vu = ? WHERE device = ? AND inode = ? AND type_hash = ?",
+                    ((int(time.time()), *cle) for cle in self._vus),
+                )
+                self._vus.clear()
+                self.ecritures_en_attente += 1
+            if self.ecritures_en_attente:
+                self.connexion.commit()
+                self.ecritures_en_attente = 0
+
+    def purger(self, age_max_jours=HASH_CACHE_AGE_MAX_JOURS):
+        """Supprime les entrées ni écrites ni lues depuis age_max_jours (fichiers supprimés ou remplacés)."""
+        limite = int(time.time() - age_max_jours * 86400)
+        with self.verrou:
+            supprimees = self.connexion.execute(
+                "DELETE FROM hashes WHERE vu IS NULL OR vu < ?", (limite,)).rowcount
+            self.connexion.commit()
+            self.ecritures_en_attente = 0
+        if supprimees:
+            logger.info(f"{supprimees} entrée(s) périmée(s) supprimée(s) du cache des hash.")
+        return supprimees
+
+    def vider(self):
+        """Supprime toutes les entrées du cache."""
+        with self.verrou:
+            self.connexion.execute("DELETE FROM hashes")
+            self.connexion.commit()
+            self.ecritures_en_attente = 0
+            self._vus.clear()
+
+    def fermer(self):
+        self.valider()
+        with self.verrou:
+            self.connexion.close()
+
+
+_cache = None
+_verrou_cache = threading.Lock()
+
+
+def obtenir_cache():
+    """Retourne le cache partagé, ou None s'il ne peut pas être ouvert."""
+    global _cache
+    with _verrou_cache:
+        if _cache is None:
+            try:
+                _cache = CacheHash()
+                _cache.purger()
+                atexit.register(_cache.fermer)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Cache des hash indisponible ({HASH_CACHE_FILE}) : {e}")
+                _cache = False
+        return _cache or None
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# Ce fichier regroupe les algorithmes de hash utilisables pour la détection des doublons.
+# Les algorithmes rapides non cryptographiques (xxHash, BLAKE3) sont utilisés s'ils sont installés,
+# sinon BLAKE2b de la bibliothèque standard. MD5 et SHA-256 restent disponibles sur demande.
+# La lecture se fait dans un tampon préalloué (readinto) pour éviter une allocation par bloc.
+# Au-delà de SEUIL_MMAP, les fichiers sont projetés en mémoire (mmap) et hashés sans copie.
+
+import os
+import mmap
+import hashlib
+import threading
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Taille du tampon de lecture réutilisé pour chaque fichier
+TAILLE_TAMPON = 1024 * 1024
+# Taille à partir de laquelle un fichier est hashé via mmap (voir le banc d'essai en bas du fichier)
+SEUIL_MMAP = 16 * 1024 * 1024
+# Taille des tranches passées au hash depuis la projection mémoire
+TRANCHE_MMAP = 8 * 1024 * 1024
+
+# Registre nom → fabrique d'objets de hash (update / hexdigest)
+ALGORITHMES_HASH = {
+    "md5": hashlib.md5,
+    "sha256": hashlib.sha256,
+    "blake2b": lambda: hashlib.blake2b(digest_size=16),
+}
+if xxhash is not None:
+    ALGORITHMES_HASH["xxh3"] = xxhash.xxh3_128
+if blake3 is not None:
+    ALGORITHMES_HASH["blake3"] = blake3.blake3
+
+# Ordre de préférence pour l'algorithme par défaut (du plus rapide au plus lent)
+PREFERENCE_ALGORITHMES = ["xxh3", "blake3", "blake2b", "md5"]
+
+_tampons = threading.local()
+
+
+def algorithme_par_defaut():
+    """Retourne l'algorithme disponible le plus rapide."""
+    for nom in PREFERENCE_ALGORITHMES:
+        if nom in ALGORITHMES_HASH:
+            return nom
+    return "md5"
+
+
+ALGORITHME_HASH = algorithme_par_defaut()
+
+
+def creer_hasher(algorithme=None):
+    """Crée un objet de hash pour l'algorithme demandé."""
+    algorithme = algorithme or ALGORITHME_HASH
+    if algorithme not in ALGORITHMES_HASH:
+        raise ValueError(
+            f"Algorithme de hash inconnu : {algorithme} (disponibles : {', '.join(sorted(ALGORITHMES_HASH))})"
+        )
+    return ALGORITHMES_HASH[algorithme]()
+
+
+def _tampon():
+    """Retourne le tampon de lecture propre au thread courant."""
+    tampon = getattr(_tampons, "tampon", None)
+    if tampon is None:
+        tampon = memoryview(bytearray(TAILLE_TAMPON))
+        _tampons.tampon = tampon
+    return tampon
+
+
+def _lire_dans(hasher, f, limite=None):
+    """Lit le fichier dans le tampon préalloué et met à jour le hash, jusqu'à limite octets si précisée."""
+    tampon = _tampon()
+    restant = limite
+    while restant is None or restant > 0:
+        vue = tampon if restant is None or restant >= len(tampon) else tampon[:restant]
+        lus = f.readinto(vue)
+        if not lus:
+            break
+        hasher.update(vue[:lus])
+        if restant is not None:
+            restant -= lus
+
+
+def _lire_mmap(hasher, f, taille):
+    """Hash le fichier depuis une projection mémoire. Retourne False si mmap n'est pas supporté."""
+    try:
+        projection = mmap.mmap(f.fileno(), taille, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return False  # Système de fichiers sans mmap (certains montages réseau, FUSE...)
+    with projection:
+        if hasattr(projection, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            projection.madvise(mmap.MADV_SEQUENTIAL)
+        vue = memoryview(projection)
+        try:
+            for debut in range(0, taille, TRANCHE_MMAP):
+                hasher.update(vue[debut:debut + TRANCHE_MMAP])
+        finally:
+            vue.release()
+    return True
+
+
+def hash_fichier(fichier, algorithme=None, seuil_mmap=SEUIL_MMAP):
+    """
+    Calcule le hash complet d'un fichier.
+    Les fichiers d'au moins seuil_mmap octets sont lus par mmap, avec repli sur la lecture bufferisée.
+    """
+    hasher = creer_hasher(algorithme)
+    with open(fichier, 'rb', buffering=0) as f:
+        taille = os.fstat(f.fileno()).st_size
+        if seuil_mmap is not None and taille >= seuil_mmap and _lire_mmap(hasher, f, taille):
+            return hasher.hexdigest()
+        _lire_dans(hasher, f)
+    return hasher.hexdigest()
+
+
+def hash_partiel_fichier(fichier, taille_echantillon, algorithme=None):
+    """
+    Calcule un hash sur le début et la fin d'un fichier.
+    Pour un fichier de moins de 2 * taille_echantillon octets, le fichier est lu en entier.
+    """
+    hasher = creer_hasher(algorithme)
+    with open(fichier, 'rb', buffering=0) as f:
+        _lire_dans(hasher, f, taille_echantillon)
+        taille = os.fstat(f.fileno()).st_size
+        if taille > taille_echantillon:
+            f.seek(max(taille_echantillon, taille - taille_echantillon))
+            _lire_dans(hasher, f, taille_echantillon)
+    return hasher.hexdigest()
+
+
+# Banc d'essai : compare lecture bufferisée et mmap pour situer le seuil SEUIL_MMAP
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    import time
+
+    parser = argparse.ArgumentParser(description="Compare la lecture bufferisée et mmap pour le hash")
+    parser.add_argument("--tailles", type=int, nargs="+", default=[1, 4, 16, 64, 256], help="Tailles de fichiers à tester (Mio)")
+    parser.add_argument("--algorithme", choices=sorted(ALGORITHMES_HASH), default=ALGORITHME_HASH)
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Algorithme : {args.algorithme}")
+    print(f"{'Taille':>10} {'Bufferisé':>12} {'mmap':>12} {'Gain':>8}")
+    croisement = None
+    for taille_mio in args.tailles:
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            bloc = os.urandom(1024 * 1024)
+            for _ in range(taille_mio):
+                tmp.write(bloc)
+        try:
+            resultats = {}
+            for nom, seuil in (("bufferise", None), ("mmap", 0)):
+                hash_fichier(tmp.name, args.algorithme, seuil)  # Mise en cache du fichier par le système
+                debut = time.perf_counter()
+                for _ in range(args.repetitions):
+                    hash_fichier(tmp.name, args.algorithme, seuil)
+                resultats[nom] = (time.perf_counter() - debut) / args.repetitions
+        finally:
+            os.remove(tmp.name)
+        gain = resultats["bufferise"] / resultats["mmap"]
+        if croisement is None and gain > 1:
+            croisement = taille_mio
+        print(f"{taille_mio:>7} Mio {resultats['bufferise'] * 1000:>9.1f} ms {resultats['mmap'] * 1000:>9.1f} ms {gain:>7.2f}x")
+    print(f"mmap devient plus rapide à partir de : {f'{croisement} Mio' if croisement else 'jamais sur ces tailles'}")
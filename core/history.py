@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
 # Ce fichier gère l'historique des actions effectuées par l'utilisateur, y compris la sauvegarde, le chargement et l'affichage de l'historique.
-# Il utilise un fichier JSON pour stocker les données et un fichier de log pour enregistrer les erreurs et les actions.
+# Il utilise un journal JSON Lines découpé en segments par jour ou par semaine (core/history_segments.py) et un fichier de log pour enregistrer les erreurs et les actions.
+# Enregistrer une action ne réécrit jamais le fichier : les segments terminés sont compressés en gzip et la rétention supprime des segments entiers.
+# Pour les opérations en masse, SessionHistorique accumule les entrées en mémoire et les écrit par lots.
+# Chaque session est une exécution identifiée (json/executions.jsonl), que core/undo_redo.py peut annuler d'un bloc.
+# Avec HISTORY_BACKEND = "sqlite", l'historique est stocké dans une base SQLite indexée (core/history_sqlite.py) :
+# les filtres de l'interface deviennent des requêtes indexées et le nettoyage une seule suppression par plage de dates.
 # Il inclut également des fonctionnalités pour nettoyer l'historique en fonction d'une période de rétention définie et pour exporter l'historique dans différents formats.
 
 # Importation des bibliothèques nécessaires
@@ -8,70 +13,396 @@ import sys
 
 import os
 import json
+import time
+import signal
+import atexit
 import logging
+import threading
+import weakref
 import gzip
+import uuid
 from datetime import datetime, timedelta
-from tabulate import tabulate
 
 # Configuration
-HISTORY_FILE = "history.json"
+HISTORY_DIR = os.path.join("json", "history")  # Segments JSON Lines (un fichier par période)
+GRANULARITE_SEGMENTS = "jour"  # "jour" ou "semaine"
+HISTORY_FILE = os.path.join("json", "history.jsonl")  # Journal unique (format précédent), migré au premier accès
+ANCIEN_HISTORY_FILE = os.path.join("json", "history.json")  # Ancien format (liste JSON), migré au premier accès
 RETENTION_DAYS = 30
+COMPACTION_INTERVALLE = 10000  # Nombre d'ajouts entre deux passes de rétention
 LOG_FILE = r"logs/history.log"
+TAILLE_LOT_HISTORIQUE = 1000  # Entrées accumulées avant écriture par une session
+DELAI_LOT_HISTORIQUE = 5.0  # Secondes maximum entre deux écritures d'une session
+FSYNC_HISTORIQUE = False  # Forcer l'écriture physique (os.fsync) après chaque lot
+HISTORY_BACKEND = "jsonl"  # "jsonl" (journal) ou "sqlite" (base indexée)
+HISTORY_DB = os.path.join("json", "history.sqlite")
+EXECUTIONS_FILE = os.path.join("json", "executions.jsonl")  # Index des exécutions (une ligne par session)
 
-# Configurer le logger
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# Logger du module : son fichier (LOG_FILE, relatif au dossier courant) n'est ouvert qu'au premier accès
+# à l'historique, pas à l'importation (qui peut précéder le changement de dossier de l'application ou des tests)
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+_handler_log = None
 
-def charger_historique():
+_ajouts_depuis_compaction = 0
+_stockage = None
+
+def _configurer_log():
+    """Ajoute au logger du module un handler vers LOG_FILE (une seule fois)."""
+    global _handler_log
+    if _handler_log is not None:
+        return
+    dossier = os.path.dirname(LOG_FILE)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    _handler_log = logging.FileHandler(LOG_FILE, encoding="utf-8")
+    _handler_log.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(_handler_log)
+
+def _obtenir_stockage():
+    """Retourne le stockage de l'historique (segments JSON Lines ou base SQLite selon HISTORY_BACKEND)."""
+    global _stockage
+    if _stockage is None:
+        _configurer_log()
+        if HISTORY_BACKEND == "sqlite":
+            from core.history_sqlite import HistoriqueSQLite
+            stockage = HistoriqueSQLite(HISTORY_DB)
+        else:
+            from core.history_segments import JournalSegmente
+            stockage = JournalSegmente(HISTORY_DIR, GRANULARITE_SEGMENTS)
+        if stockage.nouveau:
+            _migrer_ancien_historique(stockage)
+        _stockage = stockage
+    return _stockage
+
+def _lire_journal(chemin):
+    """Lit un journal JSON Lines unique (format précédent) en ignorant les lignes illisibles."""
+    with open(chemin, "r", encoding="utf-8") as f:
+        for numero, ligne in enumerate(f, 1):
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+            try:
+                yield json.loads(ligne)
+            except json.JSONDecodeError as e:
+                logger.error(f"Ligne {numero} de {chemin} illisible : {e}")
+
+def _migrer_ancien_historique(stockage):
     """
-    Charge l'historique depuis le fichier JSON ou GZIP si disponible.
+    Importe dans un stockage vide l'historique des formats précédents : segments (vers SQLite),
+    journal unique history.jsonl ou liste JSON history.json. Les fichiers d'origine sont conservés.
     """
-    if not os.path.exists(HISTORY_FILE):
-        logger.warning("Fichier d'historique introuvable.")
-        return []
+    source = entrees = None
+    if HISTORY_BACKEND == "sqlite" and os.path.isdir(HISTORY_DIR):
+        # Les segments sont l'historique courant (même vide) : les formats plus anciens sont ignorés
+        from core.history_segments import JournalSegmente
+        source, entrees = HISTORY_DIR, JournalSegmente(HISTORY_DIR, GRANULARITE_SEGMENTS).iterer()
+    elif os.path.exists(HISTORY_FILE):
+        source, entrees = HISTORY_FILE, _lire_journal(HISTORY_FILE)
+    elif os.path.exists(ANCIEN_HISTORY_FILE):
+        try:
+            with open(ANCIEN_HISTORY_FILE, "r", encoding="utf-8") as f:
+                source, entrees = ANCIEN_HISTORY_FILE, json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Impossible de migrer l'ancien historique {ANCIEN_HISTORY_FILE} : {e}")
+            return
+    if entrees is None:
+        return
+    stockage.remplacer(entrees)
+    logger.info(f"Historique migré de {source} ({HISTORY_BACKEND}).")
 
-    try:
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
-        logger.error(f"Erreur de décodage JSON : {e}")
-        return []
+def iterer_historique(depuis=None):
+    """
+    Parcourt l'historique entrée par entrée sans charger tout le fichier en mémoire.
+    Les lignes illisibles (écriture interrompue) sont ignorées.
+    Avec depuis (datetime), seuls les segments récents sont lus.
+    """
+    stockage = _obtenir_stockage()
+    if depuis is not None and HISTORY_BACKEND != "sqlite":
+        yield from stockage.iterer(depuis=depuis)
+        return
+    for entree in stockage.iterer():
+        if depuis is None or str(entree.get("date", "")) >= depuis.isoformat():
+            yield entree
+
+def charger_historique():
+    """
+    Charge l'historique complet depuis le journal.
+    """
+    return list(iterer_historique())
 
 def sauvegarder_historique(historique):
     """
-    Sauvegarde l'historique dans un fichier JSON.
+    Réécrit entièrement l'historique (utilisé pour la migration et l'effacement).
+    Les segments sont écrits à côté puis échangés pour ne jamais laisser un historique partiel.
     """
     try:
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(historique, f, indent=4)
+        _obtenir_stockage().remplacer(historique)
         logger.info("Historique sauvegardé avec succès.")
     except Exception as e:
         logger.error(f"Erreur lors de la sauvegarde de l'historique : {e}")
 
-def enregistrer_action(action: str, chemin_source: str, chemin_destination: str = None):
-    """
-    Ajoute une action à l'historique avec validation des entrées.
-    """
+def _creer_entree(action, chemin_source, chemin_destination=None, execution=None, copie=None):
     if not isinstance(action, str) or not action:
         raise ValueError("L'action doit être une chaîne non vide.")
-    if not os.path.exists(chemin_source):
-        raise ValueError(f"Le chemin source n'existe pas : {chemin_source}")
-
-    historique = charger_historique()
-    nouvelle_entree = {
+    entree = {
         "date": datetime.now().isoformat(),
         "action": action,
         "source": chemin_source,
         "destination": chemin_destination or "N/A"
     }
-    historique.append(nouvelle_entree)
-    sauvegarder_historique(historique)
+    if execution:
+        entree["execution"] = execution
+    if copie:
+        entree["copie"] = copie  # Copie conservée d'un fichier supprimé, pour pouvoir le restaurer
+    return entree
+
+def _ajouter_entrees(entrees, fsync=False):
+    """Ajoute des entrées en fin de segment (une écriture par segment), puis applique la rétention si nécessaire."""
+    global _ajouts_depuis_compaction
+    if not entrees:
+        return
+    _obtenir_stockage().ajouter(entrees, fsync)
+
+    _ajouts_depuis_compaction += len(entrees)
+    if _ajouts_depuis_compaction >= COMPACTION_INTERVALLE:
+        compacter_historique()
+
+def enregistrer_action(action: str, chemin_source: str, chemin_destination: str = None):
+    """
+    Ajoute une action à la fin du journal avec validation des entrées (O(1), sans relire l'historique).
+    """
+    if not os.path.exists(chemin_source):
+        raise ValueError(f"Le chemin source n'existe pas : {chemin_source}")
+    _ajouter_entrees([_creer_entree(action, chemin_source, chemin_destination)], FSYNC_HISTORIQUE)
     logger.info(f"Action enregistrée : {action}, source : {chemin_source}, destination : {chemin_destination}")
 
+class SessionHistorique:
+    """
+    Session d'enregistrement groupé pour les opérations en masse.
+    Les entrées sont gardées en mémoire et écrites par lots (taille ou délai atteint, fermeture,
+    fin du programme ou signal d'arrêt).
+
+    Toutes les entrées d'une session portent le même identifiant d'exécution ; à la fermeture,
+    l'exécution est ajoutée à l'index des exécutions (pour annuler/rétablir).
+
+    Exemple :
+        with SessionHistorique() as session:
+            session.enregistrer("Déplacement", source, destination)
+    """
+
+    def __init__(self, taille_lot=TAILLE_LOT_HISTORIQUE, delai_max=DELAI_LOT_HISTORIQUE, fsync=FSYNC_HISTORIQUE,
+                 type_execution="organisation"):
+        self.taille_lot = taille_lot
+        self.delai_max = delai_max
+        self.fsync = fsync
+        self.type_execution = type_execution  # "organisation", "annulation" ou "retablissement"
+        self.debut = datetime.now()
+        self.execution = f"{self.debut:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.indexee = False
+        self.tampon = []
+        self.verrou = threading.RLock()  # Réentrant : un signal peut vider la session pendant une écriture
+        self.derniere_ecriture = time.monotonic()
+        self.total = 0
+        _sessions_ouvertes.add(self)
+        _installer_protections()
+
+    def enregistrer(self, action, chemin_source, chemin_destination=None, copie=None):
+        """Ajoute une action au lot en cours (la source peut déjà avoir été déplacée ou supprimée)."""
+        entree = _creer_entree(
+            action,
+            os.path.abspath(chemin_source),
+            os.path.abspath(chemin_destination) if chemin_destination else None,
+            self.execution,
+            os.path.abspath(copie) if copie else None,
+        )
+        with self.verrou:
+            self.tampon.append(entree)
+            plein = len(self.tampon) >= self.taille_lot
+            expire = time.monotonic() - self.derniere_ecriture >= self.delai_max
+        if plein or expire:
+            self.vider()
+
+    def vider(self):
+        """Écrit les entrées en attente dans le journal."""
+        with self.verrou:
+            entrees, self.tampon = self.tampon, []
+            self.derniere_ecriture = time.monotonic()
+            if not entrees:
+                return
+            try:
+                _ajouter_entrees(entrees, self.fsync)
+            except Exception as e:
+                self.tampon[0:0] = entrees  # Réessayer au prochain lot
+                logger.error(f"Erreur lors de l'écriture de l'historique : {e}")
+                return
+            self.total += len(entrees)
+        logger.info(f"{len(entrees)} action(s) enregistrée(s) dans l'historique.")
+
+    def fermer(self):
+        self.vider()
+        _sessions_ouvertes.discard(self)
+        with self.verrou:
+            if self.total and not self.indexee:
+                self.indexee = True
+                _indexer_execution(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fermer()
+        return False
+
+_sessions_ouvertes = weakref.WeakSet()
+_atexit_installe = False
+_signaux_installes = False
+
+def _indexer_execution(session):
+    """Ajoute une exécution terminée à l'index des exécutions."""
+    execution = {
+        "execution": session.execution,
+        "type": session.type_execution,
+        "debut": session.debut.isoformat(),
+        "fin": datetime.now().isoformat(),
+        "nombre": session.total,
+    }
+    try:
+        dossier = os.path.dirname(EXECUTIONS_FILE)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        with open(EXECUTIONS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(execution, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.error(f"Impossible d'indexer l'exécution {session.execution} : {e}")
+
+def executions_historique():
+    """Retourne les exécutions enregistrées, de la plus ancienne à la plus récente."""
+    if not os.path.exists(EXECUTIONS_FILE):
+        return []
+    return list(_lire_journal(EXECUTIONS_FILE))
+
+def entrees_execution(execution):
+    """
+    Retourne les entrées d'une exécution dans l'ordre d'enregistrement.
+    Seuls les segments postérieurs au début de l'exécution sont lus.
+    """
+    depuis = None
+    for connue in executions_historique():
+        if connue.get("execution") == execution:
+            depuis = datetime.fromisoformat(connue["debut"])
+            break
+    return _obtenir_stockage().entrees_execution(execution, depuis)
+
+def _vider_sessions():
+    for session in list(_sessions_ouvertes):
+        session.vider()
+
+def _fermer_sessions():
+    for session in list(_sessions_ouvertes):
+        session.fermer()
+
+def _installer_signaux():
+    """
+    Vide les sessions ouvertes à la réception de SIGTERM/SIGINT, puis laisse agir le gestionnaire précédent.
+    Les signaux ne peuvent être interceptés que depuis le thread principal : appelée depuis un autre thread,
+    la fonction ne fait rien et l'installation sera retentée au prochain appel.
+    """
+    global _signaux_installes
+    if _signaux_installes or threading.current_thread() is not threading.main_thread():
+        return
+    for nom in ("SIGTERM", "SIGINT"):
+        numero = getattr(signal, nom, None)
+        if numero is None:
+            continue
+        precedent = signal.getsignal(numero)
+
+        def gestionnaire(signum, frame, precedent=precedent):
+            _vider_sessions()
+            if callable(precedent):
+                precedent(signum, frame)
+            elif precedent == signal.SIG_DFL:
+                signal.signal(signum, signal.SIG_DFL)
+                signal.raise_signal(signum)
+
+        try:
+            signal.signal(numero, gestionnaire)
+        except (ValueError, OSError):
+            pass
+    _signaux_installes = True
+
+def _installer_protections():
+    """Vide les sessions ouvertes à la fin du programme et à la réception de SIGTERM/SIGINT."""
+    global _atexit_installe
+    if not _atexit_installe:
+        _atexit_installe = True
+        atexit.register(_fermer_sessions)
+    _installer_signaux()
+
+# Les sessions s'ouvrent souvent dans des threads (organisation, surveillance) : les signaux sont
+# interceptés dès l'importation, qui a lieu dans le thread principal au démarrage de l'application.
+_installer_signaux()
+
+def compacter_historique():
+    """
+    Applique la rétention (RETENTION_DAYS) : suppression des segments entièrement expirés
+    (ou une suppression par plage de dates avec SQLite) et compression des segments terminés.
+    Retourne le nombre de segments (ou d'entrées SQLite) supprimés.
+    """
+    global _ajouts_depuis_compaction
+    limite = datetime.now() - timedelta(days=RETENTION_DAYS)
+    stockage = _obtenir_stockage()
+    supprimes = stockage.supprimer_avant(limite.isoformat())
+    if HISTORY_BACKEND != "sqlite":
+        stockage.compresser_segments()
+    executions = executions_historique()
+    conservees = [e for e in executions if str(e.get("fin", "")) > limite.isoformat()]
+    if len(conservees) < len(executions):
+        temporaire = EXECUTIONS_FILE + ".tmp"
+        with open(temporaire, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in conservees)
+        os.replace(temporaire, EXECUTIONS_FILE)
+    _ajouts_depuis_compaction = 0
+    return supprimes
+
+def effacer_historique():
+    """
+    Vide l'historique après en avoir fait une copie de sauvegarde. Retourne le chemin de la sauvegarde.
+    """
+    if os.path.exists(EXECUTIONS_FILE):
+        os.replace(EXECUTIONS_FILE, EXECUTIONS_FILE + ".bak")
+    stockage = _obtenir_stockage()
+    sauvegarde = (HISTORY_DB if HISTORY_BACKEND == "sqlite" else HISTORY_DIR) + ".bak"
+    stockage.sauvegarder_copie(sauvegarde)
+    stockage.remplacer([])
+    return sauvegarde
+
+def rechercher_historique(date=None, action=None, texte=None, limite=None):
+    """
+    Retourne les entrées filtrées, les plus récentes en premier.
+
+    Args:
+        date: Jour au format "YYYY-MM-DD"
+        action: Type d'action exact ("Déplacement", "Suppression"...)
+        texte: Texte recherché (sans tenir compte de la casse) dans les chemins source et destination
+        limite: Nombre maximum d'entrées (None pour toutes)
+    """
+    return _obtenir_stockage().rechercher(date, action, texte, limite)
+
+def compter_historique():
+    """Retourne le nombre d'entrées de l'historique."""
+    return _obtenir_stockage().compter()
+
+def actions_historique():
+    """Retourne la liste triée des types d'actions présents dans l'historique."""
+    return _obtenir_stockage().actions()
+
 def afficher_historique():
     """
     Affiche l'historique en format tabulaire.
     """
+    from tabulate import tabulate  # Dépendance utilisée uniquement pour l'affichage en console
+
     historique = charger_historique()
     if not historique:
         print("📂 Aucun historique disponible.")
@@ -85,42 +416,138 @@ def nettoyer_historique():
     """
     Supprime les entrées de l'historique vieilles de plus de RETENTION_DAYS jours.
     """
-    historique = charger_historique()
-    maintenant = datetime.now()
-    filtré = [
-        h for h in historique
-        if datetime.fromisoformat(h["date"]) > maintenant - timedelta(days=RETENTION_DAYS)
-    ]
-    sauvegarder_historique(filtré)
-    logger.info(f"Historique nettoyé. Entrées restantes : {len(filtré)}")
+    supprimes = compacter_historique()
+    logger.info(f"Historique nettoyé (rétention de {RETENTION_DAYS} jours) : {supprimes} élément(s) supprimé(s).")
+
+FORMATS_EXPORT = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".parquet": "parquet"}
+FICHIERS_EXPORT = {"csv": "history.csv", "json": "history_export.json", "jsonl": "history_export.jsonl",
+                   "parquet": "history_export.parquet"}
+COLONNES_EXPORT = ("date", "action", "source", "destination")
+TAILLE_LOT_EXPORT = 5000  # Entrées lues et écrites par lot pendant un export
+
+def _lots(entrees, taille_lot):
+    """Regroupe un itérable d'entrées en listes de taille_lot éléments au plus."""
+    lot = []
+    for entree in entrees:
+        lot.append(entree)
+        if len(lot) >= taille_lot:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+def _valeurs_export(entree):
+    return [entree.get(c, "N/A" if c == "destination" else "") for c in COLONNES_EXPORT]
+
+def _ouvrir_export(chemin, compresser):
+    if compresser:
+        return gzip.open(chemin, "wt", encoding="utf-8", newline="")
+    return open(chemin, "w", encoding="utf-8", newline="")
+
+def _exporter_csv(f, lots):
+    import csv
+    writer = csv.writer(f)  # Guillemets et échappement gérés par le module csv
+    writer.writerow(["Date", "Action", "Source", "Destination"])
+    for lot in lots:
+        writer.writerows(_valeurs_export(entree) for entree in lot)
+
+def _exporter_jsonl(f, lots):
+    for lot in lots:
+        f.write("".join(json.dumps(dict(zip(COLONNES_EXPORT, _valeurs_export(e))), ensure_ascii=False) + "\n"
+                        for e in lot))
 
-def exporter_historique(format="csv"):
+def _exporter_json(f, lots):
+    """Tableau JSON écrit élément par élément (même résultat qu'un json.dump, sans tout charger)."""
+    f.write("[")
+    premier = True
+    for lot in lots:
+        morceaux = []
+        for entree in lot:
+            morceaux.append(("\n    " if premier else ",\n    ")
+                            + json.dumps(dict(zip(COLONNES_EXPORT, _valeurs_export(entree))), ensure_ascii=False))
+            premier = False
+        f.write("".join(morceaux))
+    f.write("]" if premier else "\n]")
+
+def _exporter_parquet(chemin, lots, compresser):
+    """Format en colonnes : chaque lot devient un groupe de lignes Parquet (nécessite pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("L'export Parquet nécessite pyarrow (pip install pyarrow).")
+    schema = pa.schema([(c, pa.string()) for c in COLONNES_EXPORT])
+    with pq.ParquetWriter(chemin, schema, compression="gzip" if compresser else "snappy") as writer:
+        for lot in lots:
+            colonnes = list(zip(*(_valeurs_export(entree) for entree in lot)))
+            writer.write_table(pa.Table.from_arrays([pa.array(c, pa.string()) for c in colonnes], schema=schema))
+
+def format_export(chemin):
+    """Déduit le format d'export et la compression de l'extension (ex. "export.jsonl.gz" → ("jsonl", True))."""
+    base, extension = os.path.splitext(chemin.lower())
+    compresser = extension == ".gz"
+    if compresser:
+        extension = os.path.splitext(base)[1]
+    return FORMATS_EXPORT.get(extension), compresser
+
+def ecrire_export(chemin, format=None, compresser=None, entrees=None, taille_lot=TAILLE_LOT_EXPORT):
     """
-    Exporte l'historique dans le format spécifié (CSV ou JSON).
+    Exporte l'historique en flux, par lots, avec une mémoire constante quelle que soit sa taille.
+
+    Args:
+        chemin: Fichier de sortie
+        format: "csv", "json", "jsonl" ou "parquet" (déduit de l'extension si None)
+        compresser: Compresser la sortie avec gzip (déduit d'une extension ".gz" si None ;
+                    pour Parquet, c'est le codec interne des colonnes)
+        entrees: Entrées à exporter (par défaut tout l'historique, lu à la demande)
+        taille_lot: Nombre d'entrées lues puis écrites à la fois
+
+    Returns:
+        Nombre d'entrées exportées
+
+    Raises:
+        ValueError: Format non pris en charge
+        ImportError: Export Parquet sans pyarrow
     """
-    historique = charger_historique()
-    if not historique:
-        logger.warning("Aucun historique à exporter.")
-        return
+    format_deduit, compression_deduite = format_export(chemin)
+    format = format or format_deduit
+    compresser = compression_deduite if compresser is None else compresser
+    if format not in FICHIERS_EXPORT:
+        raise ValueError(f"Format d'exportation non pris en charge : {format}")
 
-    if format == "csv":
-        try:
-            with open("history.csv", "w", encoding="utf-8") as f:
-                f.write("Date,Action,Source,Destination\n")
-                for entry in historique:
-                    f.write(f'{entry["date"]},{entry["action"]},{entry["source"]},{entry.get("destination", "N/A")}\n')
-            logger.info("Historique exporté au format CSV.")
-        except Exception as e:
-            logger.error(f"Erreur lors de l'exportation au format CSV : {e}")
-    elif format == "json":
-        try:
-            with open("history_export.json", "w", encoding="utf-8") as f:
-                json.dump(historique, f, indent=4)
-            logger.info("Historique exporté au format JSON.")
-        except Exception as e:
-            logger.error(f"Erreur lors de l'exportation au format JSON : {e}")
+    total = 0
+    def compter(lots):
+        nonlocal total
+        for lot in lots:
+            total += len(lot)
+            yield lot
+
+    lots = compter(_lots(iterer_historique() if entrees is None else entrees, taille_lot))
+    if format == "parquet":
+        _exporter_parquet(chemin, lots, compresser)
     else:
+        with _ouvrir_export(chemin, compresser) as f:
+            {"csv": _exporter_csv, "json": _exporter_json, "jsonl": _exporter_jsonl}[format](f, lots)
+    logger.info(f"Historique exporté au format {format.upper()}{' compressé' if compresser else ''} : "
+                f"{chemin} ({total} entrées).")
+    return total
+
+def exporter_historique(format="csv", chemin=None, compresser=False):
+    """
+    Exporte l'historique dans le format spécifié (CSV, JSON, JSON Lines ou Parquet).
+    Retourne le chemin du fichier créé, ou None en cas d'erreur.
+    """
+    if format not in FICHIERS_EXPORT:
         logger.warning(f"Format d'exportation non pris en charge : {format}")
+        return None
+    chemin = chemin or FICHIERS_EXPORT[format] + (".gz" if compresser and format != "parquet" else "")
+    try:
+        if not ecrire_export(chemin, format, compresser):
+            logger.warning("Aucun historique à exporter.")
+        return chemin
+    except Exception as e:
+        logger.error(f"Erreur lors de l'exportation au format {format.upper()} : {e}")
+        return None
 
 # Exemple d'utilisation
 if __name__ == "__main__":
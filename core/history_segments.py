@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+# Ce fichier stocke l'historique en segments JSON Lines, un fichier par jour (ou par semaine).
+# Le segment en cours reçoit les ajouts en fin de fichier ; les segments plus anciens sont compressés en gzip.
+# La rétention supprime des segments entiers (coût proportionnel au nombre de segments, pas d'entrées),
+# et une lecture limitée à une période récente n'ouvre que les segments concernés.
+
+import os
+import json
+import gzip
+import shutil
+import threading
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+GRANULARITES = ("jour", "semaine")
+EXTENSION_SEGMENT = ".jsonl"
+EXTENSION_COMPRESSEE = ".jsonl.gz"
+
+
+class JournalSegmente:
+    """Historique découpé en segments par période : dossier/2024-05-17.jsonl, dossier/2024-05-16.jsonl.gz..."""
+
+    def __init__(self, dossier, granularite="jour"):
+        if granularite not in GRANULARITES:
+            raise ValueError(f"Granularité inconnue : {granularite} (attendu : {', '.join(GRANULARITES)})")
+        self.dossier = dossier
+        self.granularite = granularite
+        self.verrou = threading.RLock()
+        self._segment_courant = None
+        self.nouveau = not os.path.isdir(dossier)  # Créé à l'instant : un ancien historique peut y être migré
+        os.makedirs(dossier, exist_ok=True)
+
+    # --- Segments ---
+
+    def _cle(self, date_iso):
+        """Clé du segment d'une date ISO : "YYYY-MM-DD" par jour, "YYYY-Sww" par semaine ISO."""
+        try:
+            date = datetime.fromisoformat(date_iso)
+        except (TypeError, ValueError):
+            date = datetime.now()
+        if self.granularite == "jour":
+            return date.strftime("%Y-%m-%d")
+        annee, semaine, _ = date.isocalendar()
+        return f"{annee}-S{semaine:02d}"
+
+    def _bornes(self, cle):
+        """Retourne (début, fin) de la période couverte par un segment, ou None si la clé est illisible."""
+        try:
+            if "-S" in cle:
+                annee, semaine = cle.split("-S")
+                debut = datetime.fromisocalendar(int(annee), int(semaine), 1)
+                return debut, debut + timedelta(days=7)
+            debut = datetime.strptime(cle, "%Y-%m-%d")
+            return debut, debut + timedelta(days=1)
+        except ValueError:
+            return None
+
+    def _chemin(self, cle, compresse=False):
+        return os.path.join(self.dossier, cle + (EXTENSION_COMPRESSEE if compresse else EXTENSION_SEGMENT))
+
+    def segments(self):
+        """Liste triée (chronologiquement) des segments : [(clé, chemin, compressé)]."""
+        simples, compresses = set(), set()
+        try:
+            with os.scandir(self.dossier) as entrees:
+                for entree in entrees:
+                    if entree.name.endswith(EXTENSION_COMPRESSEE):
+                        compresses.add(entree.name[:-len(EXTENSION_COMPRESSEE)])
+                    elif entree.name.endswith(EXTENSION_SEGMENT):
+                        simples.add(entree.name[:-len(EXTENSION_SEGMENT)])
+        except FileNotFoundError:
+            return []
+        for cle in simples & compresses:
+            # Compression interrompue : la version gzip est complète (écrite par remplacement atomique)
+            try:
+                os.remove(self._chemin(cle))
+            except FileNotFoundError:
+                pass
+        simples -= compresses
+        return sorted([(cle, self._chemin(cle), False) for cle in simples]
+                      + [(cle, self._chemin(cle, compresse=True), True) for cle in compresses])
+
+    def _segments_periode(self, depuis=None, jusqua=None):
+        for cle, chemin, compresse in self.segments():
+            bornes = self._bornes(cle)
+            if bornes is not None:
+                if depuis is not None and bornes[1] <= depuis:
+                    continue
+                if jusqua is not None and bornes[0] >= jusqua:
+                    continue
+            yield cle, chemin, compresse
+
+    def compresser_segments(self):
+        """Compresse en gzip tous les segments terminés (antérieurs au segment en cours)."""
+        courant = self._cle(datetime.now().isoformat())
+        compresses = 0
+        with self.verrou:
+            for cle, chemin, compresse in self.segments():
+                if compresse or cle >= courant:
+                    continue
+                destination = self._chemin(cle, compresse=True)
+                temporaire = destination + ".tmp"
+                with open(chemin, "rb") as source, gzip.open(temporaire, "wb") as cible:
+                    shutil.copyfileobj(source, cible)
+                os.replace(temporaire, destination)
+                os.remove(chemin)
+                compresses += 1
+        if compresses:
+            logger.info(f"{compresses} segment(s) d'historique compressé(s).")
+        return compresses
+
+    # --- Écriture ---
+
+    def _ecrire(self, cle, entrees, fsync):
+        """Ajoute des entrées à un segment (en membre gzip supplémentaire si le segment est déjà compressé)."""
+        donnees = "".join(json.dumps(entree, ensure_ascii=False) + "\n" for entree in entrees).encode("utf-8")
+        chemin_compresse = self._chemin(cle, compresse=True)
+        if os.path.exists(chemin_compresse):
+            chemin, donnees = chemin_compresse, gzip.compress(donnees)
+        else:
+            chemin = self._chemin(cle)
+        with open(chemin, "ab") as f:
+            f.write(donnees)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def ajouter(self, entrees, fsync=False):
+        """Ajoute des entrées dans le segment de leur date (une écriture par segment touché)."""
+        par_segment = {}
+        for entree in entrees:
+            par_segment.setdefault(self._cle(entree.get("date")), []).append(entree)
+        with self.verrou:
+            os.makedirs(self.dossier, exist_ok=True)
+            for cle, lot in par_segment.items():
+                self._ecrire(cle, lot, fsync)
+            courant = self._cle(datetime.now().isoformat())
+            if courant != self._segment_courant:
+                self._segment_courant = courant  # Premier ajout ou changement de période
+                self.compresser_segments()
+
+    def remplacer(self, entrees):
+        """Réécrit tout l'historique : les segments sont construits à côté puis échangés avec l'ancien dossier."""
+        with self.verrou:
+            temporaire = self.dossier + ".tmp"
+            shutil.rmtree(temporaire, ignore_errors=True)
+            nouveau = JournalSegmente(temporaire, self.granularite)
+            lot = []
+            for entree in entrees:
+                lot.append(entree)
+                if len(lot) >= 10000:
+                    nouveau.ajouter(lot)
+                    lot = []
+            nouveau.ajouter(lot)
+            ancien = self.dossier + ".ancien"
+            shutil.rmtree(ancien, ignore_errors=True)
+            if os.path.exists(self.dossier):
+                os.replace(self.dossier, ancien)
+            os.replace(temporaire, self.dossier)
+            shutil.rmtree(ancien, ignore_errors=True)
+
+    # --- Lecture ---
+
+    def _lire_segment(self, chemin, compresse):
+        ouvrir = gzip.open if compresse else open
+        numero = 0
+        try:
+            with ouvrir(chemin, "rt", encoding="utf-8") as f:
+                for numero, ligne in enumerate(f, 1):
+                    ligne = ligne.strip()
+                    if not ligne:
+                        continue
+                    try:
+                        yield json.loads(ligne)
+                    except json.JSONDecodeError as e:
+                        logger.error(f"Ligne {numero} du segment {chemin} illisible : {e}")
+        except FileNotFoundError:
+            pass  # Segment supprimé par la rétention pendant la lecture
+        except (OSError, EOFError) as e:
+            logger.error(f"Segment {chemin} tronqué après la ligne {numero} : {e}")
+
+    def iterer(self, depuis=None, jusqua=None):
+        """
+        Parcourt les entrées de la période [depuis, jusqua[ par ordre chronologique,
+        en n'ouvrant que les segments qui la recouvrent (les segments aux bornes sont filtrés entrée par entrée).
+        """
+        debut = depuis.isoformat() if depuis is not None else None
+        fin = jusqua.isoformat() if jusqua is not None else None
+        for _, chemin, compresse in self._segments_periode(depuis, jusqua):
+            for entree in self._lire_segment(chemin, compresse):
+                date = str(entree.get("date", ""))
+                if (debut is None or date >= debut) and (fin is None or date < fin):
+                    yield entree
+
+    def rechercher(self, date=None, action=None, texte=None, limite=None):
+        """Entrées filtrées, les plus récentes en premier ; un filtre de date ne lit que le segment du jour."""
+        depuis = jusqua = None
+        if date:
+            depuis = datetime.strptime(date, "%Y-%m-%d")
+            jusqua = depuis + timedelta(days=1)
+        texte = texte.lower() if texte else None
+        resultats = []
+        for h in self.iterer(depuis, jusqua):
+            if date and not str(h.get("date", "")).startswith(date):
+                continue
+            if action and h.get("action") != action:
+                continue
+            if texte and texte not in str(h.get("source", "")).lower() \
+                    and texte not in str(h.get("destination", "")).lower():
+                continue
+            resultats.append(h)
+        resultats.sort(key=lambda h: str(h.get("date", "")), reverse=True)
+        return resultats[:limite] if limite else resultats
+
+    def entrees_execution(self, execution, depuis=None):
+        """Entrées d'une exécution, en ne lisant que les segments à partir de son début (depuis)."""
+        return [h for h in self.iterer(depuis=depuis) if h.get("execution") == execution]
+
+    def actions(self):
+        return sorted({h.get("action") for h in self.iterer() if h.get("action")})
+
+    def compter(self):
+        return sum(1 for _ in self.iterer())
+
+    def est_vide(self):
+        return not self.segments()
+
+    # --- Rétention et sauvegarde ---
+
+    def supprimer_avant(self, date_limite):
+        """Supprime les segments entièrement antérieurs à date_limite (ISO). Retourne le nombre supprimé."""
+        limite = datetime.fromisoformat(date_limite)
+        supprimes = 0
+        with self.verrou:
+            for cle, chemin, _ in self.segments():
+                bornes = self._bornes(cle)
+                if bornes is None or bornes[1] > limite:
+                    continue
+                os.remove(chemin)
+                supprimes += 1
+        logger.info(f"{supprimes} segment(s) d'historique expiré(s) supprimé(s).")
+        return supprimes
+
+    def sauvegarder_copie(self, chemin):
+        with self.verrou:
+            shutil.rmtree(chemin, ignore_errors=True)
+            shutil.copytree(self.dossier, chemin)
+
+    def fermer(self):
+        pass
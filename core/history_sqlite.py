@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# Ce fichier fournit le stockage SQLite de l'historique (HISTORY_BACKEND = "sqlite" dans core/history.py).
+# Les filtres de l'interface (date, action, recherche dans les chemins) deviennent des requêtes indexées,
+# et le nettoyage par période de rétention une seule suppression sur une plage de dates.
+# La recherche dans les chemins utilise un index plein texte FTS5 (trigrammes) quand SQLite le permet.
+
+import os
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+COLONNES = ("date", "action", "source", "destination", "execution", "copie")
+
+
+class HistoriqueSQLite:
+    """Historique stocké dans une base SQLite indexée par date, action et chemin source."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.verrou = threading.RLock()
+        self.nouveau = not os.path.exists(chemin)  # Créée à l'instant : un ancien historique peut y être migré
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.connexion.row_factory = sqlite3.Row
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS historique (
+                id INTEGER PRIMARY KEY,
+                date TEXT NOT NULL,
+                action TEXT NOT NULL,
+                source TEXT NOT NULL,
+                destination TEXT,
+                execution TEXT,
+                copie TEXT
+            );
+            """
+        )
+        # Bases créées avant le regroupement par exécution (annuler/rétablir)
+        existantes = {ligne[1] for ligne in self.connexion.execute("PRAGMA table_info(historique)")}
+        for colonne in ("execution", "copie"):
+            if colonne not in existantes:
+                self.connexion.execute(f"ALTER TABLE historique ADD COLUMN {colonne} TEXT")
+        self.connexion.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_historique_date ON historique (date);
+            CREATE INDEX IF NOT EXISTS idx_historique_action ON historique (action, date);
+            CREATE INDEX IF NOT EXISTS idx_historique_source ON historique (source);
+            CREATE INDEX IF NOT EXISTS idx_historique_execution ON historique (execution);
+            """
+        )
+        self.recherche_plein_texte = self._creer_index_plein_texte()
+        self.connexion.commit()
+
+    def _creer_index_plein_texte(self):
+        """Crée l'index FTS5 trigramme sur les chemins ; retourne False si SQLite ne le supporte pas."""
+        try:
+            self.connexion.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS historique_fts USING fts5(
+                    source, destination, content='historique', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS historique_ai AFTER INSERT ON historique BEGIN
+                    INSERT INTO historique_fts (rowid, source, destination)
+                    VALUES (new.id, new.source, new.destination);
+                END;
+                CREATE TRIGGER IF NOT EXISTS historique_ad AFTER DELETE ON historique BEGIN
+                    INSERT INTO historique_fts (historique_fts, rowid, source, destination)
+                    VALUES ('delete', old.id, old.source, old.destination);
+                END;
+                """
+            )
+            return True
+        except sqlite3.OperationalError as e:
+            logger.info(f"Recherche plein texte indisponible, utilisation de LIKE : {e}")
+            return False
+
+    def est_vide(self):
+        with self.verrou:
+            return self.connexion.execute("SELECT 1 FROM historique LIMIT 1").fetchone() is None
+
+    def ajouter(self, entrees, fsync=False):
+        """Ajoute des entrées en une seule transaction."""
+        with self.verrou:
+            self.connexion.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+            with self.connexion:
+                self.connexion.executemany(
+                    "INSERT INTO historique (date, action, source, destination, execution, copie) VALUES (?, ?, ?, ?, ?, ?)",
+                    ([e.get(c) for c in COLONNES] for e in entrees),
+                )
+
+    def remplacer(self, entrees):
+        """Remplace tout le contenu de l'historique."""
+        with self.verrou:
+            with self.connexion:
+                self.connexion.execute("DELETE FROM historique")
+                self.connexion.executemany(
+                    "INSERT INTO historique (date, action, source, destination, execution, copie) VALUES (?, ?, ?, ?, ?, ?)",
+                    ([e.get(c) for c in COLONNES] for e in entrees),
+                )
+
+    def iterer(self, taille_lot=1000):
+        """Parcourt l'historique par ordre chronologique, par lots, sans tout charger en mémoire."""
+        dernier_id = 0
+        while True:
+            with self.verrou:
+                lignes = self.connexion.execute(
+                    f"SELECT id, {', '.join(COLONNES)} FROM historique WHERE id > ? ORDER BY id LIMIT ?",
+                    (dernier_id, taille_lot),
+                ).fetchall()
+            if not lignes:
+                return
+            for ligne in lignes:
+                yield {c: ligne[c] for c in COLONNES if ligne[c] is not None}
+            dernier_id = lignes[-1]["id"]
+
+    def rechercher(self, date=None, action=None, texte=None, limite=None):
+        """
+        Retourne les entrées correspondant aux filtres, les plus récentes en premier.
+
+        Args:
+            date: Jour au format "YYYY-MM-DD" (plage indexée sur la colonne date)
+            action: Type d'action exact
+            texte: Texte recherché dans les chemins source/destination
+            limite: Nombre maximum d'entrées retournées
+        """
+        conditions, parametres = [], []
+        if date:
+            conditions.append("h.date >= ? AND h.date < ?")
+            parametres += [date, date + "\uffff"]
+        if action:
+            conditions.append("h.action = ?")
+            parametres.append(action)
+        if texte:
+            if self.recherche_plein_texte and len(texte) >= 3:
+                # Sous-requête : l'index trigramme est interrogé une seule fois, pas ligne par ligne
+                conditions.append("h.id IN (SELECT rowid FROM historique_fts WHERE historique_fts MATCH ?)")
+                parametres.append('"' + texte.replace('"', '""') + '"')
+            else:
+                conditions.append("(h.source LIKE ? ESCAPE '\\' OR h.destination LIKE ? ESCAPE '\\')")
+                motif = "%" + texte.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                parametres += [motif, motif]
+        requete = "SELECT h.date, h.action, h.source, h.destination FROM historique h"
+        if conditions:
+            requete += " WHERE " + " AND ".join(conditions)
+        requete += " ORDER BY h.date DESC"
+        if limite:
+            requete += " LIMIT ?"
+            parametres.append(limite)
+        with self.verrou:
+            return [dict(ligne) for ligne in self.connexion.execute(requete, parametres)]
+
+    def entrees_execution(self, execution, depuis=None):
+        """Entrées d'une exécution (index sur execution), dans l'ordre où elles ont été enregistrées."""
+        with self.verrou:
+            lignes = self.connexion.execute(
+                f"SELECT {', '.join(COLONNES)} FROM historique WHERE execution = ? ORDER BY id", (execution,)
+            ).fetchall()
+        return [{c: ligne[c] for c in COLONNES if ligne[c] is not None} for ligne in lignes]
+
+    def actions(self):
+        """Types d'actions distincts (lus depuis l'index sur action)."""
+        with self.verrou:
+            return [ligne[0] for ligne in self.connexion.execute("SELECT DISTINCT action FROM historique ORDER BY action")]
+
+    def compter(self):
+        with self.verrou:
+            return self.connexion.execute("SELECT COUNT(*) FROM historique").fetchone()[0]
+
+    def supprimer_avant(self, date_limite):
+        """Supprime en une requête toutes les entrées antérieures à date_limite (ISO). Retourne le nombre supprimé."""
+        with self.verrou:
+            with self.connexion:
+                supprimees = self.connexion.execute("DELETE FROM historique WHERE date <= ?", (date_limite,)).rowcount
+        logger.info(f"{supprimees} entrée(s) d'historique expirée(s) supprimée(s).")
+        return supprimees
+
+    def sauvegarder_copie(self, chemin):
+        """Copie cohérente de la base (API de sauvegarde SQLite)."""
+        with self.verrou:
+            destination = sqlite3.connect(chemin)
+            try:
+                self.connexion.backup(destination)
+            finally:
+                destination.close()
+
+    def fermer(self):
+        with self.verrou:
+            self.connexion.close()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Ce fichier remplace un doublon par un lien vers l'original au lieu de le supprimer.
+# "lien" : lien physique (os.link), le doublon et l'original partagent le même inode.
+# "reflink" : copie à la demande (ioctl FICLONE sur btrfs/XFS), les blocs sont partagés
+# mais chaque fichier reste indépendant en écriture.
+# Le remplacement est atomique : le lien est créé sous un nom temporaire puis renommé sur le doublon.
+# Tous les chemins restent valides, seul l'espace disque occupé par le doublon est récupéré.
+
+import os
+import re
+import errno
+import shutil
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas d'ioctl, les reflinks ne sont pas disponibles
+    fcntl = None
+
+logger = logging.getLogger('organizer')
+
+MODES_DOUBLONS = ("supprimer", "lien", "reflink")
+FICLONE = 0x40049409  # _IOW(0x94, 9, int), linux/fs.h
+# Noms des fichiers temporaires de l'organisateur (lien en cours, test de reflink, copie entre périphériques)
+MOTIF_TEMPORAIRE = re.compile(r"^\.(.+\.\d+\.(lien|copie)|test_reflink\.\d+(\.clone)?)$")
+
+
+def _temporaire(chemin):
+    dossier, nom = os.path.split(chemin)
+    return os.path.join(dossier, f".{nom}.{os.getpid()}.lien")
+
+
+def est_temporaire(nom):
+    """Indique si un nom de fichier est celui d'un fichier temporaire de l'organisateur (MOTIF_TEMPORAIRE)."""
+    return MOTIF_TEMPORAIRE.match(nom) is not None
+
+
+def cloner_contenu(original, destination):
+    """Crée destination comme reflink de original (blocs partagés, copie à l'écriture)."""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "Reflink non pris en charge sur ce système", destination)
+    with open(original, "rb") as source, open(destination, "wb") as cible:
+        fcntl.ioctl(cible.fileno(), FICLONE, source.fileno())
+
+
+def remplacer_par_lien(doublon, original, mode="lien"):
+    """
+    Remplace doublon par un lien physique ("lien") ou un reflink ("reflink") vers original.
+
+    Raises:
+        OSError: Lien impossible (autre périphérique, système de fichiers sans reflink...) ;
+                 le doublon est alors laissé intact
+    """
+    if mode not in ("lien", "reflink"):
+        raise ValueError(f"Mode de liaison inconnu : {mode}")
+    if os.path.samefile(doublon, original):
+        return  # Déjà lié à l'original
+    temporaire = _temporaire(doublon)
+    try:
+        if mode == "lien":
+            os.link(original, temporaire)
+        else:
+            cloner_contenu(original, temporaire)
+            shutil.copystat(doublon, temporaire)  # Un reflink garde les dates et droits du doublon
+        os.replace(temporaire, doublon)
+    except BaseException:
+        try:
+            os.remove(temporaire)
+        except OSError:
+            pass
+        raise
+
+
+def meme_fichier(chemin, autre, st=None, st_autre=None):
+    """
+    Indique si deux chemins désignent le même fichier (doublon déjà lié à l'original).
+    Les identités (st_dev, st_ino) des stats fournis ne sont comparées que si elles sont connues :
+    sous Windows, DirEntry.stat() les laisse à 0 et os.path.samefile tranche.
+    """
+    if st is not None and st_autre is not None and st.st_ino and st_autre.st_ino:
+        return (st.st_dev, st.st_ino) == (st_autre.st_dev, st_autre.st_ino)
+    try:
+        return os.path.samefile(chemin, autre)
+    except OSError:
+        return False
+
+
+def reflink_disponible(dossier):
+    """Indique si le système de fichiers de dossier accepte les reflinks (test sur un fichier temporaire)."""
+    source = os.path.join(dossier, f".test_reflink.{os.getpid()}")
+    cible = source + ".clone"
+    try:
+        with open(source, "wb") as f:
+            f.write(b"0")
+        cloner_contenu(source, cible)
+        return True
+    except OSError:
+        return False
+    finally:
+        for chemin in (source, cible):
+            try:
+                os.remove(chemin)
+            except OSError:
+                pass
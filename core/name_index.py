@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Ce fichier maintient un index des noms présents dans les dossiers de destination.
+# Chaque dossier est lu une seule fois (os.scandir) ; les noms attribués ensuite y sont ajoutés.
+# Pour un nom déjà pris, le prochain suffixe libre (nom_1, nom_2...) est mémorisé :
+# attribuer le N-ième « IMG_0001.jpg » coûte O(1) au lieu de N appels à os.path.exists.
+
+import os
+import logging
+
+logger = logging.getLogger('organizer')
+
+
+class IndexNoms:
+    """Index des noms de fichiers par dossier de destination, pour résoudre les conflits en temps constant."""
+
+    def __init__(self):
+        self._noms = {}  # dossier → ensemble des noms (normcase) existants ou réservés
+        self._prochains = {}  # (dossier, base, extension) → prochain suffixe à essayer
+        self._liberes = set()  # Chemins (normcase) encore présents mais libérés par une opération du même lot
+
+    def _noms_du_dossier(self, dossier):
+        noms = self._noms.get(dossier)
+        if noms is None:
+            noms = set()
+            try:
+                with os.scandir(dossier) as entrees:
+                    noms.update(os.path.normcase(entree.name) for entree in entrees)
+            except FileNotFoundError:
+                pass  # Dossier pas encore créé : aucun conflit possible
+            except OSError as e:
+                logger.warning(f"Impossible de lire le dossier {dossier} : {e}")
+            self._noms[dossier] = noms
+        return noms
+
+    def _libre(self, noms, chemin):
+        """Vérifie qu'un nom est libre dans l'index, puis sur le disque (écriture externe concurrente)."""
+        nom = os.path.normcase(os.path.basename(chemin))
+        if nom in noms:
+            return False
+        if os.path.normcase(chemin) in self._liberes:
+            return True
+        if os.path.lexists(chemin):
+            noms.add(nom)
+            return False
+        return True
+
+    def liberer(self, chemin):
+        """Signale qu'un chemin sera libéré par une opération planifiée plus tôt dans le lot (il redevient attribuable)."""
+        dossier, nom = os.path.split(chemin)
+        self._noms_du_dossier(dossier).discard(os.path.normcase(nom))
+        self._liberes.add(os.path.normcase(chemin))
+
+    def occuper(self, chemin):
+        """Marque un chemin comme pris sans autre vérification (destination déjà promise à une opération)."""
+        dossier, nom = os.path.split(chemin)
+        self._noms_du_dossier(dossier).add(os.path.normcase(nom))
+
+    def reserver(self, chemin_destination):
+        """Retourne un chemin libre proche de chemin_destination et le marque comme pris."""
+        dossier, nom = os.path.split(chemin_destination)
+        noms = self._noms_du_dossier(dossier)
+        nouveau_chemin = chemin_destination
+        if not self._libre(noms, nouveau_chemin):
+            base, extension = os.path.splitext(nom)
+            cle = (dossier, base, extension)
+            compteur = self._prochains.get(cle, 1)
+            nouveau_chemin = os.path.join(dossier, f"{base}_{compteur}{extension}")
+            while not self._libre(noms, nouveau_chemin):
+                compteur += 1
+                nouveau_chemin = os.path.join(dossier, f"{base}_{compteur}{extension}")
+            self._prochains[cle] = compteur + 1
+        noms.add(os.path.normcase(os.path.basename(nouveau_chemin)))
+        return nouveau_chemin
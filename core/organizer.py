@@ -1,67 +1,132 @@
 import os
-import shutil
-import hashlib
 import datetime
-import time
 import logging
 import re
 from pathlib import Path
 import sys
 
 import locale
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from core.hash_cache import obtenir_cache
+from core.catalog import obtenir_catalogue
+# Index compilé extension → type, construit depuis config.TYPES_FICHIERS
+from core.classification import categorie_fichier, extension_fichier, libelle_categorie
+from core.scanner import scanner_fichiers, FichierScanne
+from core.name_index import IndexNoms
+from core.history import SessionHistorique
+from core.executor import ExecuteurFichiers, OperationFichier
+from core.quarantine import quarantaine_pour
+from core.links import MODES_DOUBLONS, meme_fichier
+from core.hashing import ALGORITHME_HASH, ALGORITHMES_HASH, hash_fichier, hash_partiel_fichier
 
 # Configurer la langue en français
-locale.setlocale(locale.LC_TIME, 'fr_FR.UTF-8')
+try:
+    locale.setlocale(locale.LC_TIME, 'fr_FR.UTF-8')
+except locale.Error:
+    pass  # Locale absente du système : on garde celle par défaut
 
-def classer_par_date(dossier, mode_simulation=False, limite_traitement=None):
 sys.stdout.reconfigure(encoding='utf-8')
 
-# Dictionnaire d'extensions par type
-TYPES_FICHIERS = {
-    "Images": [".png", ".jpg", ".jpeg", ".gif", ".bmp"],
-    "Vidéos": [".mp4", ".mkv", ".avi", ".mov"],
-    "Documents": [".pdf", ".docx", ".txt", ".xlsx", ".pptx"],
-    "Audios": [".mp3", ".wav", ".aac"],
-    "Archives": [".zip", ".rar", ".7z"],
-}
-
 # Configuration du système de logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler('logs/organizer_log.txt')
+        logging.FileHandler('logs/organizer_log.txt', delay=True)  # Fichier ouvert au premier message
     ]
 )
 logger = logging.getLogger('organizer')
 
+# Taille des échantillons (début et fin) lus pour le pré-filtrage des doublons
+TAILLE_ECHANTILLON = 64 * 1024
+# Nombre de fichiers hashés simultanément (les lectures se chevauchent, le hash libère le GIL)
+WORKERS_HASH = 4
+# Traitement des doublons : "supprimer" (quarantaine), "lien" (lien physique) ou "reflink" (copie à l'écriture)
+MODE_DOUBLONS = "supprimer"
+# Mode → (libellé du journal, action enregistrée dans l'historique)
+ACTIONS_DOUBLONS = {"supprimer": ("Supprimé", "Suppression"), "lien": ("Lié", "Liaison"), "reflink": ("Cloné", "Clonage")}
+
 def creer_dossier_si_absent(path):
     """Crée un dossier s'il n'existe pas déjà."""
     if not os.path.exists(path):
         os.makedirs(path)
         logger.info(f"Dossier créé: {path}")
 
-def calculer_hash(fichier):
-    """Calcule le hash MD5 d'un fichier."""
-    hasher = hashlib.md5()
+def _hash_avec_cache(fichier, type_hash, calcul, utiliser_cache, st=None):
+    """
+    Consulte le cache persistant avant de calculer un hash, puis y enregistre le résultat.
+    type_hash contient le nom de l'algorithme : des hash d'algorithmes différents ne sont jamais comparés.
+    st peut être fourni (résultat d'un parcours) pour éviter un nouvel appel à os.stat.
+    """
+    cache = obtenir_cache() if utiliser_cache else None
+    if cache is None:
+        return calcul(fichier)
+    if st is None or not st.st_ino:  # Stat sans identité (DirEntry sous Windows) : la clé vient d'os.stat
+        try:
+            st = os.stat(fichier)
+        except OSError as e:
+            logger.error(f"Erreur lors du hash du fichier {fichier} : {e}")
+            return None
+    valeur = cache.lire(st, type_hash)
+    if valeur is None:
+        valeur = calcul(fichier)
+        if valeur:
+            cache.enregistrer(st, type_hash, valeur, fichier)
+    return valeur
+
+def _verifier_algorithme(algorithme):
+    algorithme = algorithme or ALGORITHME_HASH
+    if algorithme not in ALGORITHMES_HASH:
+        raise ValueError(f"Algorithme de hash non disponible : {algorithme}")
+    return algorithme
+
+def _hash_complet(fichier, algorithme):
     try:
-        with open(fichier, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hasher.update(chunk)
-        return hasher.hexdigest()
+        return hash_fichier(fichier, algorithme)
     except Exception as e:
         logger.error(f"Erreur lors du hash du fichier {fichier} : {e}")
         return None
 
-def obtenir_date_creation(chemin_fichier):
-    """Retourne la date de création ou de modification d'un fichier."""
+def _hash_partiel(fichier, algorithme):
+    try:
+        return hash_partiel_fichier(fichier, TAILLE_ECHANTILLON, algorithme)
+    except Exception as e:
+        logger.error(f"Erreur lors du hash partiel du fichier {fichier} : {e}")
+        return None
+
+def calculer_hash(fichier, utiliser_cache=True, algorithme=None, st=None):
+    """
+    Calcule le hash d'un fichier (réutilise le cache si le fichier n'a pas changé).
+    L'algorithme par défaut est le plus rapide disponible (voir core.hashing).
+    """
+    algorithme = _verifier_algorithme(algorithme)
+    return _hash_avec_cache(fichier, algorithme, lambda f: _hash_complet(f, algorithme), utiliser_cache, st)
+
+def calculer_hash_partiel(fichier, utiliser_cache=True, algorithme=None, st=None):
+    """
+    Calcule un hash rapide sur le début et la fin d'un fichier.
+    Pour un fichier de moins de 2 * TAILLE_ECHANTILLON octets, le fichier est lu en entier.
+    """
+    algorithme = _verifier_algorithme(algorithme)
+    type_hash = f"{algorithme}-partiel-{TAILLE_ECHANTILLON}"
+    return _hash_avec_cache(fichier, type_hash, lambda f: _hash_partiel(f, algorithme), utiliser_cache, st)
+
+def obtenir_date_creation(chemin_fichier, st=None):
+    """
+    Retourne la date de création ou de modification d'un fichier.
+    st peut être fourni (résultat d'un parcours) pour éviter un nouvel appel à os.stat.
+    """
     try:
+        if st is None:
+            st = os.stat(chemin_fichier)
         # Essayer d'obtenir la date de création (Windows) ou de status change (Unix)
-        date = os.path.getctime(chemin_fichier)
+        date = st.st_ctime
         # Si pas disponible, utiliser la date de dernière modification
         if not date:
-            date = os.path.getmtime(chemin_fichier)
+            date = st.st_mtime
         return datetime.datetime.fromtimestamp(date)
     except Exception as e:
         logger.warning(f"Impossible d'obtenir la date du fichier {chemin_fichier}: {e}")
@@ -72,16 +137,12 @@ def generer_nouveau_nom(fichier, date=None):
     Génère un nouveau nom pour le fichier basé sur un format cohérent.
     Format: YYYYMMDD_type_nom-original.extension
     """
-    chemin = Path(fichier)
-    nom_original = chemin.stem
-    extension = chemin.suffix.lower()
+    nom_fichier = os.path.basename(fichier)
+    extension = extension_fichier(nom_fichier)  # Gère les extensions composées (.tar.gz)
+    nom_original = nom_fichier[:len(nom_fichier) - len(extension)]
     
-    # Déterminer le type de fichier
-    type_fichier = "autre"
-    for type_, extensions in TYPES_FICHIERS.items():
-        if extension in extensions:
-            type_fichier = type_.lower().rstrip('s')  # Enlever le 's' final (Images -> image)
-            break
+    # Déterminer le type de fichier (Images -> image)
+    type_fichier = libelle_categorie(categorie_fichier(nom_fichier))
     
     # Utiliser la date fournie ou obtenir la date du fichier
     if not date:
@@ -99,11 +160,19 @@ def generer_nouveau_nom(fichier, date=None):
     
     return nouveau_nom
 
-def verifier_conflit_fichier(chemin_destination):
+def verifier_conflit_fichier(chemin_destination, index=None):
     """
     Vérifie si un fichier existe déjà à l'emplacement de destination.
     Si oui, ajoute un suffixe numérique.
+    
+    Args:
+        chemin_destination: Le chemin souhaité
+        index: IndexNoms optionnel partagé par un lot de déplacements (résolution en temps constant,
+               et prise en compte des destinations déjà attribuées dans le lot)
     """
+    if index is not None:
+        return index.reserver(chemin_destination)
+
     chemin = Path(chemin_destination)
     compteur = 1
     nouveau_chemin = chemin_destination
@@ -115,6 +184,26 @@ def verifier_conflit_fichier(chemin_destination):
     
     return nouveau_chemin
 
+def _executer_lot(operations, libelle, action_historique, reussies=None):
+    """
+    Exécute un lot de déplacements/suppressions, journalise chaque opération réussie
+    et l'enregistre dans l'historique par lots.
+    Si reussies est une liste, les opérations réussies y sont ajoutées.
+    """
+    traites = 0
+    with SessionHistorique() as session:
+        for operation in ExecuteurFichiers(quarantaine=quarantaine_pour(operations)).executer(operations):
+            if operation.succes:
+                if reussies is not None:
+                    reussies.append(operation)
+                logger.info(f"{libelle}: {operation.donnees}")
+                if operation.type_action == "supprimer":
+                    session.enregistrer(action_historique, operation.source, copie=operation.destination)
+                else:
+                    session.enregistrer(action_historique, operation.source, operation.destination)
+                traites += 1
+    return traites
+
 def classer_fichier_par_type(dossier, mode_simulation=False, limite_traitement=None):
     """
     Classe les fichiers par type dans des sous-dossiers.
@@ -124,54 +213,50 @@ def classer_fichier_par_type(dossier, mode_simulation=False, limite_traitement=N
         mode_simulation: Si True, montre les actions sans les exécuter
         limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
     """
-    fichiers = [f for f in os.listdir(dossier) if os.path.isfile(os.path.join(dossier, f))]
+    fichiers = list(scanner_fichiers(dossier))
     
     # Appliquer la limite si spécifiée
     if limite_traitement and len(fichiers) > limite_traitement:
         logger.info(f"Limitation à {limite_traitement} fichiers sur {len(fichiers)} au total")
         fichiers = fichiers[:limite_traitement]
     
-    fichiers_traites = 0
-    for fichier in fichiers:
-        chemin_complet = os.path.join(dossier, fichier)
-
-        if os.path.isfile(chemin_complet):
-            _, extension = os.path.splitext(fichier)
-            extension = extension.lower()
-
-            destination = "Autres"
-            for type_, extensions in TYPES_FICHIERS.items():
-                if extension in extensions:
-                    destination = type_
-                    break
-
-            dossier_destination = os.path.join(dossier, destination)
-            
-            if not mode_simulation:
-                creer_dossier_si_absent(dossier_destination)
-            
-            nouveau_chemin = os.path.join(dossier_destination, fichier)
-            nouveau_chemin = verifier_conflit_fichier(nouveau_chemin)
-            
-            if mode_simulation:
-                logger.info(f"[SIMULATION] Déplacement: {fichier} → {destination}/{os.path.basename(nouveau_chemin)}")
-            else:
-                try:
-                    shutil.move(chemin_complet, nouveau_chemin)
-                    logger.info(f"Déplacé: {fichier} → {destination}/{os.path.basename(nouveau_chemin)}")
-                    fichiers_traites += 1
-                except Exception as e:
-                    logger.error(f"Erreur lors du déplacement de {fichier}: {e}")
-                    # Attendre et réessayer une fois
-                    try:
-                        time.sleep(1)  # Attendre 1 seconde
-                        shutil.move(chemin_complet, nouveau_chemin)
-                        logger.info(f"Déplacé après reprise: {fichier} → {destination}/{os.path.basename(nouveau_chemin)}")
-                        fichiers_traites += 1
-                    except Exception as e2:
-                        logger.error(f"Échec définitif pour {fichier}: {e2}")
-    
-    return fichiers_traites
+    return _executer_lot(_operations_classement(dossier, fichiers, mode_simulation), "Déplacé", "Déplacement")
+
+def _operations_classement(dossier, fichiers, mode_simulation):
+    """Construit les déplacements vers dossier/<type>/ pour une liste de FichierScanne."""
+    operations = []
+    index_noms = IndexNoms()
+    for entree in fichiers:
+        fichier = entree.nom
+        chemin_complet = entree.chemin
+
+        destination = categorie_fichier(fichier)
+        dossier_destination = os.path.join(dossier, destination)
+        
+        nouveau_chemin = os.path.join(dossier_destination, fichier)
+        nouveau_chemin = verifier_conflit_fichier(nouveau_chemin, index_noms)
+        description = f"{fichier} → {destination}/{os.path.basename(nouveau_chemin)}"
+        
+        if mode_simulation:
+            logger.info(f"[SIMULATION] Déplacement: {description}")
+        else:
+            operations.append(OperationFichier("deplacer", chemin_complet, nouveau_chemin, description))
+    return operations
+
+def classer_chemins_par_type(dossier, chemins, mode_simulation=False):
+    """
+    Classe par type des fichiers précis de dossier (nouveaux ou modifiés), sans parcourir le dossier.
+    Seuls les fichiers placés directement dans dossier sont classés, comme avec classer_fichier_par_type.
+
+    Returns:
+        Dictionnaire source → destination des fichiers déplacés
+    """
+    racine = os.path.normcase(os.path.abspath(dossier))
+    fichiers = [FichierScanne.depuis_chemin(chemin) for chemin in chemins
+                if os.path.normcase(os.path.dirname(os.path.abspath(chemin))) == racine and os.path.isfile(chemin)]
+    reussies = []
+    _executer_lot(_operations_classement(dossier, fichiers, mode_simulation), "Déplacé", "Déplacement", reussies)
+    return {operation.source: operation.destination for operation in reussies}
 
 def classer_par_date(dossier, mode_simulation=False, limite_traitement=None):
     """
@@ -182,19 +267,21 @@ def classer_par_date(dossier, mode_simulation=False, limite_traitement=None):
         mode_simulation: Si True, montre les actions sans les exécuter
         limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
     """
-    fichiers = [f for f in os.listdir(dossier) if os.path.isfile(os.path.join(dossier, f))]
+    fichiers = list(scanner_fichiers(dossier))
     
     # Appliquer la limite si spécifiée
     if limite_traitement and len(fichiers) > limite_traitement:
         logger.info(f"Limitation à {limite_traitement} fichiers sur {len(fichiers)} au total")
         fichiers = fichiers[:limite_traitement]
     
-    fichiers_traites = 0
-    for fichier in fichiers:
-        chemin_complet = os.path.join(dossier, fichier)
+    operations = []
+    index_noms = IndexNoms()
+    for entree in fichiers:
+        fichier = entree.nom
+        chemin_complet = entree.chemin
         
         # Obtenir la date du fichier
-        date_fichier = obtenir_date_creation(chemin_complet)
+        date_fichier = obtenir_date_creation(chemin_complet, entree.stat_ou_none())
         
         # Créer les dossiers année/mois
         annee = str(date_fichier.year)
@@ -202,31 +289,16 @@ def classer_par_date(dossier, mode_simulation=False, limite_traitement=None):
         
         chemin_destination = os.path.join(dossier, annee, mois)
         
-        if not mode_simulation:
-            creer_dossier_si_absent(chemin_destination)
-        
         nouveau_chemin = os.path.join(chemin_destination, fichier)
-        nouveau_chemin = verifier_conflit_fichier(nouveau_chemin)
+        nouveau_chemin = verifier_conflit_fichier(nouveau_chemin, index_noms)
+        description = f"{fichier} → {annee}/{mois}/{os.path.basename(nouveau_chemin)}"
         
         if mode_simulation:
-            logger.info(f"[SIMULATION] Déplacement par date: {fichier} → {annee}/{mois}/{os.path.basename(nouveau_chemin)}")
+            logger.info(f"[SIMULATION] Déplacement par date: {description}")
         else:
-            try:
-                shutil.move(chemin_complet, nouveau_chemin)
-                logger.info(f"Déplacé par date: {fichier} → {annee}/{mois}/{os.path.basename(nouveau_chemin)}")
-                fichiers_traites += 1
-            except Exception as e:
-                logger.error(f"Erreur lors du déplacement de {fichier}: {e}")
-                # Attendre et réessayer une fois
-                try:
-                    time.sleep(1)  # Attendre 1 seconde
-                    shutil.move(chemin_complet, nouveau_chemin)
-                    logger.info(f"Déplacé après reprise: {fichier} → {annee}/{mois}/{os.path.basename(nouveau_chemin)}")
-                    fichiers_traites += 1
-                except Exception as e2:
-                    logger.error(f"Échec définitif pour {fichier}: {e2}")
+            operations.append(OperationFichier("deplacer", chemin_complet, nouveau_chemin, description))
     
-    return fichiers_traites
+    return _executer_lot(operations, "Déplacé par date", "Déplacement")
 
 def renommer_fichiers(dossier, mode_simulation=False, limite_traitement=None):
     """
@@ -237,51 +309,153 @@ def renommer_fichiers(dossier, mode_simulation=False, limite_traitement=None):
         mode_simulation: Si True, montre les actions sans les exécuter
         limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
     """
-    fichiers = [f for f in os.listdir(dossier) if os.path.isfile(os.path.join(dossier, f))]
+    fichiers = list(scanner_fichiers(dossier))
     
     # Appliquer la limite si spécifiée
     if limite_traitement and len(fichiers) > limite_traitement:
         logger.info(f"Limitation à {limite_traitement} fichiers sur {len(fichiers)} au total")
         fichiers = fichiers[:limite_traitement]
     
-    fichiers_traites = 0
-    for fichier in fichiers:
-        chemin_complet = os.path.join(dossier, fichier)
+    operations = []
+    index_noms = IndexNoms()
+    for entree in fichiers:
+        fichier = entree.nom
+        chemin_complet = entree.chemin
         
         # Générer le nouveau nom
-        date_fichier = obtenir_date_creation(chemin_complet)
+        date_fichier = obtenir_date_creation(chemin_complet, entree.stat_ou_none())
         nouveau_nom = generer_nouveau_nom(fichier, date_fichier)
         nouveau_chemin = os.path.join(dossier, nouveau_nom)
         
         # Vérifier s'il y a déjà un fichier avec ce nom
-        nouveau_chemin = verifier_conflit_fichier(nouveau_chemin)
-        nouveau_nom = os.path.basename(nouveau_chemin)
-        
-        if fichier == nouveau_nom:
+        if nouveau_chemin == chemin_complet:
             logger.info(f"Pas besoin de renommer: {fichier}")
             continue
+        nouveau_chemin = verifier_conflit_fichier(nouveau_chemin, index_noms)
+        nouveau_nom = os.path.basename(nouveau_chemin)
         
         if mode_simulation:
             logger.info(f"[SIMULATION] Renommage: {fichier} → {nouveau_nom}")
         else:
-            try:
-                os.rename(chemin_complet, nouveau_chemin)
-                logger.info(f"Renommé: {fichier} → {nouveau_nom}")
-                fichiers_traites += 1
-            except Exception as e:
-                logger.error(f"Erreur lors du renommage de {fichier}: {e}")
-                # Attendre et réessayer une fois
-                try:
-                    time.sleep(1)  # Attendre 1 seconde
-                    os.rename(chemin_complet, nouveau_chemin)
-                    logger.info(f"Renommé après reprise: {fichier} → {nouveau_nom}")
-                    fichiers_traites += 1
-                except Exception as e2:
-                    logger.error(f"Échec définitif pour {fichier}: {e2}")
+            operations.append(OperationFichier("deplacer", chemin_complet, nouveau_chemin, f"{fichier} → {nouveau_nom}"))
     
-    return fichiers_traites
+    return _executer_lot(operations, "Renommé", "Renommage")
+
+def _grouper(chemins, cle):
+    """Regroupe les chemins selon une clé et ne garde que les groupes d'au moins deux fichiers."""
+    groupes = defaultdict(list)
+    for chemin in chemins:
+        valeur = cle(chemin)
+        if valeur is not None:
+            groupes[valeur].append(chemin)
+    return [groupe for groupe in groupes.values() if len(groupe) > 1]
+
+def _taille_fichier(chemin):
+    try:
+        return os.path.getsize(chemin)
+    except OSError as e:
+        logger.error(f"Impossible de lire la taille de {chemin} : {e}")
+        return None
+
+def _calculer_pour_tous(fonction, chemins, workers):
+    """Applique une fonction de hash à chaque chemin, en parallèle si workers > 1."""
+    if workers and workers > 1 and len(chemins) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executeur:
+            return dict(zip(chemins, executeur.map(fonction, chemins)))
+    return {chemin: fonction(chemin) for chemin in chemins}
+
+def _memoriser_empreintes(empreintes, stats):
+    """Reporte les hash de contenu calculés pendant la détection dans le catalogue des fichiers."""
+    catalogue = obtenir_catalogue()
+    if catalogue is None or not empreintes:
+        return
+    catalogue.enregistrer_hashes(
+        (chemin, stats[chemin].st_size, stats[chemin].st_mtime_ns, valeur)
+        for chemin, valeur in empreintes.items() if chemin in stats)
+
+def detecter_doublons(chemins, statistiques=None, workers=WORKERS_HASH, algorithme=None, stats=None):
+    """
+    Détecte les doublons parmi une liste de chemins en trois étapes :
+    regroupement par taille, hash partiel (début/fin), puis hash complet des survivants.
+
+    Args:
+        chemins: Liste ordonnée des fichiers à comparer (le premier vu est conservé)
+        statistiques: Dictionnaire optionnel rempli avec les compteurs de chaque étape
+        workers: Nombre de fichiers hashés en parallèle (1 pour un traitement séquentiel)
+        algorithme: Algorithme de hash (None pour le plus rapide disponible)
+        stats: Dictionnaire optionnel chemin → os.stat_result déjà connus (évite de re-stat les fichiers)
+
+    Returns:
+        Liste de tuples (doublon, original) dans l'ordre de la liste d'entrée
+    """
+    if statistiques is None:
+        statistiques = {}
+    algorithme = _verifier_algorithme(algorithme)
+    ordre = {chemin: index for index, chemin in enumerate(chemins)}
+    statistiques["fichiers"] = len(chemins)
+
+    # Étape 1 : seuls les fichiers de même taille peuvent être identiques
+    stats = stats or {}
+    tailles = {
+        chemin: stats[chemin].st_size if chemin in stats else _taille_fichier(chemin)
+        for chemin in chemins
+    }
+    groupes = _grouper(chemins, tailles.get)
+    statistiques["candidats_taille"] = sum(len(g) for g in groupes)
+
+    # Étape 2 : hash des premiers et derniers octets
+    a_hasher = [chemin for groupe in groupes for chemin in groupe]
+    hashes = _calculer_pour_tous(
+        lambda c: calculer_hash_partiel(c, algorithme=algorithme, st=stats.get(c)), a_hasher, workers)
+    # Fichier lu en entier par le hash partiel : c'est déjà le hash de son contenu
+    empreintes = {chemin: valeur for chemin, valeur in hashes.items()
+                  if valeur and tailles[chemin] <= 2 * TAILLE_ECHANTILLON}
+    groupes_partiels = []
+    for groupe in groupes:
+        groupes_partiels.extend(_grouper(groupe, hashes.get))
+    statistiques["hashes_partiels"] = len(a_hasher)
+    statistiques["candidats_partiels"] = sum(len(g) for g in groupes_partiels)
+
+    # Étape 3 : hash complet, inutile si le hash partiel couvrait déjà tout le fichier
+    groupes_identiques = [g for g in groupes_partiels if tailles[g[0]] <= 2 * TAILLE_ECHANTILLON]
+    groupes_restants = [g for g in groupes_partiels if tailles[g[0]] > 2 * TAILLE_ECHANTILLON]
+    a_hasher = [chemin for groupe in groupes_restants for chemin in groupe]
+    hashes = _calculer_pour_tous(
+        lambda c: calculer_hash(c, algorithme=algorithme, st=stats.get(c)), a_hasher, workers)
+    for groupe in groupes_restants:
+        groupes_identiques.extend(_grouper(groupe, hashes.get))
+    empreintes.update((chemin, valeur) for chemin, valeur in hashes.items() if valeur)
+    statistiques["hashes_complets"] = len(a_hasher)
+
+    _memoriser_empreintes(empreintes, stats)
 
-def supprimer_doublons(dossier, mode_simulation=False, limite_traitement=None):
+    doublons = [(chemin, groupe[0]) for groupe in groupes_identiques for chemin in groupe[1:]]
+    doublons.sort(key=lambda paire: ordre[paire[0]])
+    statistiques["doublons"] = len(doublons)
+
+    cache = obtenir_cache()
+    if cache is not None:
+        cache.valider()
+    return doublons
+
+def _traiter_doublons(doublons, stats, mode_simulation, mode_doublons, reussies=None):
+    """Supprime (quarantaine) ou lie chaque doublon d'une liste de paires (doublon, original)."""
+    operations = []
+    for chemin, original in doublons:
+        if mode_doublons != "supprimer" and meme_fichier(chemin, original, stats[chemin], stats[original]):
+            continue  # Déjà lié à l'original
+        logger.info(f"Doublon trouvé : {chemin} (identique à {original})")
+        if mode_simulation:
+            logger.info(f"[SIMULATION] {ACTIONS_DOUBLONS[mode_doublons][1]}: {chemin}")
+        elif mode_doublons == "supprimer":
+            operations.append(OperationFichier("supprimer", chemin, donnees=chemin))
+        else:
+            operations.append(OperationFichier(mode_doublons, chemin, original, f"{chemin} → {original}"))
+    libelle, action_historique = ACTIONS_DOUBLONS[mode_doublons]
+    return _executer_lot(operations, libelle, action_historique, reussies)
+
+def supprimer_doublons(dossier, mode_simulation=False, limite_traitement=None, workers=WORKERS_HASH,
+                       algorithme=None, mode_doublons=MODE_DOUBLONS):
     """
     Supprime les fichiers en double dans le dossier donné.
     
@@ -289,54 +463,82 @@ def supprimer_doublons(dossier, mode_simulation=False, limite_traitement=None):
         dossier: Le dossier à analyser pour les doublons
         mode_simulation: Si True, montre les actions sans les exécuter
         limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        workers: Nombre de fichiers hashés en parallèle
+        algorithme: Algorithme de hash (None pour le plus rapide disponible)
+        mode_doublons: "supprimer" (quarantaine), ou "lien" / "reflink" pour remplacer chaque doublon
+                       par un lien vers le premier exemplaire trouvé (les chemins restent valides)
     """
-    fichiers_vus = {}
-    doublons_supprimes = 0
-    fichiers_traites = 0
-    
-    # Collecter tous les fichiers
-    tous_fichiers = []
-    for racine, _, fichiers in os.walk(dossier):
-        for nom_fichier in fichiers:
-            tous_fichiers.append(os.path.join(racine, nom_fichier))
+    if mode_doublons not in MODES_DOUBLONS:
+        raise ValueError(f"Mode de traitement des doublons inconnu : {mode_doublons}")
+    # Collecter tous les fichiers (un seul stat par fichier, réutilisé pour la taille et le cache)
+    stats = {}
+    for entree in scanner_fichiers(dossier, recursif=True):
+        st = entree.stat_ou_none()
+        if st is not None:
+            stats[entree.chemin] = st
+    tous_fichiers = list(stats)
     
     # Appliquer la limite si spécifiée
     if limite_traitement and len(tous_fichiers) > limite_traitement:
         logger.info(f"Limitation à {limite_traitement} fichiers sur {len(tous_fichiers)} au total")
         tous_fichiers = tous_fichiers[:limite_traitement]
     
-    for chemin in tous_fichiers:
-        fichiers_traites += 1
-        hash_fichier = calculer_hash(chemin)
-        if not hash_fichier:
-            continue
+    statistiques = {}
+    doublons = detecter_doublons(tous_fichiers, statistiques, workers, algorithme, stats)
+    doublons_supprimes = _traiter_doublons(doublons, stats, mode_simulation, mode_doublons)
 
-        if hash_fichier in fichiers_vus:
-            logger.info(f"Doublon trouvé : {chemin} (identique à {fichiers_vus[hash_fichier]})")
-            if not mode_simulation:
-                try:
-                    os.remove(chemin)
-                    logger.info(f"Supprimé: {chemin}")
-                    doublons_supprimes += 1
-                except Exception as e:
-                    logger.error(f"Erreur en supprimant {chemin} : {e}")
-                    # Attendre et réessayer une fois
-                    try:
-                        time.sleep(1)  # Attendre 1 seconde
-                        os.remove(chemin)
-                        logger.info(f"Supprimé après reprise: {chemin}")
-                        doublons_supprimes += 1
-                    except Exception as e2:
-                        logger.error(f"Échec définitif pour {chemin}: {e2}")
-            else:
-                logger.info(f"[SIMULATION] Suppression: {chemin}")
-        else:
-            fichiers_vus[hash_fichier] = chemin
-
-    resultat = f"{doublons_supprimes} doublon(s) supprimé(s) sur {fichiers_traites} fichiers traités."
+    logger.info(
+        f"Étapes de détection : {statistiques['fichiers']} fichiers, "
+        f"{statistiques['candidats_taille']} candidats après taille, "
+        f"{statistiques['hashes_partiels']} hash partiels → {statistiques['candidats_partiels']} candidats, "
+        f"{statistiques['hashes_complets']} hash complets"
+    )
+    verbe = "supprimé(s)" if mode_doublons == "supprimer" else "remplacé(s) par un lien"
+    resultat = f"{doublons_supprimes} doublon(s) {verbe} sur {statistiques['fichiers']} fichiers traités."
     logger.info(resultat)
     return doublons_supprimes
 
+def supprimer_doublons_fichiers(chemins, candidats, mode_simulation=False, workers=WORKERS_HASH, algorithme=None,
+                                mode_doublons=MODE_DOUBLONS):
+    """
+    Traite les doublons parmi des fichiers précis (nouveaux ou modifiés), sans parcourir leur dossier.
+    Chaque fichier n'est comparé qu'aux fichiers existants de même taille, dont les hash viennent
+    le plus souvent du cache : un nouveau fichier coûte un hash, pas un parcours du dossier.
+
+    Args:
+        chemins: Fichiers à vérifier
+        candidats: Fonction taille → chemins des fichiers déjà présents de cette taille
+        mode_simulation, workers, algorithme, mode_doublons: Comme pour supprimer_doublons
+
+    Returns:
+        Liste des chemins traités comme doublons (supprimés ou remplacés par un lien)
+    """
+    if mode_doublons not in MODES_DOUBLONS:
+        raise ValueError(f"Mode de traitement des doublons inconnu : {mode_doublons}")
+    stats = {}
+    nouveaux = []
+    for chemin in chemins:
+        st = FichierScanne.depuis_chemin(chemin).stat_ou_none()
+        if st is not None and chemin not in stats:
+            stats[chemin] = st
+            nouveaux.append(chemin)
+    # Les fichiers existants passent en premier : ce sont eux que detecter_doublons conserve
+    existants = []
+    for taille in {stats[chemin].st_size for chemin in nouveaux}:
+        for chemin in candidats(taille):
+            if chemin in stats:
+                continue
+            st = FichierScanne.depuis_chemin(chemin).stat_ou_none()
+            if st is not None and st.st_size == taille:
+                stats[chemin] = st
+                existants.append(chemin)
+    a_verifier = set(nouveaux)
+    doublons = [paire for paire in detecter_doublons(existants + nouveaux, None, workers, algorithme, stats)
+                if paire[0] in a_verifier]
+    reussies = []
+    _traiter_doublons(doublons, stats, mode_simulation, mode_doublons, reussies)
+    return [operation.source for operation in reussies]
+
 # Exemple d'utilisation
 if __name__ == "__main__":
     import argparse
@@ -349,6 +551,10 @@ if __name__ == "__main__":
     parser.add_argument("--doublons", action="store_true", help="Supprimer les doublons")
     parser.add_argument("--simulation", action="store_true", help="Mode simulation (n'exécute pas les actions)")
     parser.add_argument("--limite", type=int, help="Limite de fichiers à traiter par opération")
+    parser.add_argument("--workers", type=int, default=WORKERS_HASH, help="Nombre de fichiers hashés en parallèle pour les doublons")
+    parser.add_argument("--algorithme", choices=sorted(ALGORITHMES_HASH), default=ALGORITHME_HASH, help="Algorithme de hash pour les doublons")
+    parser.add_argument("--mode-doublons", choices=MODES_DOUBLONS, default=MODE_DOUBLONS,
+                        help="Supprimer les doublons (quarantaine) ou les remplacer par un lien physique / reflink")
     
     args = parser.parse_args()
     
@@ -361,24 +567,19 @@ if __name__ == "__main__":
     if args.simulation:
         logger.info("MODE SIMULATION ACTIVÉ - Aucune action ne sera réellement effectuée")
     
-    if args.type:
-        logger.info("Classification par type...")
-        nb = classer_fichier_par_type(args.dossier, args.simulation, args.limite)
-        logger.info(f"{nb} fichiers traités par type")
+    # Toutes les opérations sont planifiées sur un seul parcours puis exécutées en une passe
+    from core.planner import organiser_dossier
+    operations = {"type": args.type, "date": args.date, "rename": args.renommer, "duplicates": args.doublons}
+    compteurs = organiser_dossier(args.dossier, operations, args.simulation, args.limite, args.workers, args.algorithme,
+                                  args.mode_doublons)
     
+    if args.type:
+        logger.info(f"{compteurs['type']} fichiers traités par type")
     if args.date:
-        logger.info("Classification par date...")
-        nb = classer_par_date(args.dossier, args.simulation, args.limite)
-        logger.info(f"{nb} fichiers traités par date")
-    
+        logger.info(f"{compteurs['date']} fichiers traités par date")
     if args.renommer:
-        logger.info("Renommage des fichiers...")
-        nb = renommer_fichiers(args.dossier, args.simulation, args.limite)
-        logger.info(f"{nb} fichiers renommés")
-    
+        logger.info(f"{compteurs['rename']} fichiers renommés")
     if args.doublons:
-        logger.info("Suppression des doublons...")
-        nb = supprimer_doublons(args.dossier, args.simulation, args.limite)
-        logger.info(f"{nb} doublons supprimés")
+        logger.info(f"{compteurs['duplicates']} doublons traités ({args.mode_doublons})")
     
     logger.info("Organisation terminée!")
\ No newline at end of file
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# Ce fichier planifie et exécute l'organisation d'un dossier en une seule passe.
+# Le dossier est parcouru une fois, la destination finale de chaque fichier est calculée
+# (dossier de type → sous-dossier année/mois → nom normalisé, doublons exclus),
+# puis le plan est exécuté en une passe au lieu d'enchaîner plusieurs parcours complets.
+# En mode "lien"/"reflink", les doublons sont organisés comme les autres fichiers puis remplacés,
+# à leur emplacement final, par un lien vers l'original.
+
+import os
+
+from core.scanner import scanner_fichiers
+from core.name_index import IndexNoms
+from core.history import SessionHistorique
+from core.executor import ExecuteurFichiers, OperationFichier, WORKERS_COPIE
+from core.quarantine import quarantaine_pour
+from core.links import meme_fichier
+from core.organizer import (
+    logger, categorie_fichier, detecter_doublons, generer_nouveau_nom, obtenir_date_creation,
+    verifier_conflit_fichier, WORKERS_HASH, MODE_DOUBLONS, ACTIONS_DOUBLONS,
+)
+
+# Opérations reconnues, dans l'ordre où elles composent la destination
+OPERATIONS = ("type", "date", "rename", "duplicates")
+
+
+class ActionPlanifiee:
+    """Action calculée par le planificateur : déplacement/renommage, suppression ou liaison d'un doublon."""
+
+    __slots__ = ("type_action", "source", "destination", "original", "operations")
+
+    def __init__(self, type_action, source, destination=None, original=None, operations=()):
+        self.type_action = type_action  # "deplacer", "supprimer", "lien" ou "reflink"
+        self.source = source
+        self.destination = destination
+        self.original = original  # Fichier conservé, pour un doublon
+        self.operations = operations  # Opérations qui ont modifié la destination
+
+    def __repr__(self):
+        return f"ActionPlanifiee({self.type_action!r}, {self.source!r}, {self.destination!r})"
+
+
+def planifier_organisation(dossier, operations, limite_traitement=None, workers=WORKERS_HASH, algorithme=None,
+                           mode_doublons=MODE_DOUBLONS):
+    """
+    Calcule le plan d'organisation d'un dossier en un seul parcours.
+
+    Args:
+        dossier: Le dossier à organiser
+        operations: Dictionnaire {"type": bool, "date": bool, "rename": bool, "duplicates": bool}
+        limite_traitement: Nombre maximum de fichiers à traiter par opération (None pour tous)
+        workers: Nombre de fichiers hashés en parallèle pour les doublons
+        algorithme: Algorithme de hash pour les doublons
+        mode_doublons: "supprimer", "lien" ou "reflink" (voir core/links.py)
+
+    Returns:
+        Liste d'ActionPlanifiee (traitement des doublons puis déplacements)
+    """
+    dossier = os.path.normpath(dossier)
+    actives = {op for op in OPERATIONS if operations.get(op)}
+    plan = []
+
+    # Parcours unique : récursif seulement si les doublons doivent être cherchés dans les sous-dossiers
+    entrees = list(scanner_fichiers(dossier, recursif="duplicates" in actives))
+    a_organiser = [e for e in entrees if os.path.dirname(e.chemin) == dossier]
+    if limite_traitement and len(a_organiser) > limite_traitement:
+        logger.info(f"Limitation à {limite_traitement} fichiers sur {len(a_organiser)} au total")
+        a_organiser = a_organiser[:limite_traitement]
+
+    supprimes = set()
+    if "duplicates" in actives:
+        stats = {}
+        for entree in entrees:
+            st = entree.stat_ou_none()
+            if st is not None:
+                stats[entree.chemin] = st
+        candidats = list(stats)
+        if limite_traitement and len(candidats) > limite_traitement:
+            candidats = candidats[:limite_traitement]
+        statistiques = {}
+        for doublon, original in detecter_doublons(candidats, statistiques, workers, algorithme, stats):
+            if mode_doublons == "supprimer":
+                plan.append(ActionPlanifiee("supprimer", doublon, original=original, operations=("duplicates",)))
+                supprimes.add(doublon)
+            elif not meme_fichier(doublon, original, stats[doublon], stats[original]):
+                plan.append(ActionPlanifiee(mode_doublons, doublon, original=original, operations=("duplicates",)))
+
+    index_noms = IndexNoms()
+    for entree in a_organiser:
+        if entree.chemin in supprimes:
+            continue
+        dossier_cible = dossier
+        nom = entree.nom
+        appliquees = []
+        date_fichier = None
+        if "type" in actives:
+            dossier_cible = os.path.join(dossier_cible, categorie_fichier(nom))
+            appliquees.append("type")
+        if "date" in actives or "rename" in actives:
+            date_fichier = obtenir_date_creation(entree.chemin, entree.stat_ou_none())
+        if "date" in actives:
+            dossier_cible = os.path.join(dossier_cible, str(date_fichier.year), date_fichier.strftime("%m-%B"))
+            appliquees.append("date")
+        if "rename" in actives:
+            nouveau_nom = generer_nouveau_nom(nom, date_fichier)
+            if nouveau_nom != nom:
+                nom = nouveau_nom
+                appliquees.append("rename")
+
+        destination = os.path.join(dossier_cible, nom)
+        if destination == entree.chemin:
+            continue
+        destination = verifier_conflit_fichier(destination, index_noms)
+        plan.append(ActionPlanifiee("deplacer", entree.chemin, destination, operations=tuple(appliquees)))
+
+    return plan
+
+
+def executer_plan(plan, mode_simulation=False, workers=WORKERS_COPIE):
+    """
+    Exécute un plan calculé par planifier_organisation.
+    Les déplacements sont confiés à l'exécuteur par lots (renommage direct sur le même périphérique,
+    copies parallèles sinon, reprises différées en cas d'échec).
+    Les liaisons de doublons sont faites ensuite, entre les emplacements finaux des fichiers.
+
+    Returns:
+        Dictionnaire du nombre de fichiers traités par opération
+    """
+    compteurs = {op: 0 for op in OPERATIONS}
+    operations = []
+    liaisons = []
+
+    for action in plan:
+        if action.type_action == "supprimer":
+            if mode_simulation:
+                logger.info(f"[SIMULATION] Suppression: {action.source} (identique à {action.original})")
+            else:
+                operations.append(OperationFichier("supprimer", action.source, donnees=action))
+        elif action.type_action != "deplacer":
+            if mode_simulation:
+                logger.info(f"[SIMULATION] {ACTIONS_DOUBLONS[action.type_action][1]}: {action.source} → {action.original}")
+            else:
+                liaisons.append(action)
+        elif mode_simulation:
+            logger.info(f"[SIMULATION] Déplacement: {action.source} → {action.destination}")
+        else:
+            operations.append(OperationFichier("deplacer", action.source, action.destination, action))
+
+    executeur = ExecuteurFichiers(workers, quarantaine=quarantaine_pour(operations))
+    emplacements = {}  # Source → emplacement final des fichiers déplacés
+    with SessionHistorique() as session:
+        for operation in executeur.executer(operations):
+            if not operation.succes:
+                continue
+            action = operation.donnees
+            if action.type_action == "supprimer":
+                logger.info(f"Supprimé: {action.source} (identique à {action.original})")
+                session.enregistrer("Suppression", action.source, copie=operation.destination)
+            else:
+                # operation.destination : nom réellement attribué (un autre si la destination prévue a été occupée)
+                logger.info(f"Déplacé: {action.source} → {operation.destination}")
+                session.enregistrer("Déplacement", action.source, operation.destination)
+                emplacements[action.source] = operation.destination
+            for op in action.operations:
+                compteurs[op] += 1
+
+        operations = [
+            OperationFichier(action.type_action, emplacements.get(action.source, action.source),
+                             emplacements.get(action.original, action.original), action)
+            for action in liaisons
+        ]
+        for operation in executeur.executer(operations):
+            if operation.succes:
+                libelle, action_historique = ACTIONS_DOUBLONS[operation.type_action]
+                logger.info(f"{libelle}: {operation.source} → {operation.destination}")
+                session.enregistrer(action_historique, operation.source, operation.destination)
+                compteurs["duplicates"] += 1
+
+    return compteurs
+
+
+def organiser_dossier(dossier, operations, mode_simulation=False, limite_traitement=None,
+                      workers=WORKERS_HASH, algorithme=None, mode_doublons=MODE_DOUBLONS):
+    """Planifie puis exécute toutes les opérations demandées sur un dossier en une passe."""
+    plan = planifier_organisation(dossier, operations, limite_traitement, workers, algorithme, mode_doublons)
+    logger.info(f"Plan calculé : {len(plan)} action(s) pour {dossier}")
+    return executer_plan(plan, mode_simulation)
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# Ce fichier gère la quarantaine des fichiers supprimés (doublons) au lieu de les effacer définitivement.
+# Les fichiers sont rangés par contenu (objets/<algorithme>/<2 caractères>/<hash>) : mettre un fichier en quarantaine
+# est un simple os.rename sur le même périphérique, et un contenu déjà présent n'est conservé qu'une fois.
+# Un index SQLite compte les références de chaque objet, ce qui permet de restaurer chaque suppression (annuler).
+# Un thread de purge en arrière-plan supprime les objets les plus anciens selon un budget d'âge et de taille.
+
+import os
+import time
+import errno
+import shutil
+import sqlite3
+import threading
+import atexit
+import logging
+
+from core.executor import deplacer_sans_ecraser
+
+# Configuration
+NOM_QUARANTAINE = ".quarantaine"  # Nom des dossiers de quarantaine (ignorés par le scanner)
+QUARANTINE_DIR = os.path.join("json", NOM_QUARANTAINE)
+UTILISER_QUARANTAINE = True  # False : les doublons sont supprimés définitivement
+QUARANTAINE_TAILLE_MAX = 5 * 1024 ** 3  # Budget de taille (octets)
+QUARANTAINE_AGE_MAX_JOURS = 30  # Âge maximum d'un objet en quarantaine
+INTERVALLE_PURGE = 3600  # Secondes entre deux passes du purgeur
+# True : pour un fichier d'un autre périphérique, une quarantaine est créée à la racine de son point de montage
+# (renommage instantané, mais écriture à la racine du volume, ex. C:\). False : copie vers QUARANTINE_DIR.
+QUARANTAINE_AU_POINT_DE_MONTAGE = False
+TYPES_QUARANTAINE = ("supprimer", "restaurer")  # Opérations de l'exécuteur qui passent par la quarantaine
+
+logger = logging.getLogger('organizer')
+
+
+def _point_de_montage(chemin):
+    """Retourne le point de montage du système de fichiers contenant chemin."""
+    chemin = os.path.abspath(chemin)
+    peripherique = os.stat(chemin).st_dev
+    while True:
+        parent = os.path.dirname(chemin)
+        if parent == chemin or os.stat(parent).st_dev != peripherique:
+            return chemin
+        chemin = parent
+
+
+class MagasinQuarantaine:
+    """Stockage adressé par contenu des fichiers supprimés, avec comptage des références."""
+
+    def __init__(self, racine=QUARANTINE_DIR):
+        self.racine = os.path.abspath(racine)
+        self.verrou = threading.RLock()
+        os.makedirs(self.racine, exist_ok=True)
+        self._racines = {os.stat(self.racine).st_dev: self.racine}  # Périphérique → racine de quarantaine
+        self.connexion = sqlite3.connect(os.path.join(self.racine, "index.sqlite"), check_same_thread=False)
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS objets (
+                   chemin TEXT PRIMARY KEY,
+                   taille INTEGER NOT NULL,
+                   date REAL NOT NULL,
+                   refs INTEGER NOT NULL
+               )"""
+        )
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_objets_date ON objets (date)")
+        self.connexion.commit()
+
+    def _racine_pour(self, chemin, st):
+        """
+        Racine de quarantaine sur le même périphérique que le fichier (renommage instantané).
+        Hors du périphérique de la racine principale, elle n'est créée au point de montage qu'avec
+        QUARANTAINE_AU_POINT_DE_MONTAGE ; sinon (ou en cas d'échec) la racine principale est utilisée (copie).
+        """
+        racine = self._racines.get(st.st_dev)
+        if racine is None and not QUARANTAINE_AU_POINT_DE_MONTAGE:
+            racine = self._racines[st.st_dev] = self.racine
+        elif racine is None:
+            racine = self.racine
+            try:
+                locale = os.path.join(_point_de_montage(os.path.dirname(os.path.abspath(chemin))), NOM_QUARANTAINE)
+                os.makedirs(locale, exist_ok=True)
+                racine = locale
+            except OSError as e:
+                logger.warning(f"Quarantaine locale impossible pour {chemin} ({e}), copie vers {self.racine}")
+            self._racines[st.st_dev] = racine
+        return racine
+
+    def chemin_objet(self, empreinte, algorithme, racine=None):
+        return os.path.join(racine or self.racine, "objets", algorithme, empreinte[:2], empreinte)
+
+    def mettre_en_quarantaine(self, chemin, empreinte=None, algorithme=None):
+        """
+        Retire un fichier de son emplacement et le conserve en quarantaine.
+
+        Args:
+            chemin: Fichier à retirer
+            empreinte: Hash complet du fichier s'il est déjà connu
+            algorithme: Algorithme de l'empreinte (None pour l'algorithme par défaut)
+
+        Returns:
+            Chemin de l'objet en quarantaine (à passer à restaurer)
+        """
+        from core.organizer import calculer_hash, ALGORITHME_HASH  # Import tardif : organizer utilise ce module
+        algorithme = algorithme or ALGORITHME_HASH
+        st = os.stat(chemin)
+        if empreinte is None:
+            empreinte = calculer_hash(chemin, algorithme=algorithme, st=st)
+            if empreinte is None:
+                raise OSError(errno.EIO, f"Impossible de calculer le hash de {chemin}")
+        objet = self.chemin_objet(empreinte, algorithme, self._racine_pour(chemin, st))
+        with self.verrou:
+            ligne = self.connexion.execute("SELECT refs FROM objets WHERE chemin = ?", (objet,)).fetchone()
+            if ligne is not None and os.path.exists(objet):
+                os.remove(chemin)  # Contenu déjà conservé : une référence de plus suffit
+                refs = ligne[0] + 1
+            else:
+                os.makedirs(os.path.dirname(objet), exist_ok=True)
+                try:
+                    os.rename(chemin, objet)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+                    shutil.move(chemin, objet)
+                refs = 1
+            with self.connexion:
+                self.connexion.execute(
+                    "INSERT OR REPLACE INTO objets (chemin, taille, date, refs) VALUES (?, ?, ?, ?)",
+                    (objet, st.st_size, time.time(), refs),
+                )
+        return objet
+
+    def contient(self, objet):
+        with self.verrou:
+            return self.connexion.execute("SELECT 1 FROM objets WHERE chemin = ?", (objet,)).fetchone() is not None
+
+    def restaurer(self, objet, destination):
+        """
+        Remet un objet en quarantaine à l'emplacement destination.
+        Le dernier référent récupère l'objet par renommage ; les autres en reçoivent une copie.
+        Lève FileExistsError si la destination est occupée.
+        """
+        with self.verrou:
+            ligne = self.connexion.execute("SELECT refs FROM objets WHERE chemin = ?", (objet,)).fetchone()
+            if ligne is None or not os.path.exists(objet):
+                raise FileNotFoundError(errno.ENOENT, "Objet absent de la quarantaine (purgé ?)", objet)
+            dossier = os.path.dirname(destination)
+            if dossier:
+                os.makedirs(dossier, exist_ok=True)
+            with self.connexion:
+                # Jamais d'écrasement : un fichier apparu à la destination lève FileExistsError
+                if ligne[0] > 1:
+                    deplacer_sans_ecraser(objet, destination, copier=True)
+                    self.connexion.execute("UPDATE objets SET refs = refs - 1 WHERE chemin = ?", (objet,))
+                else:
+                    deplacer_sans_ecraser(objet, destination)
+                    self.connexion.execute("DELETE FROM objets WHERE chemin = ?", (objet,))
+        return destination
+
+    def taille_totale(self):
+        with self.verrou:
+            return self.connexion.execute("SELECT COALESCE(SUM(taille), 0) FROM objets").fetchone()[0]
+
+    def purger(self, taille_max=QUARANTAINE_TAILLE_MAX, age_max_jours=QUARANTAINE_AGE_MAX_JOURS):
+        """
+        Supprime définitivement les objets trop anciens, puis les plus anciens tant que le budget de taille est dépassé.
+
+        Returns:
+            (nombre d'objets supprimés, octets libérés)
+        """
+        limite = time.time() - age_max_jours * 86400
+        supprimes, liberes = 0, 0
+        with self.verrou:
+            total = self.taille_totale()
+            for objet, taille, date in self.connexion.execute(
+                    "SELECT chemin, taille, date FROM objets ORDER BY date").fetchall():
+                if date >= limite and total <= taille_max:
+                    break
+                try:
+                    os.remove(objet)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Impossible de purger {objet} : {e}")
+                    continue
+                with self.connexion:
+                    self.connexion.execute("DELETE FROM objets WHERE chemin = ?", (objet,))
+                total -= taille
+                supprimes += 1
+                liberes += taille
+        if supprimes:
+            logger.info(f"Quarantaine purgée : {supprimes} objet(s), {liberes / 1024 ** 2:.1f} Mo libérés.")
+        return supprimes, liberes
+
+    def fermer(self):
+        with self.verrou:
+            self.connexion.close()
+
+
+class PurgeurQuarantaine(threading.Thread):
+    """Thread d'arrière-plan qui applique périodiquement le budget de la quarantaine."""
+
+    def __init__(self, magasin, intervalle=INTERVALLE_PURGE):
+        super().__init__(name="PurgeurQuarantaine", daemon=True)
+        self.magasin = magasin
+        self.intervalle = intervalle
+        self.arret = threading.Event()
+
+    def run(self):
+        while not self.arret.is_set():
+            try:
+                self.magasin.purger()
+            except Exception as e:
+                logger.error(f"Erreur lors de la purge de la quarantaine : {e}")
+            self.arret.wait(self.intervalle)
+
+    def arreter(self):
+        self.arret.set()
+
+
+_magasin = None
+_purgeur = None
+_verrou_magasin = threading.Lock()
+
+
+def empreinte_objet(objet):
+    """(algorithme, empreinte) d'un objet de la quarantaine d'après son chemin (objets/<algorithme>/<xx>/<hash>), ou None."""
+    parties = os.path.normpath(objet).split(os.sep)
+    if len(parties) >= 4 and parties[-4] == "objets" and parties[-2] == parties[-1][:2]:
+        return parties[-3], parties[-1]
+    return None
+
+
+def quarantaine_pour(operations):
+    """
+    Quarantaine à fournir à l'exécuteur pour un lot d'opérations : elle n'est ouverte (et son purgeur démarré)
+    que si le lot contient des suppressions ou des restaurations.
+    """
+    if any(operation.type_action in TYPES_QUARANTAINE for operation in operations):
+        return obtenir_quarantaine()
+    return None
+
+
+def obtenir_quarantaine():
+    """Retourne la quarantaine partagée (et démarre son purgeur), ou None si elle est désactivée ou indisponible."""
+    global _magasin, _purgeur
+    if not UTILISER_QUARANTAINE:
+        return None
+    with _verrou_magasin:
+        if _magasin is None:
+            try:
+                _magasin = MagasinQuarantaine()
+                _purgeur = PurgeurQuarantaine(_magasin)
+                _purgeur.start()
+                atexit.register(_purgeur.arreter)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Quarantaine indisponible ({QUARANTINE_DIR}) : {e}")
+                _magasin = False
+        return _magasin or None
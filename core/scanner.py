@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Ce fichier fournit un parcours de dossier en une seule passe basé sur os.scandir.
+# Chaque fichier trouvé est représenté par un FichierScanne qui garde en mémoire son stat :
+# les opérations d'organisation n'ont plus besoin d'appeler os.path.isfile / os.stat elles-mêmes.
+
+import os
+import logging
+
+from core.quarantine import NOM_QUARANTAINE
+
+logger = logging.getLogger('organizer')
+
+
+def stat_entree(entree):
+    """
+    Stat d'une entrée de os.scandir, avec l'identité réelle du fichier (st_dev, st_ino).
+    Sous Windows, DirEntry.stat() laisse st_ino et st_dev à 0 : os.stat est alors appelé pour que le stat
+    soit comparable à celui d'un chemin isolé (cache des hash, instantanés, catalogue).
+    """
+    st = entree.stat()
+    if not st.st_ino:
+        st = os.stat(entree.path)
+    return st
+
+
+class FichierScanne:
+    """Fichier trouvé lors d'un parcours, avec son résultat stat mis en cache."""
+
+    __slots__ = ("nom", "chemin", "_entree", "_stat")
+
+    def __init__(self, entree=None, chemin=None, st=None):
+        self._entree = entree
+        self.chemin = entree.path if entree is not None else chemin
+        self.nom = entree.name if entree is not None else os.path.basename(chemin)
+        self._stat = st
+
+    @classmethod
+    def depuis_chemin(cls, chemin, st=None):
+        """Crée un enregistrement pour un chemin isolé (hors parcours)."""
+        return cls(chemin=chemin, st=st)
+
+    def stat(self):
+        """Retourne le stat du fichier, calculé au plus une fois."""
+        if self._stat is None:
+            self._stat = stat_entree(self._entree) if self._entree is not None else os.stat(self.chemin)
+        return self._stat
+
+    def stat_ou_none(self):
+        """Comme stat(), mais retourne None si le fichier n'est plus accessible."""
+        try:
+            return self.stat()
+        except OSError:
+            return None
+
+    @property
+    def taille(self):
+        return self.stat().st_size
+
+    @property
+    def extension(self):
+        return os.path.splitext(self.nom)[1].lower()
+
+    def __repr__(self):
+        return f"FichierScanne({self.chemin!r})"
+
+
+def scanner_fichiers(dossier, recursif=False):
+    """
+    Parcourt un dossier et retourne les fichiers qu'il contient.
+
+    Args:
+        dossier: Le dossier à parcourir
+        recursif: Si True, parcourt aussi les sous-dossiers
+
+    Yields:
+        Un FichierScanne par fichier régulier, dans l'ordre du parcours
+    """
+    a_parcourir = [dossier]
+    while a_parcourir:
+        courant = a_parcourir.pop()
+        try:
+            with os.scandir(courant) as entrees:
+                sous_dossiers = []
+                for entree in entrees:
+                    try:
+                        if entree.is_file():
+                            yield FichierScanne(entree)
+                        elif recursif and entree.is_dir(follow_symlinks=False) and entree.name != NOM_QUARANTAINE:
+                            sous_dossiers.append(entree.path)
+                    except OSError as e:
+                        logger.warning(f"Impossible de lire {entree.path} : {e}")
+        except OSError as e:
+            logger.error(f"Impossible de parcourir le dossier {courant} : {e}")
+            continue
+        # Même ordre que os.walk : chaque sous-dossier est parcouru entièrement avant le suivant
+        a_parcourir.extend(reversed(sous_dossiers))
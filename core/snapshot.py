@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# Ce fichier conserve l'état connu des dossiers surveillés (chemin et identité stat : inode, taille, mtime_ns).
+# Au démarrage de la surveillance, l'arborescence est comparée à cet instantané : seuls les fichiers arrivés
+# ou modifiés pendant que l'application était fermée sont confiés à l'organisation.
+# L'instantané est tenu à jour par le service de surveillance après chaque organisation.
+
+import os
+import sqlite3
+import threading
+import logging
+
+from core.scanner import scanner_fichiers, FichierScanne
+
+# Configuration
+SNAPSHOT_FILE = os.path.join("json", "surveillance.sqlite")
+
+logger = logging.getLogger('organizer')
+
+
+def _identite(st):
+    """
+    Identité enregistrée d'un fichier. Le parcours et la mise à jour de chemins isolés obtiennent tous deux leur stat
+    par FichierScanne (inode réel, même sous Windows) : les identités restent comparables.
+    """
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class InstantaneSurveillance:
+    """Instantané SQLite des fichiers de chaque racine surveillée."""
+
+    def __init__(self, chemin=SNAPSHOT_FILE):
+        self.chemin = chemin
+        self.verrou = threading.Lock()
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("PRAGMA synchronous=NORMAL")
+        self.connexion.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS racines (
+                racine TEXT PRIMARY KEY,
+                recursif INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS fichiers (
+                racine TEXT NOT NULL,
+                chemin TEXT NOT NULL,
+                inode INTEGER NOT NULL,
+                taille INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                PRIMARY KEY (racine, chemin)
+            ) WITHOUT ROWID;
+            """
+        )
+        self.connexion.commit()
+
+    def connue(self, racine, recursif):
+        """Indique si un instantané existe pour cette racine (avec la même portée)."""
+        with self.verrou:
+            ligne = self.connexion.execute("SELECT recursif FROM racines WHERE racine = ?", (racine,)).fetchone()
+        return ligne is not None and bool(ligne[0]) == bool(recursif)
+
+    def charger(self, racine):
+        """Retourne chemin → (inode, taille, mtime_ns) pour une racine."""
+        with self.verrou:
+            return {chemin: (inode, taille, mtime_ns) for chemin, inode, taille, mtime_ns in self.connexion.execute(
+                "SELECT chemin, inode, taille, mtime_ns FROM fichiers WHERE racine = ?", (racine,))}
+
+    def remplacer(self, racine, recursif, fichiers):
+        """Remplace l'instantané d'une racine par fichiers (chemin → identité)."""
+        with self.verrou:
+            with self.connexion:
+                self.connexion.execute("DELETE FROM fichiers WHERE racine = ?", (racine,))
+                self.connexion.executemany(
+                    "INSERT INTO fichiers (racine, chemin, inode, taille, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                    ((racine, chemin, *identite) for chemin, identite in fichiers.items()),
+                )
+                self.connexion.execute("INSERT OR REPLACE INTO racines (racine, recursif) VALUES (?, ?)",
+                                       (racine, int(bool(recursif))))
+
+    def enregistrer(self, racine, chemins):
+        """Met à jour l'état de chemins précis : fichier présent → identité actuelle, absent → retiré."""
+        presents, absents = [], []
+        for chemin in chemins:
+            st = FichierScanne.depuis_chemin(chemin).stat_ou_none()
+            if st is not None:
+                presents.append((racine, chemin, *_identite(st)))
+            else:
+                absents.append((racine, chemin))
+        with self.verrou:
+            with self.connexion:
+                self.connexion.executemany(
+                    "INSERT OR REPLACE INTO fichiers (racine, chemin, inode, taille, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                    presents,
+                )
+                self.connexion.executemany("DELETE FROM fichiers WHERE racine = ? AND chemin = ?", absents)
+
+    def retirer(self, racine, chemins):
+        with self.verrou:
+            with self.connexion:
+                self.connexion.executemany("DELETE FROM fichiers WHERE racine = ? AND chemin = ?",
+                                           ((racine, chemin) for chemin in chemins))
+
+    def fermer(self):
+        with self.verrou:
+            self.connexion.close()
+
+
+def reconcilier(instantane, racine, recursif=False):
+    """
+    Compare l'arborescence d'une racine à son instantané.
+    La première fois, l'état courant sert de référence et rien n'est signalé.
+
+    Returns:
+        Liste des fichiers nouveaux ou modifiés depuis l'instantané
+    """
+    actuels = {}
+    for entree in scanner_fichiers(racine, recursif=recursif):
+        st = entree.stat_ou_none()
+        if st is not None:
+            actuels[entree.chemin] = _identite(st)
+    if not instantane.connue(racine, recursif):
+        instantane.remplacer(racine, recursif, actuels)
+        logger.info(f"Instantané initial de {racine} : {len(actuels)} fichier(s).")
+        return []
+    connus = instantane.charger(racine)
+    changes = [chemin for chemin, identite in actuels.items() if connus.get(chemin) != identite]
+    disparus = [chemin for chemin in connus if chemin not in actuels]
+    instantane.retirer(racine, disparus)
+    logger.info(f"Réconciliation de {racine} : {len(changes)} fichier(s) nouveau(x) ou modifié(s), "
+                f"{len(disparus)} disparu(s), sur {len(actuels)}.")
+    return changes
@@ -4,12 +4,20 @@
 # Il parcourt les fichiers d'un répertoire donné et enregistre des informations sur les types de fichiers,
 # leur taille, et les fichiers les plus volumineux.
 # Auteur : COOVI Meessi
+# Les chiffres viennent du catalogue des fichiers (core/catalog.py) : seuls les fichiers nouveaux ou modifiés
+# depuis la dernière analyse sont relus, le reste est agrégé par SQLite.
 import os
+import logging
 from collections import defaultdict
 from humanize import naturalsize
-from logger import logger  # Assure-toi que logger.py est bien configuré
 
-def generer_statistiques(racine="C:\\"):
+from core.catalog import obtenir_catalogue
+
+logger = logging.getLogger('organizer')
+
+
+def _statistiques_parcours(racine, exclusions):
+    """Statistiques par parcours complet du disque (catalogue indisponible)."""
     extensions = defaultdict(int)
     tailles = defaultdict(int)
     fichiers_volumineux = []
@@ -17,11 +25,6 @@ def generer_statistiques(racine="C:\\"):
     total_fichiers = 0
     total_taille = 0
 
-    # Dossiers à ignorer pour éviter les problèmes d'accès
-    exclusions = ['C:\\Windows', 'C:\\Program Files', 'C:\\Program Files (x86)', 'C:\\$Recycle.Bin']
-
-    logger.info(f"🔍 Début de l’analyse du disque à partir de : {racine}")
-
     for dossier, _, fichiers in os.walk(racine):
         if any(dossier.startswith(e) for e in exclusions):
             logger.debug(f"Dossier ignoré : {dossier}")
@@ -44,6 +47,23 @@ def generer_statistiques(racine="C:\\"):
                 continue
 
     fichiers_volumineux = sorted(fichiers_volumineux, key=lambda x: x[1], reverse=True)[:10]
+    return total_fichiers, total_taille, fichiers_volumineux, {ext: (n, tailles[ext]) for ext, n in extensions.items()}
+
+
+def generer_statistiques(racine="C:\\"):
+    # Dossiers à ignorer pour éviter les problèmes d'accès
+    exclusions = ['C:\\Windows', 'C:\\Program Files', 'C:\\Program Files (x86)', 'C:\\$Recycle.Bin']
+
+    logger.info(f"🔍 Début de l’analyse du disque à partir de : {racine}")
+
+    catalogue = obtenir_catalogue()
+    if catalogue is not None:
+        catalogue.rafraichir(racine, exclusions=exclusions)
+        stats = catalogue.statistiques(racine)
+        total_fichiers, total_taille = stats["fichiers"], stats["taille"]
+        fichiers_volumineux, extensions = stats["plus_volumineux"], stats["extensions"]
+    else:
+        total_fichiers, total_taille, fichiers_volumineux, extensions = _statistiques_parcours(racine, exclusions)
 
     logger.info("✅ Statistiques générées avec succès.")
     print(naturalsize(os.path.getsize(r"C:\\")))
@@ -57,8 +77,8 @@ def generer_statistiques(racine="C:\\"):
         print(f"- {f} : {naturalsize(t)}")
 
     print("\n📂 Types de fichiers les plus fréquents :")
-    for ext, count in sorted(extensions.items(), key=lambda x: x[1], reverse=True)[:10]:
-        taille = naturalsize(tailles[ext])
+    for ext, (count, taille) in sorted(extensions.items(), key=lambda x: x[1][0], reverse=True)[:10]:
+        taille = naturalsize(taille)
         print(f"{ext or '[Aucun]'} : {count} fichiers — {taille}")
 
 if __name__ == "__main__":
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+# Ce fichier annule et rétablit les exécutions enregistrées dans l'historique (une SessionHistorique = une exécution).
+# Une exécution entière est annulée en un seul lot : les déplacements et renommages sont inversés en ordre inverse
+# puis confiés à l'exécuteur par lots (renommage direct sur le même périphérique).
+# Un chemin d'origine occupé entre-temps reçoit un suffixe libre (IndexNoms) au lieu d'écraser le fichier présent.
+# Une suppression n'est réversible que si une copie du fichier a été conservée (champ "copie" de l'entrée),
+# normalement un objet de la quarantaine (core/quarantine.py).
+# Rétablir inverse les opérations réellement effectuées par l'annulation (exécution "annulation" enregistrée),
+# en partant des chemins où elle a écrit les fichiers (suffixés si l'emplacement d'origine était occupé).
+# Rétablir une suppression vérifie d'abord que le fichier a toujours le contenu conservé : un fichier modifié
+# depuis l'annulation n'est plus un doublon et n'est pas supprimé.
+
+import os
+import json
+import logging
+from datetime import datetime
+
+from core.history import SessionHistorique, executions_historique, entrees_execution
+from core.executor import ExecuteurFichiers, OperationFichier, WORKERS_COPIE
+from core.name_index import IndexNoms
+from core.quarantine import obtenir_quarantaine, quarantaine_pour, empreinte_objet
+from core.hashing import ALGORITHMES_HASH
+from core.organizer import calculer_hash
+
+logger = logging.getLogger('organizer')
+
+# Configuration
+UNDO_FILE = os.path.join("json", "undo_redo.json")  # Exécutions annulées et pile des exécutions à rétablir
+ACTIONS_DEPLACEMENT = ("Déplacement", "Renommage")
+ACTION_SUPPRESSION = "Suppression"
+ACTIONS_LIAISON = ("Liaison", "Clonage")  # Doublon remplacé par un lien : aucun chemin à restaurer
+TYPES_ANNULABLES = ("organisation", "retablissement")
+
+
+def _charger_etat():
+    try:
+        with open(UNDO_FILE, "r", encoding="utf-8") as f:
+            etat = json.load(f)
+    except FileNotFoundError:
+        etat = {}
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"État annuler/rétablir illisible ({UNDO_FILE}) : {e}")
+        etat = {}
+    etat.setdefault("annulees", {})  # Exécution → date de son annulation
+    etat.setdefault("a_retablir", [])  # Pile : la dernière exécution annulée en fin de liste
+    etat.setdefault("annulations", {})  # Exécution annulée → exécution "annulation" qui l'a annulée
+    return etat
+
+
+def _sauvegarder_etat(etat):
+    dossier = os.path.dirname(UNDO_FILE)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    temporaire = UNDO_FILE + ".tmp"
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(etat, f, ensure_ascii=False, indent=4)
+    os.replace(temporaire, UNDO_FILE)
+
+
+def executions_annulables():
+    """Retourne les exécutions pouvant être annulées, de la plus récente à la plus ancienne."""
+    annulees = _charger_etat()["annulees"]
+    return [e for e in reversed(executions_historique())
+            if e.get("type", "organisation") in TYPES_ANNULABLES and e.get("execution") not in annulees]
+
+
+def execution_a_retablir():
+    """Retourne l'identifiant de la prochaine exécution à rétablir, ou None."""
+    etat = _charger_etat()
+    if not etat["a_retablir"]:
+        return None
+    execution = etat["a_retablir"][-1]
+    date_annulation = etat["annulees"].get(execution, "")
+    # Une nouvelle organisation après l'annulation rend le rétablissement caduc
+    if any(e.get("type", "organisation") == "organisation" and e.get("debut", "") > date_annulation
+           for e in executions_historique()):
+        etat["a_retablir"] = []
+        _sauvegarder_etat(etat)
+        return None
+    return execution
+
+
+def _planifier(operations):
+    """
+    Résout les conflits de noms et répartit les opérations en vagues.
+    Une opération vers un chemin libéré par une autre opération du lot passe dans la vague suivante,
+    pour que les chaînes (a → b, b → c) restent correctes même avec des copies parallèles.
+
+    Args:
+        operations: Liste de (type d'action, source, destination souhaitée, entrée d'historique),
+                    dans l'ordre d'exécution ; la destination est None pour une suppression
+
+    Returns:
+        Liste de vagues, chaque vague étant une liste d'OperationFichier
+    """
+    index = IndexNoms()
+    vague_liberation = {}  # Chemin libéré → vague qui le libère
+    vagues = []
+    for type_action, source, souhaitee, entree in operations:
+        destination = None
+        numero = 0
+        if souhaitee is not None:
+            destination = index.reserver(souhaitee)
+            if destination != souhaitee:
+                logger.warning(f"{souhaitee} est occupé : restauration vers {destination}")
+            numero = vague_liberation.get(os.path.normcase(destination), -1) + 1
+        if type_action != "restaurer":
+            index.liberer(source)
+            vague_liberation[os.path.normcase(source)] = numero
+        while len(vagues) <= numero:
+            vagues.append([])
+        vagues[numero].append(OperationFichier(type_action, source, destination, entree))
+    return vagues
+
+
+def _appliquer(vagues, type_execution, action_de, mode_simulation, workers):
+    """
+    Exécute les vagues d'opérations et les enregistre dans une nouvelle exécution de l'historique.
+    Retourne (opérations réussies, nombre d'échecs, identifiant de la nouvelle exécution ou None en simulation).
+    """
+    reussies = []
+    echecs = 0
+    if mode_simulation:
+        for vague in vagues:
+            for operation in vague:
+                logger.info(f"[SIMULATION] {action_de(operation.donnees)}: {operation.source} → {operation.destination}")
+        return reussies, echecs, None
+
+    executeur = ExecuteurFichiers(workers, quarantaine=quarantaine_pour(
+        [operation for vague in vagues for operation in vague]))
+    with SessionHistorique(type_execution=type_execution) as session:
+        for vague in vagues:
+            for operation in executeur.executer(vague):
+                if operation.succes:
+                    reussies.append(operation)
+                    action = action_de(operation.donnees)
+                    if operation.type_action == "supprimer":
+                        session.enregistrer(action, operation.source, copie=operation.destination)
+                    else:
+                        session.enregistrer(action, operation.source, operation.destination)
+                else:
+                    echecs += 1
+    return reussies, echecs, session.execution
+
+
+def _supprimer_dossiers_vides(dossiers, proteges):
+    """Supprime les dossiers devenus vides (du plus profond au moins profond), sans toucher aux dossiers protégés."""
+    for dossier in sorted(set(dossiers), key=len, reverse=True):
+        while dossier and os.path.normcase(dossier) not in proteges:
+            try:
+                os.rmdir(dossier)
+            except OSError:
+                break  # Dossier non vide ou déjà supprimé
+            logger.info(f"Dossier vide supprimé: {dossier}")
+            dossier = os.path.dirname(dossier)
+
+
+def _contenu_inchange(source, copie):
+    """Le fichier source a-t-il toujours le contenu de la copie conservée lors de sa suppression (taille, puis hash) ?"""
+    try:
+        st = os.stat(source)
+    except OSError:
+        return False
+    copie_presente = os.path.exists(copie)
+    if copie_presente and os.path.getsize(copie) != st.st_size:
+        return False
+    objet = empreinte_objet(copie)
+    if objet is not None and objet[0] in ALGORITHMES_HASH:
+        algorithme, empreinte = objet
+        return calculer_hash(source, algorithme=algorithme, st=st) == empreinte
+    return copie_presente and calculer_hash(source, st=st) == calculer_hash(copie)
+
+
+def undo(execution=None, mode_simulation=False, workers=WORKERS_COPIE):
+    """
+    Annule une exécution entière (par défaut la plus récente) en un seul lot.
+
+    Args:
+        execution: Identifiant de l'exécution à annuler (None pour la plus récente)
+        mode_simulation: Si True, affiche les restaurations sans les effectuer
+        workers: Copies simultanées pour les fichiers sur un autre périphérique
+
+    Returns:
+        Dictionnaire {"execution", "restaures", "echecs", "ignores"}, ou None s'il n'y a rien à annuler
+    """
+    annulables = executions_annulables()
+    if execution is None:
+        if not annulables:
+            logger.info("Aucune exécution à annuler.")
+            return None
+        execution = annulables[0]["execution"]
+    elif execution not in {e["execution"] for e in annulables}:
+        raise ValueError(f"Exécution inconnue ou déjà annulée : {execution}")
+
+    quarantaine = None  # Ouverte au premier fichier supprimé à restaurer
+    operations = []
+    ignores = 0
+    for entree in reversed(entrees_execution(execution)):
+        action = entree.get("action")
+        if action in ACTIONS_DEPLACEMENT and entree.get("destination", "N/A") != "N/A":
+            operations.append(("deplacer", entree["destination"], entree["source"], entree))
+        elif action == ACTION_SUPPRESSION and entree.get("copie"):
+            quarantaine = quarantaine or obtenir_quarantaine()
+            if quarantaine is not None and quarantaine.contient(entree["copie"]):
+                operations.append(("restaurer", entree["copie"], entree["source"], entree))
+            else:
+                operations.append(("deplacer", entree["copie"], entree["source"], entree))
+        elif action in ACTIONS_LIAISON:
+            ignores += 1
+        else:
+            ignores += 1
+            logger.warning(f"Action irréversible ignorée : {action} {entree.get('source')}")
+
+    reussies, echecs, annulation = _appliquer(
+        _planifier(operations), "annulation", lambda entree: "Annulation", mode_simulation, workers)
+    if not mode_simulation:
+        proteges = set()
+        for operation in reussies:
+            dossier = os.path.dirname(operation.destination)
+            while dossier and os.path.normcase(dossier) not in proteges:
+                proteges.add(os.path.normcase(dossier))
+                dossier = os.path.dirname(dossier) if os.path.dirname(dossier) != dossier else ""
+        _supprimer_dossiers_vides(
+            [os.path.dirname(o.source) for o in reussies if o.type_action == "deplacer"
+             and o.donnees.get("action") in ACTIONS_DEPLACEMENT], proteges)
+        etat = _charger_etat()
+        etat["annulees"][execution] = datetime.now().isoformat()
+        etat["a_retablir"].append(execution)
+        etat["annulations"][execution] = annulation
+        _sauvegarder_etat(etat)
+
+    logger.info(f"Exécution {execution} annulée : {len(reussies)} fichier(s) restauré(s), "
+                f"{echecs} échec(s), {ignores} action(s) irréversible(s).")
+    return {"execution": execution, "restaures": len(reussies), "echecs": echecs, "ignores": ignores}
+
+
+def _operations_retablissement(execution, annulation):
+    """
+    Reconstruit les opérations à rejouer en inversant celles de l'exécution d'annulation, dans l'ordre d'origine.
+    Chaque fichier est repris là où l'annulation l'a réellement écrit, jamais au chemin d'origine supposé libre.
+
+    Returns:
+        (liste de (type d'action, source, destination, entrée d'origine), nombre de suppressions ignorées)
+    """
+    deplacements = {}  # Destination d'origine → entrée d'origine
+    suppressions = {}  # Copie conservée → entrées d'origine (un objet de quarantaine peut en servir plusieurs)
+    for entree in entrees_execution(execution):
+        action = entree.get("action")
+        if action in ACTIONS_DEPLACEMENT and entree.get("destination", "N/A") != "N/A":
+            deplacements[os.path.normcase(entree["destination"])] = entree
+        elif action == ACTION_SUPPRESSION and entree.get("copie"):
+            suppressions.setdefault(os.path.normcase(entree["copie"]), []).append(entree)
+
+    operations = []
+    ignores = 0
+    for inverse in reversed(entrees_execution(annulation)):
+        depart, emplacement = inverse.get("source"), inverse.get("destination")
+        if not depart or not emplacement:
+            continue
+        originales = suppressions.get(os.path.normcase(depart))
+        if originales:
+            # Fichier supprimé puis restauré depuis sa copie : il est supprimé à nouveau, là où il a été restauré
+            entree = originales.pop()
+            if not _contenu_inchange(emplacement, entree["copie"]):
+                logger.warning(f"{emplacement} a été modifié ou a disparu depuis l'annulation : "
+                               f"suppression non rétablie")
+                ignores += 1
+                continue
+            # Nouvelle mise en quarantaine (ou suppression définitive si la quarantaine est désactivée)
+            operations.append(("supprimer", emplacement, None, entree))
+            continue
+        entree = deplacements.get(os.path.normcase(depart))
+        if entree is not None:
+            operations.append(("deplacer", emplacement, depart, entree))
+    return operations, ignores
+
+
+def redo(mode_simulation=False, workers=WORKERS_COPIE):
+    """
+    Rétablit la dernière exécution annulée, en inversant les opérations de son annulation dans l'ordre d'origine.
+    Le rétablissement est enregistré comme une nouvelle exécution (elle-même annulable).
+    Une suppression n'est rejouée que si le fichier a toujours le contenu conservé (_contenu_inchange).
+
+    Returns:
+        Dictionnaire {"execution", "retablis", "echecs", "ignores"}, ou None s'il n'y a rien à rétablir
+    """
+    execution = execution_a_retablir()
+    if execution is None:
+        logger.info("Aucune exécution à rétablir.")
+        return None
+
+    annulation = _charger_etat()["annulations"].get(execution)
+    if annulation is None:
+        # Annulée avant l'enregistrement des exécutions d'annulation : emplacements réels inconnus
+        logger.warning(f"Exécution {execution} : annulation introuvable, rétablissement impossible sans risque")
+        operations, ignores = [], 0
+    else:
+        operations, ignores = _operations_retablissement(execution, annulation)
+
+    reussies, echecs, _ = _appliquer(
+        _planifier(operations), "retablissement", lambda entree: entree["action"], mode_simulation, workers)
+    if not mode_simulation:
+        etat = _charger_etat()
+        if etat["a_retablir"] and etat["a_retablir"][-1] == execution:
+            etat["a_retablir"].pop()
+            etat["annulations"].pop(execution, None)
+        _sauvegarder_etat(etat)
+
+    logger.info(f"Exécution {execution} rétablie : {len(reussies)} fichier(s), {echecs} échec(s), "
+                f"{ignores} suppression(s) ignorée(s).")
+    return {"execution": execution, "retablis": len(reussies), "echecs": echecs, "ignores": ignores}
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Annuler ou rétablir une exécution de l'organisateur")
+    groupe = parser.add_mutually_exclusive_group(required=True)
+    groupe.add_argument("--liste", action="store_true", help="Lister les exécutions annulables")
+    groupe.add_argument("--annuler", nargs="?", const="", metavar="EXECUTION",
+                        help="Annuler une exécution (la plus récente par défaut)")
+    groupe.add_argument("--retablir", action="store_true", help="Rétablir la dernière exécution annulée")
+    parser.add_argument("--simulation", action="store_true", help="Afficher les opérations sans les effectuer")
+    args = parser.parse_args()
+
+    if args.liste:
+        for e in executions_annulables():
+            print(f"{e['execution']}  {e['debut']}  {e.get('nombre', 0)} action(s)  [{e.get('type')}]")
+    elif args.annuler is not None:
+        print(undo(args.annuler or None, mode_simulation=args.simulation))
+    else:
+        print(redo(mode_simulation=args.simulation))
@@ -0,0 +1,466 @@
+# -*- coding: utf-8 -*-
+# Ce fichier fournit deux observateurs compatibles avec l'interface de watchdog (schedule, unschedule,
+# start, stop, join, is_alive) pour le service de surveillance (core/watcher.py) :
+# - ObservateurInotify : inotify appelé directement par ctypes (Linux). Un seul descripteur, un dictionnaire
+#   wd → dossier, et des lectures par blocs qui décodent toute une rafale d'événements en un appel.
+#   Enregistrer un watch ne coûte qu'un inotify_add_watch par dossier, sans objet ni thread par dossier.
+# - ObservateurScrutation : comparaison périodique d'instantanés (taille, mtime, inode), pour les systèmes
+#   de fichiers où inotify ne voit pas les modifications faites par d'autres machines (NFS, SMB...).
+#   L'intervalle s'adapte : proportionnel au coût d'un parcours, raccourci après un changement,
+#   allongé tant que rien ne bouge.
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+import logging
+
+from watchdog.events import (FileCreatedEvent, FileModifiedEvent, FileMovedEvent, FileDeletedEvent,
+                             DirCreatedEvent, DirDeletedEvent, DirMovedEvent)
+
+from core.scanner import scanner_fichiers
+from core.quarantine import NOM_QUARANTAINE
+
+logger = logging.getLogger('organizer')
+
+# Configuration
+TAILLE_TAMPON_INOTIFY = 256 * 1024  # Octets lus par appel à read() (plusieurs milliers d'événements)
+INTERVALLE_MIN = 2.0  # Secondes entre deux scrutations d'une racine active
+INTERVALLE_MAX = 60.0  # Secondes entre deux scrutations d'une racine inactive
+PART_SCRUTATION = 0.1  # Part maximale du temps passée à parcourir une racine
+
+# Systèmes de fichiers où inotify ne voit pas les modifications distantes
+SYSTEMES_RESEAU = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "ncpfs", "afs", "9p", "fuse.sshfs",
+                   "fuse.rclone", "fuse.s3fs", "davfs", "glusterfs", "ceph", "lustre", "gpfs"}
+
+# Constantes de linux/inotify.h
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_CLOSE_WRITE = 0x00000008
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+MASQUE_INOTIFY = (IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+                  | IN_DELETE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+EN_TETE = struct.Struct("iIII")  # wd, mask, cookie, len
+
+_libc = None
+
+
+def _obtenir_libc():
+    """Retourne la libc avec les fonctions inotify, ou None hors Linux."""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+                _libc = libc
+            except (OSError, AttributeError) as e:
+                logger.info(f"inotify indisponible : {e}")
+    return _libc or None
+
+
+def inotify_disponible():
+    return _obtenir_libc() is not None
+
+
+def systeme_de_fichiers(chemin):
+    """Type du système de fichiers contenant chemin (lu dans /proc/self/mounts), ou None."""
+    chemin = os.path.realpath(chemin)
+    meilleur, type_fs = "", None
+    try:
+        with open("/proc/self/mounts", encoding="utf-8", errors="replace") as f:
+            for ligne in f:
+                champs = ligne.split()
+                if len(champs) < 3:
+                    continue
+                point = champs[1].replace("\\040", " ")
+                if (chemin == point or chemin.startswith(point.rstrip("/") + "/")) and len(point) > len(meilleur):
+                    meilleur, type_fs = point, champs[2]
+    except OSError:
+        return None
+    return type_fs
+
+
+def est_systeme_reseau(chemin):
+    return systeme_de_fichiers(chemin) in SYSTEMES_RESEAU
+
+
+class Surveillance:
+    """Racine planifiée sur un observateur (équivalent de watchdog.observers.api.ObservedWatch)."""
+
+    def __init__(self, handler, chemin, recursif):
+        self.handler = handler
+        self.path = os.path.abspath(chemin)
+        self.is_recursive = recursif
+
+    def couvre(self, dossier):
+        return dossier == self.path or (self.is_recursive and dossier.startswith(self.path.rstrip(os.sep) + os.sep))
+
+
+class ObservateurInotify:
+    """Observateur inotify minimal : un thread lecteur, un descripteur, un watch par dossier surveillé."""
+
+    def __init__(self):
+        libc = _obtenir_libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify n'est pas disponible sur ce système")
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            numero = ctypes.get_errno()
+            raise OSError(numero, os.strerror(numero))
+        self.reveil_lecture, self.reveil_ecriture = os.pipe()
+        self.verrou = threading.RLock()
+        self.dossiers = {}  # wd → dossier
+        self.wds = {}  # dossier → wd
+        self.surveillances = []
+        self.arret = threading.Event()
+        self.thread = None
+
+    # --- Watches ---
+
+    def _ajouter_watch(self, dossier):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dossier), MASQUE_INOTIFY)
+        if wd < 0:
+            numero = ctypes.get_errno()
+            if numero == errno.ENOSPC:
+                logger.warning(f"Limite de watches inotify atteinte (fs.inotify.max_user_watches) : {dossier} non surveillé")
+            elif numero not in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                logger.warning(f"Impossible de surveiller {dossier} : {os.strerror(numero)}")
+            return False
+        self.dossiers[wd] = dossier
+        self.wds[dossier] = wd
+        return True
+
+    def _ajouter_arborescence(self, racine, recursif):
+        """Ajoute un watch sur racine et, si recursif, sur chacun de ses sous-dossiers. Retourne les dossiers ajoutés."""
+        ajoutes = []
+        a_parcourir = [racine]
+        while a_parcourir:
+            dossier = a_parcourir.pop()
+            if dossier not in self.wds and not self._ajouter_watch(dossier):
+                continue
+            ajoutes.append(dossier)
+            if not recursif:
+                continue
+            try:
+                with os.scandir(dossier) as entrees:
+                    for entree in entrees:
+                        if entree.is_dir(follow_symlinks=False) and entree.name != NOM_QUARANTAINE:
+                            a_parcourir.append(entree.path)
+            except OSError:
+                pass
+        return ajoutes
+
+    def _retirer_watch(self, dossier):
+        wd = self.wds.pop(dossier, None)
+        if wd is not None:
+            self.dossiers.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def schedule(self, handler, chemin, recursive=False):
+        surveillance = Surveillance(handler, chemin, recursive)
+        with self.verrou:
+            self._ajouter_arborescence(surveillance.path, recursive)
+            self.surveillances.append(surveillance)
+        return surveillance
+
+    def unschedule(self, surveillance):
+        with self.verrou:
+            self.surveillances.remove(surveillance)
+            for dossier in list(self.wds):
+                if not any(s.couvre(dossier) for s in self.surveillances):
+                    self._retirer_watch(dossier)
+
+    # --- Thread lecteur ---
+
+    def start(self):
+        self.arret.clear()
+        self.thread = threading.Thread(target=self._lire, name="ObservateurInotify", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.arret.set()
+        os.write(self.reveil_ecriture, b"x")
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+        if not self.is_alive():
+            for fd in (self.fd, self.reveil_lecture, self.reveil_ecriture):
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _lire(self):
+        while not self.arret.is_set():
+            try:
+                prets, _, _ = select.select([self.fd, self.reveil_lecture], [], [])
+                if self.fd not in prets:
+                    continue
+                tampon = os.read(self.fd, TAILLE_TAMPON_INOTIFY)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                logger.error(f"Lecture inotify interrompue : {e}")
+                return
+            try:
+                with self.verrou:
+                    self._traiter_tampon(tampon)
+            except Exception as e:
+                logger.error(f"Erreur lors du traitement des événements inotify : {e}")
+
+    def _decoder(self, tampon):
+        """Décode un tampon en (wd, masque, cookie, nom)."""
+        position = 0
+        while position + EN_TETE.size <= len(tampon):
+            wd, masque, cookie, longueur = EN_TETE.unpack_from(tampon, position)
+            position += EN_TETE.size
+            nom = tampon[position:position + longueur].rstrip(b"\0")
+            position += longueur
+            yield wd, masque, cookie, os.fsdecode(nom)
+
+    def _traiter_tampon(self, tampon):
+        evenements = []
+        deplacements = {}  # Cookie → index de l'événement IN_MOVED_FROM dans evenements
+        debordement = False
+        for wd, masque, cookie, nom in self._decoder(tampon):
+            if masque & IN_Q_OVERFLOW:
+                debordement = True
+                continue
+            dossier = self.dossiers.get(wd)
+            if dossier is None:
+                continue
+            if masque & IN_IGNORED or masque & IN_DELETE_SELF:
+                if masque & IN_IGNORED:
+                    self.dossiers.pop(wd, None)
+                    if self.wds.get(dossier) == wd:
+                        del self.wds[dossier]
+                continue
+            chemin = os.path.join(dossier, nom)
+            est_dossier = bool(masque & IN_ISDIR)
+            if masque & IN_MOVED_FROM:
+                deplacements[cookie] = len(evenements)
+                evenements.append((DirDeletedEvent if est_dossier else FileDeletedEvent)(chemin))
+            elif masque & IN_MOVED_TO:
+                indice = deplacements.pop(cookie, None)
+                if indice is not None:
+                    source = evenements[indice].src_path
+                    evenements[indice] = (DirMovedEvent if est_dossier else FileMovedEvent)(source, chemin)
+                    if est_dossier:
+                        if source in self.wds:
+                            self._renommer_dossier(source, chemin)  # Les watches suivent le dossier
+                        else:
+                            self._nouveau_dossier(chemin)  # Dossier renommé avant la pose de son watch
+                        evenements.extend(self._sous_deplacements(source, chemin))
+                else:
+                    evenements.append((DirCreatedEvent if est_dossier else FileCreatedEvent)(chemin))
+                    if est_dossier:
+                        evenements.extend(self._nouveau_dossier(chemin))
+            elif masque & IN_CREATE:
+                evenements.append((DirCreatedEvent if est_dossier else FileCreatedEvent)(chemin))
+                if est_dossier:
+                    evenements.extend(self._nouveau_dossier(chemin))
+            elif masque & IN_DELETE:
+                evenements.append((DirDeletedEvent if est_dossier else FileDeletedEvent)(chemin))
+            elif masque & (IN_MODIFY | IN_CLOSE_WRITE) and not est_dossier:
+                evenements.append(FileModifiedEvent(chemin))
+        for indice in deplacements.values():
+            if evenements[indice].is_directory:
+                self._retirer_arborescence(evenements[indice].src_path)  # Dossier sorti des racines surveillées
+        for evenement in evenements:
+            self._distribuer(evenement)
+        if debordement:
+            self._resynchroniser()
+
+    def _resynchroniser(self):
+        """
+        File inotify saturée : des événements ont été perdus. Les watches des racines récursives sont reposés
+        (dossiers créés pendant la saturation), puis chaque racine est resynchronisée par son handler
+        (resynchroniser(), réconciliation par le service de surveillance) ou, à défaut, reparcourue :
+        chaque fichier est signalé comme modifié.
+        """
+        logger.warning("File inotify saturée : des événements ont été perdus, resynchronisation des racines.")
+        for surveillance in list(self.surveillances):
+            if surveillance.is_recursive:
+                self._ajouter_arborescence(surveillance.path, True)
+            resynchroniser = getattr(surveillance.handler, "resynchroniser", None)
+            if resynchroniser is not None:
+                resynchroniser()
+                continue
+            for entree in scanner_fichiers(surveillance.path, recursif=surveillance.is_recursive):
+                surveillance.handler.dispatch(FileModifiedEvent(entree.chemin))
+
+    def _retirer_arborescence(self, racine):
+        prefixe = racine.rstrip(os.sep) + os.sep
+        for dossier in [d for d in self.wds if d == racine or d.startswith(prefixe)]:
+            self._retirer_watch(dossier)
+
+    def _renommer_dossier(self, source, destination):
+        """Met à jour les chemins des watches d'un dossier déplacé (les wd restent valides)."""
+        prefixe = source.rstrip(os.sep) + os.sep
+        for wd, dossier in list(self.dossiers.items()):
+            if dossier == source or dossier.startswith(prefixe):
+                nouveau = destination + dossier[len(source):]
+                self.dossiers[wd] = nouveau
+                self.wds.pop(dossier, None)
+                self.wds[nouveau] = wd
+
+    def _sous_deplacements(self, source, destination):
+        """Événements de déplacement des fichiers d'un dossier déplacé (comme watchdog)."""
+        for entree in scanner_fichiers(destination, recursif=True):
+            yield FileMovedEvent(source + entree.chemin[len(destination):], entree.chemin)
+
+    def _nouveau_dossier(self, dossier):
+        """
+        Surveille un dossier apparu sous une racine récursive. Les fichiers qu'il contient déjà
+        (créés avant la pose du watch) sont signalés comme créés.
+        """
+        parent = os.path.dirname(dossier)
+        if not any(s.is_recursive and s.couvre(parent) for s in self.surveillances):
+            return []
+        evenements = []
+        for sous_dossier in self._ajouter_arborescence(dossier, True):
+            try:
+                with os.scandir(sous_dossier) as entrees:
+                    evenements.extend(FileCreatedEvent(e.path) for e in entrees if e.is_file(follow_symlinks=False))
+            except OSError:
+                pass
+        return evenements
+
+    def _distribuer(self, evenement):
+        dossier = os.path.dirname(evenement.src_path)
+        for surveillance in self.surveillances:
+            if surveillance.couvre(dossier):
+                surveillance.handler.dispatch(evenement)
+
+
+class _RacineScrutee:
+    __slots__ = ("surveillance", "instantane", "intervalle", "echeance")
+
+    def __init__(self, surveillance):
+        self.surveillance = surveillance
+        self.instantane = None
+        self.intervalle = INTERVALLE_MIN
+        self.echeance = 0.0
+
+
+class ObservateurScrutation:
+    """Observateur par scrutation périodique, à intervalle adaptatif par racine."""
+
+    def __init__(self, intervalle_min=INTERVALLE_MIN, intervalle_max=INTERVALLE_MAX):
+        self.intervalle_min = intervalle_min
+        self.intervalle_max = intervalle_max
+        self.verrou = threading.RLock()
+        self.racines = []
+        self.arret = threading.Event()
+        self.thread = None
+
+    @staticmethod
+    def _instantane(surveillance):
+        """Chemin → (inode, taille, mtime_ns) des fichiers de la racine."""
+        instantane = {}
+        for entree in scanner_fichiers(surveillance.path, recursif=surveillance.is_recursive):
+            st = entree.stat_ou_none()
+            if st is not None:
+                instantane[entree.chemin] = (st.st_ino, st.st_size, st.st_mtime_ns)
+        return instantane
+
+    def schedule(self, handler, chemin, recursive=False):
+        racine = _RacineScrutee(Surveillance(handler, chemin, recursive))
+        debut = time.monotonic()
+        racine.instantane = self._instantane(racine.surveillance)  # Référence : seuls les changements suivants comptent
+        racine.intervalle = self._intervalle_base(time.monotonic() - debut)
+        racine.echeance = time.monotonic() + racine.intervalle
+        with self.verrou:
+            self.racines.append(racine)
+        return racine.surveillance
+
+    def unschedule(self, surveillance):
+        with self.verrou:
+            self.racines = [r for r in self.racines if r.surveillance is not surveillance]
+
+    def _intervalle_base(self, duree_parcours):
+        return min(self.intervalle_max, max(self.intervalle_min, duree_parcours / PART_SCRUTATION))
+
+    def start(self):
+        self.arret.clear()
+        self.thread = threading.Thread(target=self._scruter, name="ObservateurScrutation", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.arret.set()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _scruter(self):
+        while not self.arret.is_set():
+            with self.verrou:
+                racines = list(self.racines)
+            maintenant = time.monotonic()
+            for racine in racines:
+                if racine.echeance <= maintenant and not self.arret.is_set():
+                    try:
+                        self._comparer(racine)
+                    except Exception as e:
+                        logger.error(f"Erreur lors de la scrutation de {racine.surveillance.path} : {e}")
+            prochaine = min((r.echeance for r in racines), default=time.monotonic() + self.intervalle_min)
+            self.arret.wait(max(0.1, prochaine - time.monotonic()))
+
+    def _comparer(self, racine):
+        debut = time.monotonic()
+        ancien = racine.instantane
+        nouveau = self._instantane(racine.surveillance)
+        duree = time.monotonic() - debut
+        disparus = {chemin: infos for chemin, infos in ancien.items() if chemin not in nouveau}
+        par_inode = {infos[0]: chemin for chemin, infos in disparus.items()}
+        evenements = []
+        for chemin, infos in nouveau.items():
+            precedent = ancien.get(chemin)
+            if precedent is None:
+                source = par_inode.pop(infos[0], None)
+                if source is not None:
+                    del disparus[source]
+                    evenements.append(FileMovedEvent(source, chemin))
+                else:
+                    evenements.append(FileCreatedEvent(chemin))
+            elif precedent != infos:
+                evenements.append(FileModifiedEvent(chemin))
+        evenements.extend(FileDeletedEvent(chemin) for chemin in disparus)
+        racine.instantane = nouveau
+
+        base = self._intervalle_base(duree)
+        if evenements:
+            racine.intervalle = base  # Activité : on revient au rythme le plus rapide permis par le coût du parcours
+        else:
+            racine.intervalle = min(self.intervalle_max, max(base, racine.intervalle * 1.5))
+        racine.echeance = time.monotonic() + racine.intervalle
+        for evenement in evenements:
+            racine.surveillance.handler.dispatch(evenement)
@@ -1,44 +1,617 @@
+# -*- coding: utf-8 -*-
+# Ce fichier surveille un dossier et organise les fichiers au fur et à mesure de leur arrivée.
+# Seuls les chemins signalés par les événements (création, déplacement, modification) sont traités :
+# un nouveau téléchargement est classé et comparé aux fichiers de même taille (hash en cache),
+# sans reparcourir tout le dossier.
+# Les événements passent par une file : regroupés par chemin, rendus une fois le fichier stable,
+# et traités par un worker séparé du thread de l'observateur.
+# ServiceSurveillance regroupe plusieurs racines sur une seule file et un pool de workers, avec un observateur
+# par backend (inotify natif, scrutation adaptative pour les partages réseau, ou watchdog).
+# Le catalogue des fichiers (core/catalog.py) est tenu à jour par le service : une racine surveillée
+# n'a pas à être reparcourue par l'interface, et les doublons y trouvent les fichiers de même taille.
+
 import time
 import os
+import heapq
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from logger import logger
-from organizer import classer_fichier_par_type, supprimer_doublons
+
+from core.organizer import (classer_chemins_par_type, supprimer_doublons_fichiers, MODE_DOUBLONS,
+                            WORKERS_HASH)
+from core.scanner import scanner_fichiers
+from core.quarantine import NOM_QUARANTAINE
+from core.links import est_temporaire
+from core.snapshot import InstantaneSurveillance, reconcilier, SNAPSHOT_FILE
+from core.catalog import obtenir_catalogue
+from core.watch_backends import ObservateurInotify, ObservateurScrutation, inotify_disponible, est_systeme_reseau
+
+logger = logging.getLogger('organizer')
+
+# Secondes sans changement de taille ni de date de modification avant de traiter un fichier
+DELAI_STABILITE = 2.0
+# Racines organisées simultanément par le service de surveillance
+WORKERS_SURVEILLANCE = 2
+# Budget de dossiers surveillés récursivement (un watch inotify par dossier)
+MAX_DOSSIERS_SURVEILLES = 200000
+# Backend de surveillance : "auto" (selon la plateforme et le système de fichiers de chaque racine),
+# "inotify" (natif, Linux), "watchdog" (observateur par défaut de watchdog) ou "scrutation" (NFS, SMB...)
+BACKEND_SURVEILLANCE = "auto"
+BACKENDS_SURVEILLANCE = ("auto", "inotify", "watchdog", "scrutation")
+# Au démarrage, comparer chaque racine à son instantané pour organiser les fichiers arrivés entre-temps
+RECONCILIER_AU_DEMARRAGE = True
+
+
+class IndexTailles:
+    """Index taille → chemins des fichiers d'un dossier, construit une fois puis tenu à jour par les événements."""
+
+    def __init__(self, dossier):
+        self.dossier = dossier
+        self.par_taille = None  # Construit au premier besoin
+        self.tailles = {}  # Chemin → taille indexée
+
+    def _construire(self):
+        self.par_taille = {}
+        for entree in scanner_fichiers(self.dossier, recursif=True):
+            st = entree.stat_ou_none()
+            if st is not None:
+                self._indexer(entree.chemin, st.st_size)
+        logger.info(f"Index des tailles construit : {len(self.tailles)} fichier(s) dans {self.dossier}")
+
+    def _indexer(self, chemin, taille):
+        self.retirer(chemin)
+        self.tailles[chemin] = taille
+        self.par_taille.setdefault(taille, set()).add(chemin)
+
+    def ajouter(self, chemin):
+        if self.par_taille is None:
+            return  # L'index sera construit avec l'état courant du dossier
+        try:
+            self._indexer(chemin, os.path.getsize(chemin))
+        except OSError:
+            self.retirer(chemin)
+
+    def retirer(self, chemin):
+        taille = self.tailles.pop(chemin, None)
+        if taille is not None:
+            chemins = self.par_taille[taille]
+            chemins.discard(chemin)
+            if not chemins:
+                del self.par_taille[taille]
+
+    def candidats(self, taille):
+        if self.par_taille is None:
+            self._construire()
+        return list(self.par_taille.get(taille, ()))
+
+
+class FileEvenements:
+    """
+    File des chemins signalés, regroupés par chemin : une rafale d'événements (création, modifications,
+    déplacement) ne produit qu'un traitement. Un fichier n'est rendu qu'une fois stable : taille et date
+    de modification inchangées pendant delai_stabilite secondes (téléchargements en cours).
+    """
+
+    def __init__(self, delai_stabilite=DELAI_STABILITE):
+        self.delai_stabilite = delai_stabilite
+        self.condition = threading.Condition()
+        self.etats = {}  # Chemin → [échéance, signature (taille, mtime_ns) au dernier contrôle]
+        self.echeances = []  # Tas (échéance, chemin) ; les entrées périmées sont ignorées au dépilage
+        self.supprimes = set()  # Chemins disparus depuis le dernier passage du worker
+
+    def signaler(self, chemin):
+        """Ajoute ou repousse un chemin (appelé depuis le thread de l'observateur : ne bloque pas)."""
+        echeance = time.monotonic() + self.delai_stabilite
+        with self.condition:
+            etat = self.etats.get(chemin)
+            if etat is None:
+                self.etats[chemin] = [echeance, None]
+            else:
+                etat[0] = echeance
+            self.supprimes.discard(chemin)
+            heapq.heappush(self.echeances, (echeance, chemin))
+            self.condition.notify()
+
+    def retirer(self, chemin):
+        with self.condition:
+            self.etats.pop(chemin, None)
+            self.supprimes.add(chemin)
+
+    def __len__(self):
+        return len(self.etats)
+
+    def _echus(self, timeout):
+        """Attend au plus timeout secondes et retourne les chemins dont l'échéance est passée."""
+        with self.condition:
+            while True:
+                maintenant = time.monotonic()
+                echus = []
+                while self.echeances and self.echeances[0][0] <= maintenant:
+                    echeance, chemin = heapq.heappop(self.echeances)
+                    etat = self.etats.get(chemin)
+                    if etat is not None and etat[0] == echeance:
+                        echus.append((chemin, echeance, etat[1]))
+                if echus or timeout <= 0:
+                    return echus
+                attente = min(timeout, self.echeances[0][0] - maintenant) if self.echeances else timeout
+                self.condition.wait(attente)
+                timeout -= time.monotonic() - maintenant
+
+    def prets(self, timeout=1.0):
+        """
+        Retourne (chemins stables à traiter, chemins supprimés entre-temps).
+        Un fichier encore en cours d'écriture est replanifié ; un fichier disparu est abandonné.
+        """
+        prets = []
+        for chemin, echeance, signature in self._echus(timeout):
+            try:
+                st = os.stat(chemin)
+            except OSError:
+                st = None
+            with self.condition:
+                etat = self.etats.get(chemin)
+                if etat is None or etat[0] != echeance:
+                    continue  # Retiré ou signalé à nouveau pendant le stat
+                if st is None:
+                    del self.etats[chemin]
+                    continue
+                nouvelle = (st.st_size, st.st_mtime_ns)
+                if nouvelle == signature or time.time() - st.st_mtime >= self.delai_stabilite:
+                    del self.etats[chemin]
+                    prets.append(chemin)
+                else:
+                    etat[0] = time.monotonic() + self.delai_stabilite
+                    etat[1] = nouvelle
+                    heapq.heappush(self.echeances, (etat[0], chemin))
+        with self.condition:
+            supprimes, self.supprimes = self.supprimes, set()
+        return prets, supprimes
+
 
 class FolderHandler(FileSystemEventHandler):
-    def __init__(self, path, delai_execution=30):
+    """
+    Racine surveillée et ses règles (classement, doublons, délai entre deux organisations).
+    Le handler ne fait qu'alimenter la file partagée du ServiceSurveillance depuis le thread de l'observateur ;
+    les organisations sont faites par les workers du service, jamais deux à la fois pour une même racine.
+    """
+
+    def __init__(self, path, delai_execution=30, classer=True, doublons=True, mode_doublons=MODE_DOUBLONS,
+                 workers=WORKERS_HASH, recursif=False, file=None, instantane=None, catalogue=None):
         self.path = path
         self.derniere_execution = 0
         self.delai_execution = delai_execution  # en secondes
+        self.classer = classer
+        self.doublons = doublons
+        self.mode_doublons = mode_doublons
+        self.workers = workers
+        self.recursif = recursif
+        self.file = file if file is not None else FileEvenements()
+        self.catalogue = catalogue  # CatalogueFichiers partagé ; à défaut, index des tailles propre à la racine
+        self.index_tailles = IndexTailles(path) if catalogue is None else None  # Utilisé par le seul worker de la racine
+        self.lot = {}  # Chemins stables en attente du délai (remplis par le répartiteur du service)
+        self.supprimes = set()
+        self.instantane = instantane  # InstantaneSurveillance tenu à jour après chaque organisation
+        self.resynchronisation = None  # Rappel du service quand des événements ont été perdus
+
+    def _ignorer(self, chemin):
+        """Fichiers temporaires de l'organisateur (liens en cours) et contenu des quarantaines."""
+        return est_temporaire(os.path.basename(chemin)) or NOM_QUARANTAINE in chemin.split(os.sep)
+
+    def _signaler(self, chemin):
+        if not self._ignorer(chemin):
+            self.file.signaler(chemin)
+
+    def _dans_perimetre(self, chemin):
+        """Chemin couvert par la racine (fichier direct, ou sous-dossier si la racine est récursive)."""
+        dossier = os.path.dirname(chemin)
+        return dossier == self.path or (self.recursif and dossier.startswith(self.path.rstrip(os.sep) + os.sep))
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._signaler(event.src_path)
 
     def on_modified(self, event):
         if not event.is_directory:
-            maintenant = time.time()
-            if maintenant - self.derniere_execution > self.delai_execution:
-                logger.info(f"🔄 Organisation declenchee pour : {self.path}")
-                classer_fichier_par_type(self.path)
-                supprimer_doublons(self.path)
-                logger.info("✅ Organisation terminee.")
-                self.derniere_execution = maintenant
-            else:
-                logger.info("⏱️ Modification detectee mais attente du delai avant la prochaine organisation.")
+            self._signaler(event.src_path)
 
-def demarrer_surveillance(path):
-    if not os.path.exists(path):
-        logger.error(f"❌ Le chemin {path} n'existe pas.")
-        return
+    def on_moved(self, event):
+        self.file.retirer(event.src_path)  # Dossier : son contenu quitte le catalogue
+        if not event.is_directory:
+            self._signaler(event.dest_path)
+
+    def on_deleted(self, event):
+        self.file.retirer(event.src_path)
+
+    def resynchroniser(self):
+        """Appelé par l'observateur quand des événements ont été perdus (file inotify saturée)."""
+        if self.resynchronisation is not None:
+            self.resynchronisation(self)
+
+    def _candidats(self, taille):
+        """Fichiers déjà présents sous la racine avec cette taille (catalogue ou index des tailles)."""
+        if self.catalogue is not None:
+            return self.catalogue.chemins_de_taille(taille, self.path)
+        return self.index_tailles.candidats(taille)
 
-    event_handler = FolderHandler(path)
-    observer = Observer()
-    observer.schedule(event_handler, path, recursive=False)
-    observer.start()
+    def organiser(self, chemins):
+        """Traite des fichiers stables : doublons d'abord (comparés à l'index), puis classement par type."""
+        demandes = list(dict.fromkeys(chemins))
+        chemins = [chemin for chemin in demandes if os.path.isfile(chemin)]
+        if not chemins:
+            self.enregistrer_etat(demandes)
+            return
+        logger.info(f"🔄 Organisation declenchee pour {len(chemins)} fichier(s) dans : {self.path}")
+        if self.index_tailles is not None:
+            for chemin in chemins:
+                self.index_tailles.retirer(chemin)  # Réindexé après traitement, avec sa taille définitive
+        if self.doublons:
+            retires = set(supprimer_doublons_fichiers(
+                chemins, self._candidats, workers=self.workers, mode_doublons=self.mode_doublons))
+            if self.mode_doublons == "supprimer":
+                chemins = [chemin for chemin in chemins if chemin not in retires]
+        deplacements = classer_chemins_par_type(self.path, chemins) if self.classer else {}
+        if self.index_tailles is not None:
+            for chemin in chemins:
+                self.index_tailles.ajouter(deplacements.get(chemin, chemin))
+        self.enregistrer_etat(demandes + list(deplacements.values()))
+        logger.info("✅ Organisation terminee.")
 
-    logger.info(f"👁️ Surveillance activee sur le dossier : {path}")
+    def enregistrer_etat(self, chemins):
+        """Reporte l'état final de chemins dans le catalogue et dans l'instantané (réconciliation au prochain démarrage)."""
+        if self.catalogue is not None:
+            self.catalogue.enregistrer(chemins)
+        if self.instantane is not None:
+            self.instantane.enregistrer(self.path, [chemin for chemin in chemins if self._dans_perimetre(chemin)])
+
+
+def _limite_watches_systeme():
+    """Nombre maximum de watches inotify par utilisateur (Linux), ou None."""
+    try:
+        with open("/proc/sys/fs/inotify/max_user_watches") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def compter_dossiers(racine, limite):
+    """Compte les dossiers de racine (racine comprise) ; le parcours s'arrête dès que limite est dépassée."""
+    nombre = 0
+    a_parcourir = [racine]
+    while a_parcourir and nombre <= limite:
+        courant = a_parcourir.pop()
+        nombre += 1
+        try:
+            with os.scandir(courant) as entrees:
+                for entree in entrees:
+                    if entree.is_dir(follow_symlinks=False):
+                        a_parcourir.append(entree.path)
+        except OSError:
+            pass
+    return nombre
+
+
+def choisir_backend(chemin, backend=BACKEND_SURVEILLANCE):
+    """
+    Backend de surveillance d'une racine. En mode "auto" : scrutation sur un système de fichiers réseau
+    (inotify n'y voit pas les modifications distantes), inotify natif sous Linux, sinon l'observateur de watchdog.
+    """
+    if backend not in BACKENDS_SURVEILLANCE:
+        raise ValueError(f"Backend de surveillance inconnu : {backend} (attendu : {', '.join(BACKENDS_SURVEILLANCE)})")
+    if backend != "auto":
+        return backend
+    if est_systeme_reseau(chemin):
+        return "scrutation"
+    if inotify_disponible():
+        return "inotify"
+    return "watchdog"
+
+
+def creer_observateur(backend):
+    if backend == "inotify":
+        return ObservateurInotify()
+    if backend == "scrutation":
+        return ObservateurScrutation()
+    return Observer()
+
+
+class ServiceSurveillance:
+    """
+    Surveille plusieurs racines (récursives ou non) avec une seule file d'événements et un pool de workers
+    partagé ; chaque racine garde ses propres règles (FolderHandler). Les racines d'un même backend
+    partagent un seul observateur (inotify natif, scrutation ou watchdog, voir choisir_backend).
+
+    Une racine récursive coûte un watch inotify par dossier : le total est borné par max_dossiers
+    (et par une fraction de la limite du système). Une racine qui dépasserait le budget n'est surveillée
+    qu'au premier niveau.
+    """
+
+    def __init__(self, workers=WORKERS_SURVEILLANCE, delai_stabilite=DELAI_STABILITE,
+                 max_dossiers=MAX_DOSSIERS_SURVEILLES, backend=BACKEND_SURVEILLANCE,
+                 reconciliation=RECONCILIER_AU_DEMARRAGE):
+        self.backend = backend
+        self.instantane = None
+        if reconciliation:
+            try:
+                self.instantane = InstantaneSurveillance()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Instantané de surveillance indisponible ({SNAPSHOT_FILE}) : {e}")
+        self.catalogue = obtenir_catalogue()
+        self.observateurs = {}  # Backend → observateur partagé par ses racines
+        self.temps_prets = {}  # Chemin normalisé → (backend, secondes jusqu'à la surveillance effective)
+        self.file = FileEvenements(delai_stabilite)
+        self.workers = workers
+        limite_systeme = _limite_watches_systeme()
+        if limite_systeme:
+            max_dossiers = min(max_dossiers, limite_systeme * 3 // 4)  # Marge pour les autres applications
+        self.max_dossiers = max_dossiers
+        self.dossiers_surveilles = 0
+        self.racines = {}  # Chemin normalisé → FolderHandler
+        self.surveillances = {}  # Chemin normalisé → (backend, ObservedWatch, dossiers comptés)
+        self.verrou = threading.Lock()
+        self.en_cours = set()  # Racines en cours d'organisation par un worker
+        self.arret = threading.Event()
+        self.pool = None
+        self.repartiteur = None
+
+    @staticmethod
+    def _cle(chemin):
+        return os.path.normcase(os.path.abspath(chemin))
+
+    def _observateur(self, backend):
+        """Observateur partagé d'un backend, créé au premier besoin (inotify indisponible : repli sur watchdog)."""
+        observateur = self.observateurs.get(backend)
+        if observateur is None:
+            try:
+                observateur = creer_observateur(backend)
+            except OSError as e:
+                logger.warning(f"Backend {backend} indisponible ({e}), utilisation de watchdog.")
+                backend = "watchdog"
+                observateur = self.observateurs.get(backend) or creer_observateur(backend)
+            self.observateurs[backend] = observateur
+            if self.pool is not None:
+                observateur.start()
+        return backend, observateur
+
+    def ajouter_racine(self, chemin, recursif=False, backend=None, **regles):
+        """
+        Ajoute une racine à surveiller (possible avant ou après demarrer).
+
+        Args:
+            chemin: Dossier à surveiller
+            recursif: Surveiller aussi les sous-dossiers
+            backend: "auto", "inotify", "watchdog" ou "scrutation" (None : backend du service)
+            regles: Options du FolderHandler (delai_execution, classer, doublons, mode_doublons, workers)
+
+        Returns:
+            Le FolderHandler de la racine
+        """
+        if not os.path.isdir(chemin):
+            raise FileNotFoundError(f"Le chemin {chemin} n'existe pas.")
+        cle = self._cle(chemin)
+        backend = choisir_backend(chemin, backend or self.backend)
+        with self.verrou:
+            if cle in self.racines:
+                raise ValueError(f"{chemin} est déjà surveillé.")
+            dossiers = 1
+            if recursif and backend != "scrutation":
+                restant = self.max_dossiers - self.dossiers_surveilles
+                dossiers = compter_dossiers(chemin, restant)
+                if dossiers > restant:
+                    logger.warning(f"Plus de {restant} dossiers sous {chemin} : budget de surveillance dépassé, "
+                                   f"seul le premier niveau est surveillé.")
+                    recursif, dossiers = False, 1
+            elif backend == "scrutation":
+                dossiers = 0  # Aucun watch inotify
+            self.dossiers_surveilles += dossiers  # Réservé avant la pose des watches, faite hors du verrou
+            backend, observateur = self._observateur(backend)
+        handler = FolderHandler(os.path.abspath(chemin), recursif=recursif, file=self.file,
+                                instantane=self.instantane, catalogue=self.catalogue, **regles)
+        handler.resynchronisation = self._resynchroniser
+        debut = time.monotonic()
+        try:
+            surveillance = observateur.schedule(handler, chemin, recursive=recursif)
+        except Exception:
+            with self.verrou:
+                self.dossiers_surveilles -= dossiers
+            raise
+        with self.verrou:
+            self.racines[cle] = handler
+            self.surveillances[cle] = (backend, surveillance, dossiers)
+            self.temps_prets[cle] = (backend, time.monotonic() - debut)
+        logger.info(f"👁️ Surveillance activee sur le dossier : {chemin}" + (" (sous-dossiers compris)" if recursif else ""))
+        if backend != "watchdog" or observateur.is_alive():
+            self._signaler_pret(cle)  # watchdog : les watches ne sont posés qu'au démarrage de l'observateur
+        if self.pool is not None:
+            self._preparer(handler)  # Après la pose des watches : aucun fichier n'échappe
+        return handler
+
+    def _signaler_pret(self, cle):
+        backend, duree = self.temps_prets[cle]
+        logger.info(f"Surveillance prête en {duree:.3f} s ({backend}) : {cle}")
+
+    def rapport_demarrage(self):
+        """Temps jusqu'à la surveillance effective par backend : {backend: (racines, total, maximum) en secondes}."""
+        rapport = {}
+        for backend, duree in self.temps_prets.values():
+            racines, total, maximum = rapport.get(backend, (0, 0.0, 0.0))
+            rapport[backend] = (racines + 1, total + duree, max(maximum, duree))
+        return rapport
+
+    def retirer_racine(self, chemin):
+        cle = self._cle(chemin)
+        with self.verrou:
+            handler = self.racines.pop(cle, None)
+            if handler is None:
+                return
+            backend, surveillance, dossiers = self.surveillances.pop(cle)
+            self.temps_prets.pop(cle, None)
+            self.dossiers_surveilles -= dossiers
+        self.observateurs[backend].unschedule(surveillance)
+        if self.catalogue is not None:
+            self.catalogue.demarquer_surveille(handler.path)
+        logger.info(f"Surveillance retiree : {chemin}")
+
+    def _racine_de(self, chemin):
+        """Racine responsable d'un chemin : la plus proche qui le couvre (dossier direct, ou racine récursive)."""
+        dossier = os.path.dirname(self._cle(chemin))
+        direct = True
+        while True:
+            handler = self.racines.get(dossier)
+            if handler is not None and (direct or handler.recursif):
+                return handler
+            parent = os.path.dirname(dossier)
+            if parent == dossier:
+                return None
+            dossier, direct = parent, False
+
+    def demarrer(self):
+        self.arret.clear()
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Organisation")
+        self.repartiteur = threading.Thread(target=self._repartir, name="RepartiteurSurveillance", daemon=True)
+        self.repartiteur.start()
+        for backend, observateur in list(self.observateurs.items()):
+            debut = time.monotonic()
+            observateur.start()
+            if backend == "watchdog":
+                duree = time.monotonic() - debut
+                for cle, (backend_racine, temps) in list(self.temps_prets.items()):
+                    if backend_racine == backend:
+                        self.temps_prets[cle] = (backend, temps + duree)
+                        self._signaler_pret(cle)
+        for backend, (racines, total, maximum) in self.rapport_demarrage().items():
+            logger.info(f"Backend {backend} : {racines} racine(s) prête(s), {total:.3f} s au total, {maximum:.3f} s au plus")
+        for handler in list(self.racines.values()):
+            self._preparer(handler)
+
+    def arreter(self):
+        self.arret.set()
+        for observateur in self.observateurs.values():
+            if observateur.is_alive():
+                observateur.stop()
+                observateur.join()
+        if self.repartiteur is not None:
+            self.repartiteur.join()
+            self.repartiteur = None
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        if self.instantane is not None:
+            self.instantane.fermer()
+            self.instantane = None
+        if self.catalogue is not None:
+            for handler in self.racines.values():
+                self.catalogue.demarquer_surveille(handler.path)
+
+    def _repartir(self):
+        """Distribue les chemins stables aux racines, et les lots prêts aux workers."""
+        while not self.arret.is_set():
+            try:
+                chemins, supprimes = self.file.prets(timeout=0.5)
+                maintenant = time.time()
+                with self.verrou:
+                    for chemin in chemins:
+                        handler = self._racine_de(chemin)
+                        if handler is not None:
+                            handler.lot[chemin] = None
+                    for chemin in supprimes:
+                        handler = self._racine_de(chemin)
+                        if handler is not None:
+                            handler.lot.pop(chemin, None)
+                            handler.supprimes.add(chemin)
+                    for handler in self.racines.values():
+                        if handler in self.en_cours:
+                            continue
+                        pret = handler.lot and maintenant >= handler.derniere_execution + handler.delai_execution
+                        if pret or (handler.supprimes and not handler.lot):
+                            lot = []
+                            if pret:
+                                lot, handler.lot = list(handler.lot), {}
+                            supprimes_racine, handler.supprimes = handler.supprimes, set()
+                            self.en_cours.add(handler)
+                            self.pool.submit(self._traiter, handler, lot, supprimes_racine)
+            except Exception as e:
+                logger.error(f"Erreur dans le répartiteur de surveillance : {e}")
+
+    def _preparer(self, handler):
+        """
+        Confie à un worker la mise à jour du catalogue et la réconciliation d'une racine.
+        La racine est réservée pendant ce temps : aucune organisation ne démarre sur un catalogue incomplet.
+        """
+        if self.catalogue is None and self.instantane is None:
+            return
+        with self.verrou:
+            self.en_cours.add(handler)
+        self.pool.submit(self._reconcilier, handler)
+
+    def _resynchroniser(self, handler):
+        """Rattrape les événements perdus d'une racine : réconciliation, ou à défaut signalement de tous ses fichiers."""
+        if self.pool is None:
+            return
+        if self.instantane is not None:
+            self._preparer(handler)
+            return
+        if self.catalogue is not None:
+            self._preparer(handler)  # Suppressions perdues : le catalogue est remis à jour
+        for entree in scanner_fichiers(handler.path, recursif=handler.recursif):
+            handler._signaler(entree.chemin)
+
+    def _reconcilier(self, handler):
+        """Met à jour le catalogue de la racine et signale les fichiers arrivés ou modifiés pendant l'arrêt."""
+        try:
+            if self.catalogue is not None:
+                # Toujours récursif : les doublons sont cherchés dans toute l'arborescence de la racine
+                self.catalogue.rafraichir(handler.path, recursif=True, forcer=True)
+                self.catalogue.marquer_surveille(handler.path, handler.recursif)
+            if self.instantane is None:
+                return
+            changes = reconcilier(self.instantane, handler.path, handler.recursif)
+            ignores = [chemin for chemin in changes if handler._ignorer(chemin)]
+            if ignores:
+                self.instantane.enregistrer(handler.path, ignores)
+            for chemin in changes:
+                handler._signaler(chemin)
+        except Exception as e:
+            logger.error(f"Erreur lors de la réconciliation de {handler.path} : {e}")
+        finally:
+            with self.verrou:
+                self.en_cours.discard(handler)
+
+    def _traiter(self, handler, chemins, supprimes):
+        try:
+            if handler.index_tailles is not None:
+                for chemin in supprimes:
+                    handler.index_tailles.retirer(chemin)
+            if supprimes and handler.catalogue is not None:
+                handler.catalogue.retirer(supprimes)
+            if supprimes and handler.instantane is not None:
+                handler.instantane.retirer(handler.path, supprimes)
+            if chemins:
+                handler.organiser(chemins)
+                handler.derniere_execution = time.time()
+        except Exception as e:
+            logger.error(f"Erreur lors de l'organisation automatique de {handler.path} : {e}")
+        finally:
+            with self.verrou:
+                self.en_cours.discard(handler)
+
+
+def demarrer_surveillance(*paths, recursif=False, backend=BACKEND_SURVEILLANCE):
+    service = ServiceSurveillance(backend=backend)
+    for path in paths:
+        if not os.path.exists(path):
+            logger.error(f"❌ Le chemin {path} n'existe pas.")
+            continue
+        service.ajouter_racine(path, recursif=recursif)
+    if not service.racines:
+        return
+    service.demarrer()
 
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
         logger.info("🛑 Surveillance arrêtée.")
-        observer.stop()
-    observer.join()
+    service.arreter()
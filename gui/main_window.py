@@ -15,7 +15,11 @@ from PyQt6.QtGui import QIcon, QColor, QFont, QDesktopServices
 # Importation des modules d'organisation
 from core.organizer import (classer_fichier_par_type, classer_par_date, renommer_fichiers, 
                       supprimer_doublons, calculer_hash, generer_nouveau_nom)
-from core.history import enregistrer_action, afficher_historique, nettoyer_historique
+from core.history import (enregistrer_action, afficher_historique, nettoyer_historique,
+                          effacer_historique, rechercher_historique, compter_historique, actions_historique,
+                          ecrire_export, format_export, HISTORY_DIR, HISTORY_DB, HISTORY_BACKEND)
+from core.classification import TYPES_FICHIERS, CATEGORIE_PAR_DEFAUT, categorie_fichier
+from core.catalog import obtenir_catalogue
 from core.watcher import demarrer_surveillance, FolderHandler
 from logs.logger import logger
 import time
@@ -512,7 +516,7 @@ class FileManager(QMainWindow):
         # Filtre par type élégant
         self.type_filter = QComboBox()
         self.type_filter.addItem("Tous")
-        for type_name in ["Images", "Documents", "Vidéos", "Audios", "Archives", "Autres"]:
+        for type_name in list(TYPES_FICHIERS) + [CATEGORIE_PAR_DEFAUT]:
             self.type_filter.addItem(type_name)
         self.type_filter.setStyleSheet(f"""
             QComboBox {{
@@ -901,7 +905,7 @@ class FileManager(QMainWindow):
         elif item_id.startswith("vidéos"):
             self.type_filter.setCurrentText("Vidéos")
         elif item_id.startswith("musique"):
-            self.type_filter.setCurrentText("Audios")
+            self.type_filter.setCurrentText("Musique")
         elif item_id.startswith("archives"):
             self.type_filter.setCurrentText("Archives")
             
@@ -929,7 +933,7 @@ class FileManager(QMainWindow):
             matches_search = search_text == "" or search_text in file_name
             
             # Vérifier si le fichier correspond au type sélectionné
-            matches_type = selected_type == "Tous" or self.file_matches_type(file_type, selected_type)
+            matches_type = selected_type == "Tous" or self.file_matches_type(file_name, selected_type)
             
             # Afficher ou masquer la ligne
             self.file_table.setRowHidden(row, not (matches_search and matches_type))
@@ -938,20 +942,11 @@ class FileManager(QMainWindow):
         visible_count = sum(1 for row in range(self.file_table.rowCount()) if not self.file_table.isRowHidden(row))
         self.status_label.setText(f"{visible_count} éléments visibles sur {self.file_table.rowCount()}")
             
-    def file_matches_type(self, file_type, selected_type):
+    def file_matches_type(self, file_name, selected_type):
         """Vérifie si un fichier correspond au type de filtre sélectionné"""
-        if selected_type == "Images":
-            return file_type in ["JPG", "JPEG", "PNG", "GIF", "BMP", "WEBP", "SVG", "TIFF"]
-        elif selected_type == "Documents":
-            return file_type in ["PDF", "DOC", "DOCX", "TXT", "RTF", "XLS", "XLSX", "PPT", "PPTX", "ODT"]
-        elif selected_type == "Vidéos":
-            return file_type in ["MP4", "AVI", "MKV", "MOV", "WMV", "FLV", "WEBM"]
-        elif selected_type == "Audios":
-            return file_type in ["MP3", "WAV", "OGG", "FLAC", "AAC", "M4A"]
-        elif selected_type == "Archives":
-            return file_type in ["ZIP", "RAR", "7Z", "TAR", "GZ", "BZ2"]
-        else:
+        if selected_type == "Tous":
             return True
+        return categorie_fichier(file_name) == selected_type
             
     def reset_filters(self):
         """Réinitialise tous les filtres"""
@@ -1241,6 +1236,29 @@ class FileManager(QMainWindow):
             self.watcher_settings['auto_organize_by_type'] = dialog.auto_organize_by_type.isChecked()
             self.watcher_settings['auto_remove_duplicates'] = dialog.auto_remove_duplicates.isChecked()
             self.watcher_settings['recursive'] = dialog.recursive_watch.isChecked()
+
+    def demarrer_surveillance(self):
+        """Démarre la surveillance du dossier courant avec les options configurées"""
+        self.watcher_thread = WatcherThread(
+            self.current_directory,
+            delay=self.watcher_settings['delay'],
+            recursive=self.watcher_settings['recursive'],
+            organize_by_type=self.watcher_settings['auto_organize_by_type'],
+            remove_duplicates=self.watcher_settings['auto_remove_duplicates'],
+        )
+        self.watcher_thread.status_update.connect(self.watch_status_label.setText)
+        self.watcher_thread.start()
+        self.watch_btn.setText("⏹️  Arrêter la surveillance")
+
+    def stop_watcher(self):
+        """Arrête la surveillance en cours"""
+        if self.watcher_thread is not None:
+            self.watcher_thread.stop()
+            self.watcher_thread = None
+        self.is_watching = False
+        self.watch_btn.setText("👁️  Surveiller le dossier")
+        self.watch_status_label.setText("État: Inactif")
+
     def update_disk_space(self):
         """Met à jour les informations sur l'espace disque disponible"""
         try:
@@ -1275,34 +1293,16 @@ class FileManager(QMainWindow):
     
     def afficher_historique(self):
         """Affiche l'historique des actions."""
-        program_directory = os.path.dirname(os.path.abspath(__file__))
-        alternative_path = os.path.join(os.getcwd(), "json", "history.json")  # Dossier contenant ce fichier Python
-        history_file = os.path.join(program_directory, "json", "history.json")
-        if not os.path.exists(history_file):
-        # Si le fichier n'est pas trouvé, essayer un chemin relatif au dossier courant
-            alternative_path = os.path.join(os.getcwd(), "json", "history.json")
-        
-            if os.path.exists(alternative_path):
-                history_file = alternative_path
-            else:
-                QMessageBox.warning(self, "Historique", 
-                                f"Aucun historique trouvé. Chemin recherché:\n{history_file}\n"
-                                f"et\n{alternative_path}")
-                return
+        history_file = os.path.abspath(HISTORY_DB if HISTORY_BACKEND == "sqlite" else HISTORY_DIR)
         try:
-            # Charger le contenu du fichier JSON
-            with open(history_file, "r", encoding="utf-8") as file:
-                try:
-                    history_data = json.load(file)
-                except json.JSONDecodeError:
-                    QMessageBox.critical(self, "Erreur", "Le fichier d'historique est corrompu.")
-                    return
+            # Compter les entrées : les filtres interrogent ensuite l'historique à la demande
+            total_entries = compter_historique()
             
             # Afficher le chemin du fichier d'historique utilisé (pour le débogage)
             logger.debug(f"Fichier d'historique chargé: {history_file}")
             
             # Vérifier si l'historique est vide
-            if not history_data:
+            if not total_entries:
                 QMessageBox.information(self, "Historique", "L'historique est vide.")
                 return
              # Création d'une fenêtre de dialogue pour afficher l'historique
@@ -1336,12 +1336,8 @@ class FileManager(QMainWindow):
             action_filter = QComboBox()
             action_filter.addItem("Toutes les actions")
             
-            # Extraire les types d'actions uniques
-            actions = set()
-            for entry in history_data:
-                actions.add(entry.get("action", "Inconnue"))
-            
-            for action in sorted(actions):
+            # Types d'actions distincts présents dans l'historique
+            for action in actions_historique():
                 action_filter.addItem(action)
             
             # Bouton de recherche
@@ -1380,34 +1376,17 @@ class FileManager(QMainWindow):
             def refresh_table():
                 table.setRowCount(0)  # Effacer le tableau
                 
-                filtered_history = history_data
-                
-                # Appliquer le filtre de date
-                if date_check.isChecked():
-                    selected_date = date_filter.date().toString("yyyy-MM-dd")
-                    filtered_history = [
-                        entry for entry in filtered_history
-                        if entry.get("date", "").startswith(selected_date)
-                    ]
-
-                # Appliquer le filtre d'action
-                if action_filter.currentText() != "Toutes les actions":
-                    selected_action = action_filter.currentText()
-                    filtered_history = [
-                        entry for entry in filtered_history
-                        if entry.get("action") == selected_action
-                    ]
-
-                    # Appliquer la recherche textuelle
-                if search_text := search_input.text().strip():
-                    search_text = search_text.lower()
-                    filtered_history = [
-                        entry for entry in filtered_history
-                        if (search_text in entry.get("source", "").lower() or 
-                            search_text in entry.get("destination", "").lower())
-                    ]
-                 # Tri par date décroissante (le plus récent en premier)
-                filtered_history.sort(key=lambda x: x.get("date", ""), reverse=True)
+                # Filtres date / action / recherche textuelle, résultat trié du plus récent au plus ancien
+                # (requêtes indexées avec le stockage SQLite)
+                selected_date = date_filter.date().toString("yyyy-MM-dd") if date_check.isChecked() else None
+                selected_action = action_filter.currentText()
+                if selected_action == "Toutes les actions":
+                    selected_action = None
+                filtered_history = rechercher_historique(
+                    date=selected_date,
+                    action=selected_action,
+                    texte=search_input.text().strip() or None,
+                )
                 
                 # Remplir le tableau
                 table.setRowCount(len(filtered_history))
@@ -1464,7 +1443,7 @@ class FileManager(QMainWindow):
             
             # Label pour afficher les statistiques
             stats_label = QLabel()
-            stats_label.setText(f"Total: {len(history_data)} entrées")
+            stats_label.setText(f"Total: {total_entries} entrées")
             layout.addWidget(stats_label)
             def export_history():
                 options = QFileDialog.Options()  # Correction ici
@@ -1472,7 +1451,8 @@ class FileManager(QMainWindow):
                     None,  # `dialog` n'est pas défini, donc passe `None` si ce n'est pas un widget PyQt
                     "Exporter l'historique",
                     "",
-                    "Fichiers CSV (*.csv);;Fichiers JSON (*.json)",
+                    "Fichiers CSV (*.csv);;Fichiers JSON (*.json);;Fichiers JSON Lines (*.jsonl);;"
+                    "Fichiers Parquet (*.parquet);;Fichiers compressés (*.csv.gz *.json.gz *.jsonl.gz)",
                     options=options
                 )
                 
@@ -1480,33 +1460,11 @@ class FileManager(QMainWindow):
                     return
                     
                 try:
-                    if filename.endswith(".csv"):
-                        with open(filename, "w", encoding="utf-8", newline="") as f:
-                            writer = csv.writer(f)
-                            writer.writerow(["Date", "Action", "Source", "Destination"])
-                            for entry in history_data:
-                                writer.writerow([
-                                    entry.get("date", ""),
-                                    entry.get("action", ""),
-                                    entry.get("source", ""),
-                                    entry.get("destination", "N/A")
-                                ])
-                    elif filename.endswith(".json"):
-                        with open(filename, "w", encoding="utf-8") as f:
-                            json.dump(history_data, f, indent=4)
-                    else:
-                        # Ajouter l'extension par défaut
+                    # Ajouter l'extension par défaut si le format n'est pas reconnu
+                    if format_export(filename)[0] is None:
                         filename += ".csv"
-                        with open(filename, "w", encoding="utf-8", newline="") as f:
-                            writer = csv.writer(f)
-                            writer.writerow(["Date", "Action", "Source", "Destination"])
-                            for entry in history_data:
-                                writer.writerow([
-                                    entry.get("date", ""),
-                                    entry.get("action", ""),
-                                    entry.get("source", ""),
-                                    entry.get("destination", "N/A")
-                                ])
+                    # Export en flux, par lots : l'historique n'est jamais chargé entièrement
+                    ecrire_export(filename)
                     
                     QMessageBox.information(dialog, "Exportation", f"L'historique a été exporté avec succès vers {filename}")
                 except Exception as e:
@@ -1524,13 +1482,8 @@ class FileManager(QMainWindow):
                 
                 if reply == QMessageBox.Yes:
                     try:
-                        # Sauvegarder une copie de sauvegarde
-                        backup_file = history_file + ".bak"
-                        shutil.copy2(history_file, backup_file)
-                        
-                        # Écrire un tableau vide
-                        with open(history_file, "w", encoding="utf-8") as f:
-                            json.dump([], f)
+                        # Vider le journal après en avoir fait une copie de sauvegarde
+                        backup_file = effacer_historique()
                         
                         QMessageBox.information(
                             dialog,
@@ -1617,7 +1570,6 @@ class FileManager(QMainWindow):
             # Mettre à jour les statistiques
             def update_stats():
                 visible_rows = table.rowCount()
-                total_entries = len(history_data)
                 if visible_rows == total_entries:
                     stats_label.setText(f"Total: {total_entries} entrées")
                 else:
@@ -1708,8 +1660,13 @@ class FileManager(QMainWindow):
     def show_statistics(self):
         """Affiche les statistiques sur le dossier sélectionné."""
         if self.current_directory:
-            num_files = len([f for f in os.listdir(self.current_directory) if os.path.isfile(os.path.join(self.current_directory, f))])
-            num_folders = len([d for d in os.listdir(self.current_directory) if os.path.isdir(os.path.join(self.current_directory, d))])
+            catalogue = obtenir_catalogue()
+            if catalogue is not None:
+                catalogue.rafraichir(self.current_directory, recursif=False)  # Sans effet sur une racine surveillée
+                num_files, num_folders = catalogue.compter(self.current_directory)
+            else:
+                num_files = len([f for f in os.listdir(self.current_directory) if os.path.isfile(os.path.join(self.current_directory, f))])
+                num_folders = len([d for d in os.listdir(self.current_directory) if os.path.isdir(os.path.join(self.current_directory, d))])
             
             QMessageBox.information(self, "Statistiques", f"Fichiers : {num_files}\nDossiers : {num_folders}")
         else:
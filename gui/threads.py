@@ -14,7 +14,11 @@ from PyQt6.QtGui import QIcon, QColor, QFont
 
 # Importation des modules d'organisation
 from core.organizer import (classer_fichier_par_type, classer_par_date, renommer_fichiers, 
-                      supprimer_doublons, calculer_hash, generer_nouveau_nom)
+                      supprimer_doublons, calculer_hash, generer_nouveau_nom, WORKERS_HASH)
+from core.scanner import scanner_fichiers
+from core.classification import categorie_fichier
+from core.catalog import obtenir_catalogue
+from core.planner import planifier_organisation, executer_plan
 from core.history import enregistrer_action, afficher_historique, nettoyer_historique
 from core.watcher import demarrer_surveillance, FolderHandler
 from logs.logger import logger
@@ -31,27 +35,32 @@ class WatcherThread(QThread):
     status_update = pyqtSignal(str)
     file_changed = pyqtSignal(str)
 
-    def __init__(self, directory, delay=30):
+    def __init__(self, directory, delay=30, recursive=False, organize_by_type=True, remove_duplicates=True):
         super().__init__()
-        self.directory = directory
+        # Un dossier ou une liste de dossiers, surveillés par un seul service
+        self.directories = [directory] if isinstance(directory, str) else list(directory)
         self.running = True
-        self.delay = delay  # Délai en secondes (peut ne pas être directement utilisé ici)
-        self.observer = None
-        self.event_handler = None
+        self.delay = delay  # Délai minimum entre deux organisations d'un même dossier (secondes)
+        self.recursive = recursive
+        self.organize_by_type = organize_by_type
+        self.remove_duplicates = remove_duplicates
+        self.service = None
 
     def run(self):
-        from core.watcher import FolderHandler, Observer, logger  # Importez ici pour éviter les problèmes de dépendances cycliques potentiels
+        from core.watcher import ServiceSurveillance, logger  # Importez ici pour éviter les problèmes de dépendances cycliques potentiels
 
-        if not os.path.exists(self.directory):
-            self.status_update.emit(f"❌ Le dossier {self.directory} n'existe pas.")
+        self.service = ServiceSurveillance()
+        for directory in self.directories:
+            if not os.path.exists(directory):
+                self.status_update.emit(f"❌ Le dossier {directory} n'existe pas.")
+                continue
+            self.service.ajouter_racine(directory, recursif=self.recursive, delai_execution=self.delay,
+                                        classer=self.organize_by_type, doublons=self.remove_duplicates)
+            self.status_update.emit(f"👁️ Surveillance activée sur le dossier: {directory}")
+        if not self.service.racines:
             return
 
-        self.event_handler = FolderHandler(self.directory, self.delay) # Utilisez le délai du WatcherThread
-        self.observer = Observer()
-        self.observer.schedule(self.event_handler, self.directory, recursive=False)
-
-        self.status_update.emit(f"👁️ Surveillance activée sur le dossier: {self.directory}")
-        self.observer.start()
+        self.service.demarrer()
 
         try:
             while self.running:
@@ -60,10 +69,8 @@ class WatcherThread(QThread):
             logger.error(f"Erreur dans le thread de surveillance: {e}")
             self.status_update.emit(f"⚠️ Erreur de surveillance: {str(e)}")
         finally:
-            if self.observer and self.observer.is_alive():
-                self.observer.stop()
-                self.observer.join()
-                self.status_update.emit("🛑 Surveillance arrêtée.")
+            self.service.arreter()
+            self.status_update.emit("🛑 Surveillance arrêtée.")
 
     def stop(self):
         self.running = False
@@ -77,47 +84,39 @@ class LoadFilesWorker(QThread):
         super().__init__()
         self.directory = directory
 
+    def _fichiers(self):
+        """(nom, catégorie, taille, date de modification, hash) de chaque fichier, depuis le catalogue si possible."""
+        catalogue = obtenir_catalogue()
+        if catalogue is not None:
+            catalogue.rafraichir(self.directory, recursif=False)  # Sans effet sur une racine surveillée
+            for fichier in catalogue.fichiers(self.directory):
+                yield (fichier.nom, fichier.categorie, fichier.taille, fichier.mtime_ns / 1e9,
+                       fichier.hash[:8] if fichier.hash else "...")
+            return
+        for entree in scanner_fichiers(self.directory):
+            try:
+                file_info = entree.stat()
+            except OSError as e:
+                logger.warning(f"Erreur pour {entree.nom}: {e}")
+                continue
+            yield entree.nom, categorie_fichier(entree.nom), file_info.st_size, file_info.st_mtime, "..."
+
     def run(self):
         try:
-            for file_name in os.listdir(self.directory):
-                file_path = os.path.join(self.directory, file_name)
-                if os.path.isfile(file_path):
-                    try:
-                        file_info = os.stat(file_path)
-                       # file_hash = calculer_hash(file_path)[:8] if file_path else "N/A"
-                        file_hash = "..."  # Valeur par défaut ou vide
-
-                        _, extension = os.path.splitext(file_name)
-                        extension = extension.lower()
-
-                        file_type = "Autres"
-                        for type_name, extensions in {
-                            "Documents": [".pdf", ".doc", ".docx", ".txt", ".odt"],
-                            "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp"],
-                            "Vidéos": [".mp4", ".avi", ".mov", ".mkv"],
-                            "Musique": [".mp3", ".wav", ".aac", ".flac"],
-                            "Archives": [".zip", ".rar", ".tar", ".gz", ".7z"],
-                            "Exécutables": [".exe", ".msi", ".bat", ".sh", ".apk"],
-                            "Feuilles de calcul": [".xls", ".xlsx", ".csv", ".ods"],
-                            "Présentations": [".ppt", ".pptx", ".odp"],
-                            "Code": [".py", ".java", ".c", ".cpp", ".js", ".html", ".css"],
-                        }.items():
-                            if extension in extensions:
-                                file_type = type_name
-                                break
-
-                        size_kb = file_info.st_size / 1024
-                        if size_kb < 1024:
-                            size_str = f"{size_kb:.2f} KB"
-                        else:
-                            size_mb = size_kb / 1024
-                            size_str = f"{size_mb:.2f} MB" if size_mb < 1024 else f"{size_mb / 1024:.2f} GB"
-
-                        mod_date = datetime.fromtimestamp(file_info.st_mtime).strftime("%d/%m/%Y %H:%M")
-
-                        self.file_found.emit((file_name, file_type, size_str, mod_date, file_hash, size_kb))
-                    except Exception as e:
-                        print(f"Erreur pour {file_name}: {e}")
+            for file_name, file_type, taille, mtime, file_hash in self._fichiers():
+                try:
+                    size_kb = taille / 1024
+                    if size_kb < 1024:
+                        size_str = f"{size_kb:.2f} KB"
+                    else:
+                        size_mb = size_kb / 1024
+                        size_str = f"{size_mb:.2f} MB" if size_mb < 1024 else f"{size_mb / 1024:.2f} GB"
+
+                    mod_date = datetime.fromtimestamp(mtime).strftime("%d/%m/%Y %H:%M")
+
+                    self.file_found.emit((file_name, file_type, size_str, mod_date, file_hash, size_kb))
+                except Exception as e:
+                    logger.warning(f"Erreur pour {file_name}: {e}")
             self.finished.emit()
 
         except Exception as e:
@@ -128,45 +127,33 @@ class OrganizeWorker(QThread):
     finished = pyqtSignal(str, int)
     progress = pyqtSignal(int)
     
-    def __init__(self, dossier, operations, mode_simulation=False, limite=None):
+    def __init__(self, dossier, operations, mode_simulation=False, limite=None, workers=WORKERS_HASH):
         super().__init__()
         self.dossier = dossier
         self.operations = operations
         self.mode_simulation = mode_simulation
         self.limite = limite
+        self.workers = workers  # Nombre de fichiers hashés en parallèle pour les doublons
         
     def run(self):
+        # Un seul parcours du dossier pour toutes les opérations actives, puis exécution du plan
+        plan = planifier_organisation(self.dossier, self.operations, self.limite, self.workers)
+        self.progress.emit(50)
+        compteurs = executer_plan(plan, self.mode_simulation)
+        self.progress.emit(100)
+
+        libelles = {
+            "type": "fichiers classés par type",
+            "date": "fichiers classés par date",
+            "rename": "fichiers renommés",
+            "duplicates": "doublons supprimés",
+        }
         resultats = []
         fichiers_traites = 0
-        
         for operation, active in self.operations.items():
-            if not active:
-                continue
-                
-            if operation == "type":
-                nombre = classer_fichier_par_type(self.dossier, self.mode_simulation, self.limite)
-                resultats.append(f"{nombre} fichiers classés par type")
-                fichiers_traites += nombre
-                self.progress.emit(25)
-                
-            elif operation == "date":
-                nombre = classer_par_date(self.dossier, self.mode_simulation, self.limite)
-                resultats.append(f"{nombre} fichiers classés par date")
-                fichiers_traites += nombre
-                self.progress.emit(50)
-                
-            elif operation == "rename":
-                nombre = renommer_fichiers(self.dossier, self.mode_simulation, self.limite)
-                resultats.append(f"{nombre} fichiers renommés")
-                fichiers_traites += nombre
-                self.progress.emit(75)
-                
-            elif operation == "duplicates":
-                nombre = supprimer_doublons(self.dossier, self.mode_simulation, self.limite)
-                resultats.append(f"{nombre} doublons supprimés")
-                fichiers_traites += nombre
-                self.progress.emit(100)
-        
+            if active and operation in libelles:
+                resultats.append(f"{compteurs[operation]} {libelles[operation]}")
+                fichiers_traites += compteurs[operation]
+
         message = "\n".join(resultats)
         self.finished.emit(message, fichiers_traites)
-
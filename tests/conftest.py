@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Configuration commune des tests : chaque test travaille dans un dossier temporaire
+# (json/ et logs/ relatifs) avec des instances neuves des caches et bases partagés.
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def dossier_travail(tmp_path, monkeypatch):
+    """Place le test dans tmp_path et réinitialise les singletons (cache des hash, quarantaine, catalogue)."""
+    import core.hash_cache
+    import core.quarantine
+    import core.catalog
+    import core.history
+
+    os.makedirs(tmp_path / "json")
+    os.makedirs(tmp_path / "logs")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(core.hash_cache, "_cache", None)
+    monkeypatch.setattr(core.quarantine, "_magasin", None)
+    monkeypatch.setattr(core.quarantine, "_purgeur", None)
+    monkeypatch.setattr(core.catalog, "_catalogue", None)
+    monkeypatch.setattr(core.history, "_stockage", None)
+    monkeypatch.setattr(core.history, "_handler_log", None)  # Log de l'historique dans tmp_path/logs
+    yield tmp_path
+    handler = core.history._handler_log
+    if handler is not None:
+        core.history.logger.removeHandler(handler)
+        handler.close()
+
+
+def ecrire(chemin, contenu):
+    """Crée un fichier (et ses dossiers) avec un contenu texte ou binaire."""
+    chemin = str(chemin)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    with open(chemin, "wb") as f:
+        f.write(contenu.encode() if isinstance(contenu, str) else contenu)
+    return chemin
+
+
+def entree_historique(date, action="Déplacement", source="/a/rapport.pdf", destination="/a/Documents/rapport.pdf"):
+    """Entrée d'historique minimale, telle qu'écrite par les stockages."""
+    return {"date": date, "action": action, "source": source, "destination": destination}
+
+
+AUJOURDHUI = datetime.now().replace(microsecond=0)
+HIER = AUJOURDHUI - timedelta(days=1)
+ANCIEN = AUJOURDHUI - timedelta(days=40)
+# Trois jours distincts, du plus ancien au plus récent
+ENTREES_HISTORIQUE = [
+    entree_historique(ANCIEN.isoformat(), source="/a/ancien.txt", destination="/a/Documents/ancien.txt"),
+    entree_historique(HIER.isoformat(), "Suppression", "/a/copie (1).jpg", None),
+    entree_historique(AUJOURDHUI.isoformat(), source="/a/Rapport_100%.pdf"),
+]
+
+
+@pytest.fixture
+def arborescence(dossier_travail):
+    """Dossier w/ avec deux sous-dossiers, daté dans le passé (au-delà de la marge de date des dossiers)."""
+    racine = str(dossier_travail / "w")
+    ecrire(os.path.join(racine, "a.pdf"), "a")
+    ecrire(os.path.join(racine, "d1", "b.txt"), "bb")
+    ecrire(os.path.join(racine, "d2", "c.jpg"), "ccc")
+    vieillir(racine)
+    return racine
+
+
+def vieillir(racine):
+    """Date tous les dossiers de racine dans le passé."""
+    for dossier, _, _ in os.walk(racine):
+        os.utime(dossier, (1_000_000_000, 1_000_000_000))
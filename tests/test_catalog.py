@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# Tests du catalogue des fichiers : requêtes, identités sans inode et hash renseignés par les doublons.
+
+import os
+import contextlib
+from types import SimpleNamespace
+
+from conftest import ecrire
+from core.catalog import CatalogueFichiers, obtenir_catalogue
+from core.organizer import supprimer_doublons
+
+
+def test_rafraichir_et_requetes(dossier_travail, arborescence):
+    cat = CatalogueFichiers(str(dossier_travail / "c.sqlite"))
+    assert cat.rafraichir(arborescence) == 3
+    assert cat.rafraichir(arborescence) == 0
+
+    assert [f.nom for f in cat.fichiers(arborescence)] == ["a.pdf"]
+    assert len(cat.fichiers(arborescence, recursif=True)) == 3
+    assert cat.compter(arborescence) == (1, 2)
+    assert cat.chemins_de_taille(2, arborescence) == [os.path.join(arborescence, "d1", "b.txt")]
+    stats = cat.statistiques(arborescence)
+    assert (stats["fichiers"], stats["taille"]) == (3, 6)
+    assert stats["extensions"][".jpg"] == (1, 3)
+
+    os.remove(os.path.join(arborescence, "d2", "c.jpg"))
+    cat.rafraichir(arborescence)
+    assert cat.statistiques(arborescence)["fichiers"] == 2
+    cat.fermer()
+
+
+def test_regression_parcours_sans_inode(dossier_travail, arborescence, monkeypatch):
+    """Sous Windows, DirEntry.stat() donne st_ino = 0 : les lignes ne doivent pas être réécrites à chaque fois."""
+    scandir = os.scandir
+
+    def stat_sans_inode(entree):
+        st = entree.stat()
+        return os.stat_result((st.st_mode, 0, 0, *st[3:]), {
+            "st_atime_ns": st.st_atime_ns, "st_mtime_ns": st.st_mtime_ns, "st_ctime_ns": st.st_ctime_ns})
+
+    @contextlib.contextmanager
+    def scandir_windows(chemin):
+        with scandir(chemin) as entrees:
+            yield [SimpleNamespace(path=e.path, name=e.name, is_file=e.is_file, is_dir=e.is_dir,
+                                   stat=lambda e=e: stat_sans_inode(e))
+                   for e in entrees]
+
+    monkeypatch.setattr(os, "scandir", scandir_windows)
+    cat = CatalogueFichiers(str(dossier_travail / "c.sqlite"))
+    cat.rafraichir(arborescence, incremental=False)
+    cat.enregistrer([os.path.join(arborescence, "a.pdf")])
+    assert cat.rafraichir(arborescence, incremental=False) == 0
+    cat.fermer()
+
+
+def test_hash_renseigne_par_les_doublons(dossier_travail, arborescence):
+    ecrire(os.path.join(arborescence, "d1", "copie.pdf"), "a")
+    cat = obtenir_catalogue()
+    cat.rafraichir(arborescence)
+    assert all(f.hash is None for f in cat.fichiers(arborescence, recursif=True))
+
+    supprimer_doublons(arborescence, workers=1)
+    cat.rafraichir(arborescence)
+    fichiers = cat.fichiers(arborescence, recursif=True)
+    assert len(fichiers) == 3
+    assert cat.fichiers(arborescence)[0].hash  # a.pdf, comparé à sa copie
+
+    ecrire(os.path.join(arborescence, "a.pdf"), "modifié")
+    cat.rafraichir(arborescence)
+    assert cat.fichiers(arborescence)[0].hash is None  # Hash invalidé avec le contenu
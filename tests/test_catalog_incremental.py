@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Tests du rafraîchissement incrémental du catalogue : seuls les dossiers dont la date a changé sont relus.
+
+import os
+
+import pytest
+
+from conftest import ecrire, vieillir
+from core.catalog import CatalogueFichiers
+
+
+@pytest.fixture
+def lectures(monkeypatch):
+    """Dossiers listés par os.scandir pendant le test."""
+    listes = []
+    scandir = os.scandir
+
+    def compter(chemin):
+        listes.append(chemin)
+        return scandir(chemin)
+
+    monkeypatch.setattr(os, "scandir", compter)
+    return listes
+
+
+def test_dossiers_inchanges_non_relus(dossier_travail, arborescence, lectures):
+    cat = CatalogueFichiers(str(dossier_travail / "c.sqlite"))
+    cat.rafraichir(arborescence)
+    assert len(lectures) == 3
+
+    lectures.clear()
+    assert cat.rafraichir(arborescence) == 0
+    assert lectures == []
+
+    nouveau = ecrire(os.path.join(arborescence, "d1", "nouveau.txt"), "n")
+    lectures.clear()
+    assert cat.rafraichir(arborescence) == 1
+    assert lectures == [os.path.join(arborescence, "d1")]
+    assert nouveau in {f.chemin for f in cat.fichiers(arborescence, recursif=True)}
+
+    assert cat.rafraichir(arborescence, incremental=False) == 0
+    cat.fermer()
+
+
+def test_contenu_modifie_dans_un_dossier_inchange(dossier_travail, arborescence, lectures):
+    cat = CatalogueFichiers(str(dossier_travail / "c.sqlite"))
+    cat.rafraichir(arborescence)
+    fichier = ecrire(os.path.join(arborescence, "d2", "c.jpg"), "cccc")
+    vieillir(arborescence)
+
+    assert cat.rafraichir(arborescence, verifier=False) == 0  # Catalogue cru sur parole
+    lectures.clear()
+    assert cat.rafraichir(arborescence) == 1  # Revérifié par stat, sans relire le dossier
+    assert lectures == []
+    assert cat.chemins_de_taille(4, arborescence) == [fichier]
+    cat.fermer()
+
+
+def test_rafraichissement_non_recursif_garde_les_dates(dossier_travail, arborescence, lectures):
+    cat = CatalogueFichiers(str(dossier_travail / "c.sqlite"))
+    cat.rafraichir(arborescence)
+    ecrire(os.path.join(arborescence, "z.txt"), "z")
+    cat.rafraichir(arborescence, recursif=False)
+    vieillir(arborescence)
+    cat.rafraichir(arborescence, recursif=False)
+    lectures.clear()
+    cat.rafraichir(arborescence)
+    assert lectures == []  # Les dates des sous-dossiers ont survécu aux rafraîchissements non récursifs
+    cat.fermer()
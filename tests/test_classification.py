@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Tests de l'index extension → catégorie : extensions composées, casse, fichiers cachés et libellés.
+
+import datetime
+
+import pytest
+
+from config import TYPES_FICHIERS
+from core.classification import CATEGORIE_PAR_DEFAUT, categorie_fichier, extension_fichier, libelle_categorie
+from core.organizer import generer_nouveau_nom
+
+
+@pytest.mark.parametrize("nom, extension", [
+    ("photo.jpg", ".jpg"),
+    ("Photo.JPG", ".jpg"),
+    ("Sauvegarde.TAR.GZ", ".tar.gz"),
+    ("rapport.final.pdf", ".pdf"),  # Point dans le nom : pas une extension composée
+    ("journal.gz", ".gz"),
+    (".bashrc", ""),
+    ("/a/.bashrc", ""),
+    ("LISEZMOI", ""),
+])
+def test_extension_fichier(nom, extension):
+    assert extension_fichier(nom) == extension
+
+
+def test_categorie_identique_au_parcours_des_listes():
+    for categorie, extensions in TYPES_FICHIERS.items():
+        for extension in extensions:
+            assert categorie_fichier("fichier" + extension.upper()) == categorie
+    assert categorie_fichier("Sauvegarde.tar.bz2") == "Archives"
+    assert categorie_fichier("donnees.inconnu") == CATEGORIE_PAR_DEFAUT
+    assert categorie_fichier(".env") == CATEGORIE_PAR_DEFAUT
+
+
+def test_libelles():
+    assert libelle_categorie("Images") == "image"
+    assert libelle_categorie("Feuilles de calcul") == "feuilles-de-calcul"
+    assert libelle_categorie(CATEGORIE_PAR_DEFAUT) == "autre"
+    assert libelle_categorie("Catégorie Ajoutée") == "catégorie-ajoutée"  # Hors index : calculé à la volée
+    assert generer_nouveau_nom("/a/Sauvegarde.TAR.GZ", datetime.datetime(2024, 1, 2)) == \
+        "20240102_archive_sauvegarde.tar.gz"
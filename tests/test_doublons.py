@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# Tests de la détection des doublons en trois étapes (taille, hash partiel, hash complet).
+
+import os
+import threading
+
+from conftest import ecrire
+from core import organizer
+from core.organizer import detecter_doublons, supprimer_doublons, TAILLE_ECHANTILLON
+
+
+def test_etapes_taille_partiel_complet(dossier_travail):
+    gros = b"a" * (3 * TAILLE_ECHANTILLON)
+    original = ecrire(dossier_travail / "d" / "original.bin", gros)
+    copie = ecrire(dossier_travail / "d" / "copie.bin", gros)
+    # Même taille, mêmes début et fin, milieu différent : seul le hash complet les sépare
+    milieu = ecrire(dossier_travail / "d" / "milieu.bin", gros[:TAILLE_ECHANTILLON] + b"b" * TAILLE_ECHANTILLON
+                    + gros[:TAILLE_ECHANTILLON])
+    seul = ecrire(dossier_travail / "d" / "seul.txt", "unique")
+
+    statistiques = {}
+    doublons = detecter_doublons([original, copie, milieu, seul], statistiques, workers=1)
+
+    assert doublons == [(copie, original)]
+    assert statistiques["candidats_taille"] == 3
+    assert statistiques["hashes_partiels"] == 3
+    assert statistiques["candidats_partiels"] == 3
+    assert statistiques["hashes_complets"] == 3
+    assert statistiques["doublons"] == 1
+
+
+def test_petits_fichiers_sans_hash_complet(dossier_travail):
+    a = ecrire(dossier_travail / "a.txt", "identique")
+    b = ecrire(dossier_travail / "b.txt", "identique")
+    statistiques = {}
+    assert detecter_doublons([a, b], statistiques, workers=2) == [(b, a)]
+    assert statistiques["hashes_complets"] == 0  # Le hash partiel couvrait déjà tout le fichier
+
+
+def test_supprimer_doublons_met_en_quarantaine(dossier_travail):
+    ecrire(dossier_travail / "d" / "a.txt", "même contenu")
+    ecrire(dossier_travail / "d" / "sous" / "b.txt", "même contenu")
+    ecrire(dossier_travail / "d" / "c.txt", "autre contenu")
+
+    assert supprimer_doublons(str(dossier_travail / "d"), workers=1) == 1
+    restants = sorted(os.path.relpath(os.path.join(r, f), dossier_travail / "d")
+                      for r, _, fichiers in os.walk(dossier_travail / "d") for f in fichiers)
+    assert len(restants) == 2 and "c.txt" in restants
+
+
+def test_tailles_uniques_jamais_lues(dossier_travail, monkeypatch):
+    lus = []
+    hash_partiel = organizer.hash_partiel_fichier
+    monkeypatch.setattr(organizer, "hash_partiel_fichier", lambda f, *a: lus.append(f) or hash_partiel(f, *a))
+    chemins = [ecrire(dossier_travail / f"f{i}.txt", "x" * i) for i in range(1, 6)]
+    statistiques = {}
+    assert detecter_doublons(chemins, statistiques, workers=1) == []
+    assert lus == [] and statistiques["candidats_taille"] == 0  # Aucune ouverture de fichier
+
+
+def test_hash_en_parallele(dossier_travail, monkeypatch):
+    chemins = [ecrire(dossier_travail / f"f{i}.txt", "même" if i % 2 else "autre") for i in range(8)]
+    attendus = detecter_doublons(chemins, workers=1)
+
+    # Deux hash partiels doivent être en cours en même temps pour franchir la barrière
+    barriere = threading.Barrier(2, timeout=5)
+    hash_partiel = organizer.hash_partiel_fichier
+
+    def hash_synchronise(fichier, *args):
+        barriere.wait()
+        return hash_partiel(fichier, *args)
+
+    monkeypatch.setattr(organizer, "hash_partiel_fichier", hash_synchronise)
+    monkeypatch.setattr(organizer, "obtenir_cache", lambda: None)  # Forcer le calcul
+    assert detecter_doublons(chemins, workers=4) == attendus
+    assert len(attendus) == 6
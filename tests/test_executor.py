@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Tests de l'exécuteur : déplacements sans écrasement (même périphérique, copie, sans liens physiques)
+# et nouveau nom pour une destination occupée après la planification.
+
+import os
+import errno
+
+import pytest
+
+from conftest import ecrire
+from core.executor import ExecuteurFichiers, OperationFichier
+from core.history import charger_historique
+from core.name_index import IndexNoms
+from core.planner import planifier_organisation, executer_plan
+
+
+def lire(chemin):
+    with open(chemin, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture(params=["renommage", "copie", "sans_lien"])
+def mode(request, monkeypatch):
+    """Même périphérique, entre périphériques (copie), système de fichiers sans liens physiques."""
+    if request.param == "copie":
+        monkeypatch.setattr(ExecuteurFichiers, "_meme_peripherique", lambda self, operation: False)
+    elif request.param == "sans_lien":
+        def link(*args, **kwargs):
+            raise OSError(errno.EPERM, "Opération non permise")
+        monkeypatch.setattr(os, "link", link)
+    return request.param
+
+
+def test_deplacement(dossier_travail, mode):
+    source = ecrire(dossier_travail / "d" / "rapport.pdf", "rapport")
+    destination = str(dossier_travail / "d" / "Documents" / "rapport.pdf")
+    operation, = ExecuteurFichiers().executer([OperationFichier("deplacer", source, destination)])
+    assert operation.succes and operation.destination == destination
+    assert lire(destination) == "rapport" and not os.path.exists(source)
+    assert os.listdir(os.path.dirname(destination)) == ["rapport.pdf"]  # Aucun fichier temporaire restant
+
+
+def test_destination_apparue_apres_la_reservation(dossier_travail, mode):
+    source = ecrire(dossier_travail / "d" / "rapport.pdf", "à classer")
+    index = IndexNoms()
+    destination = index.reserver(str(dossier_travail / "d" / "Documents" / "rapport.pdf"))
+    ecrire(destination, "téléchargé entre-temps")  # Watcher, téléchargement, autre programme...
+
+    operation, = ExecuteurFichiers(index_noms=index).executer([OperationFichier("deplacer", source, destination)])
+    assert lire(destination) == "téléchargé entre-temps"  # Jamais écrasé
+    assert operation.succes and operation.destination == str(dossier_travail / "d" / "Documents" / "rapport_1.pdf")
+    assert lire(operation.destination) == "à classer" and not os.path.exists(source)
+
+
+def test_nouveau_nom_sans_index_respecte_le_lot(dossier_travail):
+    dossier = dossier_travail / "d"
+    sources = [ecrire(dossier / nom, nom) for nom in ("a.txt", "b.txt")]
+    index = IndexNoms()
+    destinations = [index.reserver(str(dossier / "Documents" / "a.txt")) for _ in sources]  # a.txt, a_1.txt
+    ecrire(destinations[0], "intrus")
+
+    operations = ExecuteurFichiers().executer(
+        [OperationFichier("deplacer", source, destination) for source, destination in zip(sources, destinations)])
+    assert all(operation.succes for operation in operations)
+    # a_1.txt reste promis à la deuxième opération : la première reçoit a_2.txt
+    assert [os.path.basename(operation.destination) for operation in operations] == ["a_2.txt", "a_1.txt"]
+    assert lire(destinations[0]) == "intrus"
+
+
+def test_plan_journalise_le_nom_attribue(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    ecrire(os.path.join(dossier, "rapport.pdf"), "à classer")
+    plan = planifier_organisation(dossier, {"type": True})
+    ecrire(os.path.join(dossier, "Documents", "rapport.pdf"), "apparu après le plan")
+
+    assert executer_plan(plan)["type"] == 1
+    assert lire(os.path.join(dossier, "Documents", "rapport_1.pdf")) == "à classer"
+    destination, = [h["destination"] for h in charger_historique()]
+    assert destination == os.path.join(dossier, "Documents", "rapport_1.pdf")  # Annulable depuis le bon chemin
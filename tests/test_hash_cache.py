@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Tests du cache persistant des hash : réutilisation, invalidation, identités inconnues, inodes recyclés et purge.
+
+import time
+from types import SimpleNamespace
+
+from conftest import ecrire
+from core import organizer, hash_cache
+from core.organizer import calculer_hash
+from core.hash_cache import CacheHash
+
+
+def test_cache_reutilise_et_invalide(dossier_travail, monkeypatch):
+    chemin = ecrire(dossier_travail / "f.txt", "contenu")
+    premier = calculer_hash(chemin)
+    appels = []
+    monkeypatch.setattr(organizer, "hash_fichier", lambda *a, **k: appels.append(a) or "recalcule")
+    assert calculer_hash(chemin) == premier  # Identité inchangée : pas de relecture
+    assert appels == []
+
+    ecrire(chemin, "contenu modifié")
+    assert calculer_hash(chemin) == "recalcule"
+    assert len(appels) == 1
+
+
+def test_cache_ignore_les_stats_sans_inode(dossier_travail):
+    cache = CacheHash(str(dossier_travail / "cache.sqlite"))
+    st = SimpleNamespace(st_dev=0, st_ino=0, st_size=10, st_mtime_ns=123)
+    cache.enregistrer(st, "xxh", "valeur")
+    assert cache.lire(st, "xxh") is None
+    cache.fermer()
+
+
+def identite(dev=1, ino=42, taille=10, mtime_ns=123, ctime_ns=456):
+    return SimpleNamespace(st_dev=dev, st_ino=ino, st_size=taille, st_mtime_ns=mtime_ns, st_ctime_ns=ctime_ns)
+
+
+def test_cache_inode_recycle(dossier_travail):
+    cache = CacheHash(str(dossier_travail / "cache.sqlite"))
+    cache.enregistrer(identite(), "xxh", "ancien fichier")
+    assert cache.lire(identite(), "xxh") == "ancien fichier"
+    # Fichier supprimé, inode réutilisé par un autre fichier de même taille et même date de modification
+    assert cache.lire(identite(ctime_ns=789), "xxh") is None
+    cache.fermer()
+
+
+def test_cache_purge_les_entrees_inutilisees(dossier_travail, monkeypatch):
+    cache = CacheHash(str(dossier_travail / "cache.sqlite"))
+    cache.enregistrer(identite(ino=1), "xxh", "lu")
+    cache.enregistrer(identite(ino=2), "xxh", "fichier supprimé")
+    cache.valider()
+
+    maintenant = time.time()
+    monkeypatch.setattr(hash_cache.time, "time", lambda: maintenant + 100 * 86400)
+    assert cache.lire(identite(ino=1), "xxh") == "lu"
+    cache.valider()  # Date d'utilisation de l'entrée lue mise à jour
+    assert cache.purger(age_max_jours=90) == 1
+    assert cache.lire(identite(ino=1), "xxh") == "lu"
+    assert cache.lire(identite(ino=2), "xxh") is None
+    cache.fermer()
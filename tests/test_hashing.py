@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Tests des algorithmes de hash : registre, algorithme par défaut, séparation des hash par algorithme dans le cache
+# et lecture par projection mémoire (mmap) des gros fichiers.
+
+import hashlib
+
+import pytest
+
+from conftest import ecrire
+from core import hashing
+from core.hashing import ALGORITHMES_HASH, ALGORITHME_HASH, creer_hasher, hash_fichier, hash_partiel_fichier
+from core.organizer import calculer_hash
+
+
+@pytest.mark.parametrize("algorithme", sorted(ALGORITHMES_HASH))
+def test_algorithmes_disponibles(dossier_travail, algorithme):
+    contenu = b"contenu " * 100_000  # Plusieurs tampons de lecture
+    chemin = ecrire(dossier_travail / "f.bin", contenu)
+    attendu = creer_hasher(algorithme)
+    attendu.update(contenu)
+    assert hash_fichier(chemin, algorithme) == attendu.hexdigest()
+
+
+def test_algorithme_par_defaut_et_inconnu(dossier_travail):
+    assert ALGORITHME_HASH in ALGORITHMES_HASH
+    chemin = ecrire(dossier_travail / "f.txt", "abc")
+    assert hash_fichier(chemin) == hash_fichier(chemin, ALGORITHME_HASH)
+    with pytest.raises(ValueError):
+        creer_hasher("crc32")
+
+
+def test_hash_partiel(dossier_travail, monkeypatch):
+    monkeypatch.setattr(hashing, "TAILLE_TAMPON", 7)  # Tampon plus petit que l'échantillon
+    monkeypatch.setattr(hashing, "_tampons", type(hashing._tampons)())
+    contenu = bytes(range(256)) * 4
+    chemin = ecrire(dossier_travail / "f.bin", contenu)
+    assert hash_partiel_fichier(chemin, 100, "sha256") == hashlib.sha256(contenu[:100] + contenu[-100:]).hexdigest()
+    assert hash_partiel_fichier(chemin, 1000, "sha256") == hashlib.sha256(contenu).hexdigest()  # Lu en entier
+
+
+def test_cache_separe_par_algorithme(dossier_travail):
+    chemin = ecrire(dossier_travail / "f.txt", "abc")
+    assert calculer_hash(chemin, algorithme="md5") == hashlib.md5(b"abc").hexdigest()
+    assert calculer_hash(chemin, algorithme="sha256") == hashlib.sha256(b"abc").hexdigest()
+    assert calculer_hash(chemin, algorithme="md5") == hashlib.md5(b"abc").hexdigest()
+
+
+def test_mmap_au_dela_du_seuil(dossier_travail, monkeypatch):
+    monkeypatch.setattr(hashing, "TRANCHE_MMAP", 4096)  # Plusieurs tranches
+    contenu = bytes(range(256)) * 100
+    chemin = ecrire(dossier_travail / "gros.bin", contenu)
+    projections = []
+    lire_mmap = hashing._lire_mmap
+    monkeypatch.setattr(hashing, "_lire_mmap", lambda *a: projections.append(a[2]) or lire_mmap(*a))
+
+    assert hash_fichier(chemin, "sha256", seuil_mmap=len(contenu)) == hashlib.sha256(contenu).hexdigest()
+    assert projections == [len(contenu)]
+    assert hash_fichier(chemin, "sha256", seuil_mmap=len(contenu) + 1) == hashlib.sha256(contenu).hexdigest()
+    assert projections == [len(contenu)]  # Sous le seuil : lecture bufferisée
+
+
+def test_repli_sans_mmap(dossier_travail, monkeypatch):
+    def mmap_indisponible(*args, **kwargs):
+        raise OSError("mmap non supporté")
+
+    monkeypatch.setattr(hashing.mmap, "mmap", mmap_indisponible)
+    contenu = b"x" * 10_000
+    chemin = ecrire(dossier_travail / "gros.bin", contenu)
+    assert hash_fichier(chemin, "sha256", seuil_mmap=0) == hashlib.sha256(contenu).hexdigest()
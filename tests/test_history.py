@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Tests de l'historique : recherche et période communes aux stockages et ouverture différée du log.
+
+import os
+
+import pytest
+
+from conftest import AUJOURDHUI, HIER, ENTREES_HISTORIQUE, entree_historique
+from core import history
+
+
+@pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+def test_depuis_filtre_le_segment_a_la_borne(dossier_travail, monkeypatch, backend):
+    monkeypatch.setattr(history, "HISTORY_BACKEND", backend)
+    matin, soir = HIER.replace(hour=8, minute=0, second=0), HIER.replace(hour=20, minute=0, second=0)
+    history.sauvegarder_historique([
+        entree_historique(matin.isoformat(), source="/a/matin.txt"),
+        entree_historique(soir.isoformat(), source="/a/soir.txt"),
+        entree_historique(AUJOURDHUI.isoformat()),
+    ])
+    depuis = HIER.replace(hour=12, minute=0, second=0)  # Au milieu du segment d'hier
+    assert [h["source"] for h in history.iterer_historique(depuis)] == ["/a/soir.txt", "/a/rapport.pdf"]
+    history._obtenir_stockage().fermer()
+
+
+@pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+def test_rechercher_historique(dossier_travail, monkeypatch, backend):
+    monkeypatch.setattr(history, "HISTORY_BACKEND", backend)
+    history.sauvegarder_historique(ENTREES_HISTORIQUE)
+    assert history.compter_historique() == 3
+    assert [h["source"] for h in history.rechercher_historique(texte="RAPPORT")] == ["/a/Rapport_100%.pdf"]
+    assert history.actions_historique() == ["Déplacement", "Suppression"]
+    assert os.path.exists(history.HISTORY_DB if backend == "sqlite" else history.HISTORY_DIR)
+    history._obtenir_stockage().fermer()
+
+
+def test_log_ouvert_au_premier_acces(dossier_travail):
+    assert history._handler_log is None  # L'importation n'ouvre aucun fichier
+    history.compter_historique()
+    history.logger.info("message de test")
+    assert history._handler_log.baseFilename == str(dossier_travail / "logs" / "history.log")
+    history._obtenir_stockage().fermer()
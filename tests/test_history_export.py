@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Tests de l'export de l'historique : formats CSV / JSON / JSON Lines, compression gzip et écriture par lots.
+
+import csv
+import gzip
+import json
+
+import pytest
+
+from conftest import ENTREES_HISTORIQUE
+from core import history
+
+
+# Entrées telles qu'enregistrées (destination "N/A" pour une suppression)
+ENREGISTREES = [{**entree, "destination": entree["destination"] or "N/A"} for entree in ENTREES_HISTORIQUE]
+
+
+@pytest.mark.parametrize("taille_lot", [1, 2, 1000])
+def test_formats_identiques_quel_que_soit_le_lot(dossier_travail, taille_lot):
+    for nom in ("export.json", "export.jsonl", "export.csv"):
+        assert history.ecrire_export(nom, entrees=iter(ENREGISTREES), taille_lot=taille_lot) == 3
+
+    with open("export.json", encoding="utf-8") as f:
+        assert json.load(f) == ENREGISTREES
+    with open("export.jsonl", encoding="utf-8") as f:
+        assert [json.loads(ligne) for ligne in f] == ENREGISTREES
+    with open("export.csv", encoding="utf-8", newline="") as f:
+        lignes = list(csv.reader(f))
+    assert lignes[0] == ["Date", "Action", "Source", "Destination"]
+    assert lignes[1:] == [list(entree.values()) for entree in ENREGISTREES]  # Guillemets, espaces et % préservés
+
+
+def test_json_vide(dossier_travail):
+    assert history.ecrire_export("vide.json", entrees=[]) == 0
+    with open("vide.json", encoding="utf-8") as f:
+        assert json.load(f) == []
+
+
+def test_compression_deduite_de_l_extension(dossier_travail):
+    assert history.format_export("export.JSONL.gz") == ("jsonl", True)
+    assert history.format_export("export.parquet") == ("parquet", False)
+    history.ecrire_export("export.jsonl.gz", entrees=ENTREES_HISTORIQUE)
+    with gzip.open("export.jsonl.gz", "rt", encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+    with pytest.raises(ValueError):
+        history.ecrire_export("export.xml", entrees=ENTREES_HISTORIQUE)
+
+
+@pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+def test_exporter_historique(dossier_travail, monkeypatch, backend):
+    monkeypatch.setattr(history, "HISTORY_BACKEND", backend)
+    history.sauvegarder_historique(ENTREES_HISTORIQUE)
+    chemin = history.exporter_historique("csv", compresser=True)
+    assert chemin == "history.csv.gz"
+    with gzip.open(chemin, "rt", encoding="utf-8", newline="") as f:
+        assert [ligne[2] for ligne in csv.reader(f)][1:] == [entree["source"] for entree in ENTREES_HISTORIQUE]
+    assert history.exporter_historique("xml") is None
+    history._obtenir_stockage().fermer()
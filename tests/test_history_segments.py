@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Tests de l'historique en segments JSON Lines : un segment par jour, compression, lecture limitée
+# à la période demandée, rétention par segments entiers et segments tronqués.
+
+import gzip
+from datetime import timedelta
+
+from conftest import AUJOURDHUI, HIER, ANCIEN, ENTREES_HISTORIQUE, entree_historique
+from core.history_segments import JournalSegmente
+
+
+def test_segments_par_jour_et_compression(dossier_travail):
+    journal = JournalSegmente(str(dossier_travail / "history"))
+    journal.ajouter(ENTREES_HISTORIQUE)
+    segments = journal.segments()
+    assert [cle for cle, _, _ in segments] == [d.strftime("%Y-%m-%d") for d in (ANCIEN, HIER, AUJOURDHUI)]
+    assert [compresse for _, _, compresse in segments] == [True, True, False]  # Segments terminés compressés
+
+    # Ajout dans un segment déjà compressé : nouveau membre gzip
+    journal.ajouter([entree_historique(HIER.replace(hour=0).isoformat(), "Renommage")])
+    with gzip.open(segments[1][1], "rt", encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+    assert journal.compter() == 4
+    assert journal.actions() == ["Déplacement", "Renommage", "Suppression"]
+
+
+def test_lecture_limitee_a_la_periode(dossier_travail, monkeypatch):
+    journal = JournalSegmente(str(dossier_travail / "history"))
+    journal.ajouter(ENTREES_HISTORIQUE)
+    ouverts = []
+    lire = journal._lire_segment
+    monkeypatch.setattr(journal, "_lire_segment", lambda chemin, compresse: ouverts.append(chemin) or lire(chemin, compresse))
+
+    resultats = journal.rechercher(date=HIER.strftime("%Y-%m-%d"))
+    assert [h["action"] for h in resultats] == ["Suppression"]
+    assert ouverts == [journal.segments()[1][1]]
+
+    ouverts.clear()
+    assert len(list(journal.iterer(depuis=HIER))) == 2
+    assert len(ouverts) == 2
+
+
+def test_retention_par_segments_entiers(dossier_travail):
+    journal = JournalSegmente(str(dossier_travail / "history"))
+    journal.ajouter(ENTREES_HISTORIQUE)
+    assert journal.supprimer_avant((AUJOURDHUI - timedelta(days=30)).isoformat()) == 1
+    assert [h["source"] for h in journal.iterer()] == ["/a/copie (1).jpg", "/a/Rapport_100%.pdf"]
+
+
+def test_segment_tronque_ignore(dossier_travail):
+    journal = JournalSegmente(str(dossier_travail / "history"))
+    journal.ajouter(ENTREES_HISTORIQUE)
+    with open(journal.segments()[-1][1], "a", encoding="utf-8") as f:
+        f.write('{"date": "interrompu')  # Écriture interrompue
+    assert journal.compter() == 3
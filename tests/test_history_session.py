@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Tests des sessions d'historique : écriture par lots (taille, délai, fermeture), index des exécutions
+# et vidage des sessions ouvertes sur signal d'arrêt.
+
+import signal
+import threading
+
+from core import history
+
+
+def test_ecriture_par_lots(dossier_travail):
+    session = history.SessionHistorique(taille_lot=3, delai_max=3600)
+    for nom in ("a", "b"):
+        session.enregistrer("Déplacement", f"/a/{nom}.txt", f"/a/Documents/{nom}.txt")
+    assert history.compter_historique() == 0  # Lot incomplet : rien d'écrit
+    session.enregistrer("Déplacement", "/a/c.txt", "/a/Documents/c.txt")
+    assert history.compter_historique() == 3
+
+    session.enregistrer("Suppression", "/a/copie.txt")
+    session.fermer()  # Vide le reste du lot et indexe l'exécution
+    execution, = history.executions_historique()
+    assert (execution["execution"], execution["nombre"]) == (session.execution, 4)
+    assert [h["source"] for h in history.entrees_execution(session.execution)] == [
+        "/a/a.txt", "/a/b.txt", "/a/c.txt", "/a/copie.txt"]
+    history._obtenir_stockage().fermer()
+
+
+def test_delai_maximal(dossier_travail):
+    with history.SessionHistorique(taille_lot=1000, delai_max=0) as session:
+        session.enregistrer("Déplacement", "/a/a.txt", "/a/Documents/a.txt")
+        assert history.compter_historique() == 1  # Délai dépassé : écrit sans attendre la fin du lot
+    assert history.executions_historique()[0]["nombre"] == 1
+    history._obtenir_stockage().fermer()
+
+
+def test_signaux_installes_apres_une_premiere_session_dans_un_thread(dossier_travail, monkeypatch):
+    precedents = {numero: signal.getsignal(numero) for numero in (signal.SIGTERM, signal.SIGINT)}
+    recus = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: recus.append(signum))
+    monkeypatch.setattr(history, "_signaux_installes", False)
+    try:
+        sessions = []
+        fil = threading.Thread(target=lambda: sessions.append(history.SessionHistorique()))
+        fil.start()
+        fil.join()
+        assert not history._signaux_installes  # Impossible hors du thread principal : retenté plus tard
+
+        session = history.SessionHistorique()
+        assert history._signaux_installes
+        sessions[0].enregistrer("Déplacement", "/a/b.txt", "/a/Documents/b.txt")
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        assert recus == [signal.SIGTERM]  # Gestionnaire précédent toujours appelé
+        assert history.compter_historique() == 1  # Session du thread vidée par le signal
+        session.fermer()
+        sessions[0].fermer()
+        history._obtenir_stockage().fermer()
+    finally:
+        for numero, precedent in precedents.items():
+            signal.signal(numero, precedent)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Tests de l'historique SQLite : recherche indexée (texte, date, action), caractères spéciaux et rétention.
+
+from datetime import timedelta
+
+import pytest
+
+from conftest import AUJOURDHUI, HIER, ENTREES_HISTORIQUE
+from core.history_sqlite import HistoriqueSQLite
+
+
+@pytest.fixture
+def base(dossier_travail):
+    stockage = HistoriqueSQLite(str(dossier_travail / "history.sqlite"))
+    stockage.ajouter(ENTREES_HISTORIQUE)
+    yield stockage
+    stockage.fermer()
+
+
+def test_recherche_sqlite(base):
+    assert [h["source"] for h in base.rechercher()] == ["/a/Rapport_100%.pdf", "/a/copie (1).jpg", "/a/ancien.txt"]
+    assert [h["action"] for h in base.rechercher(date=HIER.strftime("%Y-%m-%d"))] == ["Suppression"]
+    assert len(base.rechercher(action="Déplacement")) == 2
+    assert len(base.rechercher(limite=1)) == 1
+    assert [h["source"] for h in base.rechercher(texte="copie")] == ["/a/copie (1).jpg"]
+    assert [h["source"] for h in base.rechercher(texte="documents")] == ["/a/Rapport_100%.pdf", "/a/ancien.txt"]
+
+
+def test_recherche_sqlite_caracteres_speciaux(base):
+    # Texte court (LIKE) : % et _ sont cherchés littéralement
+    assert [h["source"] for h in base.rechercher(texte="%")] == ["/a/Rapport_100%.pdf"]
+    assert [h["source"] for h in base.rechercher(texte="t_")] == ["/a/Rapport_100%.pdf"]
+    # Texte long (plein texte si disponible) : les guillemets ne cassent pas la requête
+    assert base.rechercher(texte='"rapport') == []
+    base.recherche_plein_texte = False
+    assert [h["source"] for h in base.rechercher(texte="100%")] == ["/a/Rapport_100%.pdf"]
+
+
+def test_retention_sqlite(base):
+    assert base.supprimer_avant((AUJOURDHUI - timedelta(days=30)).isoformat()) == 1
+    assert base.compter() == 2
+    assert [h["source"] for h in base.rechercher(texte="ancien")] == []  # Index plein texte à jour
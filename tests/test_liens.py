@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Tests du remplacement des doublons par un lien physique ou un reflink.
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import ecrire
+from core.links import meme_fichier, remplacer_par_lien, reflink_disponible
+from core.organizer import supprimer_doublons
+from core.planner import planifier_organisation
+
+
+def test_mode_lien_partage_l_inode(dossier_travail):
+    original = ecrire(dossier_travail / "d" / "a.txt", "même contenu")
+    doublon = ecrire(dossier_travail / "d" / "b.txt", "même contenu")
+
+    assert supprimer_doublons(str(dossier_travail / "d"), workers=1, mode_doublons="lien") == 1
+    assert os.path.samefile(original, doublon)
+    with open(doublon) as f:
+        assert f.read() == "même contenu"
+    # Déjà liés : rien à refaire
+    assert supprimer_doublons(str(dossier_travail / "d"), workers=1, mode_doublons="lien") == 0
+
+
+def test_planificateur_ignore_les_doublons_deja_lies(dossier_travail):
+    original = ecrire(dossier_travail / "d" / "a.txt", "même contenu")
+    os.link(original, dossier_travail / "d" / "b.txt")
+    ecrire(dossier_travail / "d" / "c.txt", "même contenu")
+
+    plan = planifier_organisation(str(dossier_travail / "d"), {"duplicates": True}, workers=1, mode_doublons="lien")
+    assert [(action.type_action, os.path.basename(action.source)) for action in plan] == [("lien", "c.txt")]
+
+
+def test_meme_fichier_sans_inode(dossier_travail):
+    """Stats de DirEntry sous Windows : (0, 0) pour tous les fichiers, qui ne sont pas pour autant identiques."""
+    a = ecrire(dossier_travail / "a.txt", "x")
+    b = ecrire(dossier_travail / "b.txt", "x")
+    lien = str(dossier_travail / "lien.txt")
+    os.link(a, lien)
+    sans_inode = SimpleNamespace(st_dev=0, st_ino=0)
+
+    assert not meme_fichier(a, b, sans_inode, sans_inode)
+    assert meme_fichier(a, lien, sans_inode, sans_inode)
+    assert meme_fichier(a, lien, os.stat(a), os.stat(lien))
+    assert not meme_fichier(a, b, os.stat(a), os.stat(b))
+
+
+def test_reflink(dossier_travail):
+    original = ecrire(dossier_travail / "a.bin", b"z" * 4096)
+    doublon = ecrire(dossier_travail / "b.bin", b"z" * 4096)
+    if not reflink_disponible(str(dossier_travail)):
+        with pytest.raises(OSError):
+            remplacer_par_lien(doublon, original, "reflink")
+        assert os.path.exists(doublon)  # Échec : le doublon est laissé intact
+        return
+    remplacer_par_lien(doublon, original, "reflink")
+    assert not os.path.samefile(original, doublon)  # Blocs partagés, fichiers indépendants
+    with open(doublon, "rb") as f:
+        assert f.read() == b"z" * 4096
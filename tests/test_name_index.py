@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Tests de l'index des noms : suffixes libres, noms libérés dans le lot, écritures externes concurrentes.
+
+import os
+
+from conftest import ecrire
+from core.name_index import IndexNoms
+from core.organizer import verifier_conflit_fichier
+
+
+def test_suffixes_successifs(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    ecrire(os.path.join(dossier, "IMG.jpg"), "1")
+    ecrire(os.path.join(dossier, "IMG_2.jpg"), "2")
+    index = IndexNoms()
+    cible = os.path.join(dossier, "IMG.jpg")
+    assert [os.path.basename(index.reserver(cible)) for _ in range(3)] == ["IMG_1.jpg", "IMG_3.jpg", "IMG_4.jpg"]
+    assert index.reserver(os.path.join(dossier, "autre.jpg")) == os.path.join(dossier, "autre.jpg")
+
+
+def test_dossier_lu_une_seule_fois(dossier_travail, monkeypatch):
+    dossier = str(dossier_travail / "d")
+    ecrire(os.path.join(dossier, "a.txt"), "a")
+    lectures = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda chemin: lectures.append(chemin) or scandir(chemin))
+    index = IndexNoms()
+    for _ in range(50):
+        index.reserver(os.path.join(dossier, "a.txt"))
+    assert lectures == [dossier]
+    # Dossier pas encore créé : aucun conflit
+    assert index.reserver(str(dossier_travail / "nouveau" / "a.txt")) == str(dossier_travail / "nouveau" / "a.txt")
+
+
+def test_nom_libere_reattribuable(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    occupe = ecrire(os.path.join(dossier, "rapport.pdf"), "ancien")
+    index = IndexNoms()
+    index.liberer(occupe)  # Déplacé ailleurs plus tôt dans le lot
+    assert index.reserver(occupe) == occupe
+    assert index.reserver(occupe) == os.path.join(dossier, "rapport_1.pdf")
+
+
+def test_fichier_cree_apres_la_lecture(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    ecrire(os.path.join(dossier, "a.txt"), "a")
+    index = IndexNoms()
+    index.reserver(os.path.join(dossier, "b.txt"))
+    ecrire(os.path.join(dossier, "c.txt"), "écrit par un autre programme")
+    assert index.reserver(os.path.join(dossier, "c.txt")) == os.path.join(dossier, "c_1.txt")
+
+
+def test_nom_occupe_sans_fichier(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    index = IndexNoms()
+    index.occuper(os.path.join(dossier, "a.txt"))  # Promis à une autre opération du lot
+    assert index.reserver(os.path.join(dossier, "a.txt")) == os.path.join(dossier, "a_1.txt")
+
+
+def test_verifier_conflit_fichier_avec_index(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    ecrire(os.path.join(dossier, "photo.jpg"), "1")
+    cible = os.path.join(dossier, "photo.jpg")
+    assert verifier_conflit_fichier(cible) == os.path.join(dossier, "photo_1.jpg")  # Sans index : inchangé
+    index = IndexNoms()
+    # Avec l'index partagé du lot, chaque appel tient compte des noms déjà attribués
+    assert [verifier_conflit_fichier(cible, index) for _ in range(2)] == [
+        os.path.join(dossier, "photo_1.jpg"), os.path.join(dossier, "photo_2.jpg")]
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Tests du planificateur : un seul parcours pour toutes les opérations, plan combiné et exécution.
+
+import os
+
+from conftest import ecrire
+from core import planner
+from core.organizer import obtenir_date_creation
+from core.planner import planifier_organisation, organiser_dossier
+
+def test_un_seul_parcours(dossier_travail, monkeypatch):
+    dossier = str(dossier_travail / "d")
+    ecrire(os.path.join(dossier, "a.pdf"), "a")
+    ecrire(os.path.join(dossier, "sous", "b.jpg"), "b")
+    parcours = []
+    scanner = planner.scanner_fichiers
+    monkeypatch.setattr(planner, "scanner_fichiers", lambda *a, **k: parcours.append(a) or scanner(*a, **k))
+    planifier_organisation(dossier, {"type": True, "date": True, "rename": True, "duplicates": True})
+    assert len(parcours) == 1
+
+
+def test_plan_combine(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    photo = ecrire(os.path.join(dossier, "Ma Photo.JPG"), "photo")
+    copie = ecrire(os.path.join(dossier, "sous", "copie.jpg"), "photo")
+    date = obtenir_date_creation(photo)  # st_ctime : non modifiable depuis le test
+
+    plan = planifier_organisation(dossier, {"type": True, "date": True, "rename": True, "duplicates": True})
+    suppression, deplacement = plan  # Doublons d'abord, puis déplacements
+    assert (suppression.type_action, suppression.source, suppression.original) == ("supprimer", copie, photo)
+    assert deplacement.type_action == "deplacer" and deplacement.source == photo
+    assert deplacement.destination == os.path.join(dossier, "Images", date.strftime("%Y"), date.strftime("%m-%B"),
+                                                   date.strftime("%Y%m%d") + "_image_ma-photo.jpg")
+    assert deplacement.operations == ("type", "date", "rename")
+
+
+def test_organiser_dossier(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    ecrire(os.path.join(dossier, "rapport.pdf"), "r")
+    ecrire(os.path.join(dossier, "Documents", "rapport.pdf"), "déjà classé")
+    copie = ecrire(os.path.join(dossier, "sous", "copie.pdf"), "r")
+
+    compteurs = organiser_dossier(dossier, {"type": True, "duplicates": True})
+    assert compteurs == {"type": 1, "date": 0, "rename": 0, "duplicates": 1}
+    assert sorted(os.listdir(os.path.join(dossier, "Documents"))) == ["rapport.pdf", "rapport_1.pdf"]
+    assert not os.path.exists(copie)
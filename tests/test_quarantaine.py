@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Tests de la quarantaine : ouverte seulement pour les suppressions, jamais à la racine d'un volume sans option.
+
+import os
+from types import SimpleNamespace
+
+from conftest import ecrire
+from core import quarantine
+from core.quarantine import MagasinQuarantaine, NOM_QUARANTAINE
+from core.organizer import classer_fichier_par_type, supprimer_doublons
+
+
+def test_deplacements_sans_quarantaine(dossier_travail, monkeypatch):
+    def interdite():
+        raise AssertionError("quarantaine ouverte pour un lot sans suppression")
+
+    monkeypatch.setattr(quarantine, "obtenir_quarantaine", interdite)
+    ecrire(dossier_travail / "d" / "rapport.pdf", "pdf")
+    assert classer_fichier_par_type(str(dossier_travail / "d")) == 1
+    assert quarantine._purgeur is None
+
+
+def test_suppressions_ouvrent_la_quarantaine(dossier_travail):
+    ecrire(dossier_travail / "d" / "a.txt", "même")
+    ecrire(dossier_travail / "d" / "b.txt", "même")
+    assert supprimer_doublons(str(dossier_travail / "d"), workers=1) == 1
+    assert quarantine._magasin and quarantine._purgeur.is_alive()
+
+
+def test_pas_de_quarantaine_au_point_de_montage_par_defaut(dossier_travail, monkeypatch):
+    volume = dossier_travail / "volume"
+    monkeypatch.setattr(quarantine, "_point_de_montage", lambda chemin: str(volume))
+    magasin = MagasinQuarantaine(str(dossier_travail / "json" / NOM_QUARANTAINE))
+    autre_peripherique = SimpleNamespace(st_dev=os.stat(dossier_travail).st_dev + 1)
+    fichier = str(volume / "dossier" / "f.txt")
+
+    assert magasin._racine_pour(fichier, autre_peripherique) == magasin.racine
+    assert not os.path.exists(volume / NOM_QUARANTAINE)
+
+    monkeypatch.setattr(quarantine, "QUARANTAINE_AU_POINT_DE_MONTAGE", True)
+    magasin._racines.clear()
+    assert magasin._racine_pour(fichier, autre_peripherique) == str(volume / NOM_QUARANTAINE)
+    assert os.path.isdir(volume / NOM_QUARANTAINE)
+    magasin.fermer()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# Tests du parcours os.scandir : fichiers trouvés, stat mis en cache et identité réelle des fichiers sous Windows.
+
+import os
+from types import SimpleNamespace
+
+from conftest import ecrire
+from core.organizer import detecter_doublons, calculer_hash
+from core.hash_cache import obtenir_cache
+from core.quarantine import NOM_QUARANTAINE
+from core.scanner import FichierScanne, scanner_fichiers
+
+
+def test_parcours(dossier_travail):
+    racine = str(dossier_travail / "d")
+    a = ecrire(os.path.join(racine, "a.txt"), "a")
+    b = ecrire(os.path.join(racine, "sous", "b.txt"), "bb")
+    ecrire(os.path.join(racine, NOM_QUARANTAINE, "objet"), "x")
+    assert [f.chemin for f in scanner_fichiers(racine)] == [a]
+    assert sorted(f.chemin for f in scanner_fichiers(racine, recursif=True)) == [a, b]  # Quarantaine ignorée
+
+
+def test_stat_calcule_une_seule_fois(dossier_travail):
+    ecrire(dossier_travail / "d" / "a.txt", "abc")
+    appels = []
+    fichier, = scanner_fichiers(str(dossier_travail / "d"))
+    entree = fichier._entree
+    fichier._entree = SimpleNamespace(path=entree.path, name=entree.name,
+                                      stat=lambda: appels.append(1) or entree.stat())
+    assert fichier.taille == 3 and fichier.stat().st_size == 3
+    assert len(appels) == 1
+    assert FichierScanne.depuis_chemin(str(dossier_travail / "absent")).stat_ou_none() is None
+
+
+def test_regression_stats_windows_sans_inode(dossier_travail):
+    """DirEntry.stat() sous Windows : st_ino = st_dev = 0 pour tous les fichiers."""
+    a = ecrire(dossier_travail / "zip" / "a.txt", "contenu A")
+    b = ecrire(dossier_travail / "zip" / "b.txt", "contenu B")
+    os.utime(b, ns=(os.stat(a).st_atime_ns, os.stat(a).st_mtime_ns))  # Même taille, même date (archive extraite)
+    stats = {chemin: SimpleNamespace(st_dev=0, st_ino=0, st_size=os.stat(chemin).st_size,
+                                     st_mtime_ns=os.stat(chemin).st_mtime_ns) for chemin in (a, b)}
+
+    assert calculer_hash(a, st=stats[a]) != calculer_hash(b, st=stats[b])
+    assert detecter_doublons([a, b], workers=1, stats=stats) == []
+    assert os.path.exists(b)
+    obtenir_cache().valider()
+
+
+def test_scanner_complete_l_identite(dossier_travail):
+    chemin = ecrire(dossier_travail / "f.txt", "x")
+    entree = SimpleNamespace(path=chemin, name="f.txt",
+                             stat=lambda: SimpleNamespace(st_dev=0, st_ino=0, st_size=1, st_mtime_ns=0))
+    st = FichierScanne(entree).stat()
+    assert (st.st_dev, st.st_ino) == (os.stat(chemin).st_dev, os.stat(chemin).st_ino)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Tests de la réconciliation au démarrage de la surveillance (instantané SQLite).
+
+import os
+from types import SimpleNamespace
+
+from conftest import ecrire
+from core import snapshot
+from core.scanner import FichierScanne, scanner_fichiers
+from core.snapshot import InstantaneSurveillance, reconcilier
+
+
+def test_reconciliation(dossier_travail):
+    racine = str(dossier_travail / "w")
+    ecrire(os.path.join(racine, "garde.txt"), "a")
+    modifie = ecrire(os.path.join(racine, "modifie.txt"), "b")
+    supprime = ecrire(os.path.join(racine, "supprime.txt"), "c")
+    instantane = InstantaneSurveillance(str(dossier_travail / "s.sqlite"))
+
+    assert reconcilier(instantane, racine) == []  # Premier passage : référence
+    nouveau = ecrire(os.path.join(racine, "nouveau.txt"), "d")
+    ecrire(modifie, "b modifié")
+    os.remove(supprime)
+
+    changes = reconcilier(instantane, racine)
+    assert sorted(changes) == sorted([nouveau, modifie])
+    assert supprime not in instantane.charger(racine)
+
+    instantane.enregistrer(racine, changes)  # Après organisation
+    assert reconcilier(instantane, racine) == []
+    instantane.fermer()
+
+
+def test_portee_differente_reprend_une_reference(dossier_travail):
+    racine = str(dossier_travail / "w")
+    ecrire(os.path.join(racine, "sous", "a.txt"), "a")
+    instantane = InstantaneSurveillance(str(dossier_travail / "s.sqlite"))
+    assert reconcilier(instantane, racine, recursif=False) == []
+    assert reconcilier(instantane, racine, recursif=True) == []
+    assert instantane.connue(racine, True) and not instantane.connue(racine, False)
+    instantane.fermer()
+
+
+def test_regression_parcours_sans_inode(dossier_travail, monkeypatch):
+    """Sous Windows, le parcours (DirEntry) ne donne pas d'inode alors qu'os.stat en donne un."""
+    racine = str(dossier_travail / "w")
+    fichier = ecrire(os.path.join(racine, "organise.txt"), "a")
+
+    def parcours_windows(dossier, recursif=False):
+        for entree in scanner_fichiers(dossier, recursif):
+            st = os.stat(entree.chemin)
+            faux = SimpleNamespace(path=entree.chemin, name=entree.nom,
+                                   stat=lambda st=st: SimpleNamespace(st_dev=0, st_ino=0, st_size=st.st_size,
+                                                                      st_mtime_ns=st.st_mtime_ns))
+            yield FichierScanne(faux)
+
+    monkeypatch.setattr(snapshot, "scanner_fichiers", parcours_windows)
+    instantane = InstantaneSurveillance(str(dossier_travail / "s.sqlite"))
+    reconcilier(instantane, racine)
+    instantane.enregistrer(racine, [fichier])  # Mise à jour par chemin (os.stat)
+    assert reconcilier(instantane, racine) == []
+    instantane.fermer()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# Tests de l'annulation et du rétablissement des exécutions (vagues, quarantaine, contenu modifié).
+
+import os
+
+from conftest import ecrire
+from core.undo_redo import _planifier, undo, redo
+from core.organizer import classer_fichier_par_type, supprimer_doublons
+
+
+def test_vagues_pour_les_chaines(dossier_travail):
+    a = ecrire(dossier_travail / "a.txt", "a")
+    b = ecrire(dossier_travail / "b.txt", "b")
+    c = str(dossier_travail / "c.txt")
+    # b → c libère b, que a → b peut ensuite occuper
+    vagues = _planifier([("deplacer", b, c, {}), ("deplacer", a, b, {})])
+    assert [[(o.source, o.destination) for o in vague] for vague in vagues] == [[(b, c)], [(a, b)]]
+
+
+def test_destination_occupee_recoit_un_suffixe(dossier_travail):
+    ecrire(dossier_travail / "occupe.txt", "présent")
+    source = ecrire(dossier_travail / "d" / "occupe.txt", "déplacé")
+    vagues = _planifier([("deplacer", source, str(dossier_travail / "occupe.txt"), {})])
+    assert vagues[0][0].destination == str(dossier_travail / "occupe_1.txt")
+
+
+def test_annuler_puis_retablir_un_classement(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    pdf = ecrire(os.path.join(dossier, "rapport.pdf"), "pdf")
+    classer_fichier_par_type(dossier)
+    classe = os.path.join(dossier, "Documents", "rapport.pdf")
+    assert os.path.exists(classe)
+
+    resultat = undo()
+    assert resultat["restaures"] == 1
+    assert os.path.exists(pdf) and not os.path.exists(os.path.dirname(classe))  # Dossier vide retiré
+
+    assert redo()["retablis"] == 1
+    assert os.path.exists(classe) and not os.path.exists(pdf)
+    assert redo() is None
+
+
+def test_retablir_une_suppression_verifie_le_contenu(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    chemins = [ecrire(os.path.join(dossier, nom), "même contenu") for nom in ("a.txt", "b.txt")]
+    assert supprimer_doublons(dossier, workers=1) == 1
+    doublon, = [chemin for chemin in chemins if not os.path.exists(chemin)]  # Ordre du parcours
+
+    execution = undo()["execution"]
+    assert open(doublon).read() == "même contenu"  # Restauré depuis la quarantaine
+    assert redo() == {"execution": execution, "retablis": 1, "echecs": 0, "ignores": 0}
+    assert not os.path.exists(doublon)
+
+    undo()
+    ecrire(doublon, "modifié après l'annulation")
+    resultat = redo()
+    assert (resultat["retablis"], resultat["ignores"]) == (0, 1)
+    assert open(doublon).read() == "modifié après l'annulation"
+
+
+def test_retablir_depuis_l_emplacement_suffixe(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    pdf = ecrire(os.path.join(dossier, "rapport.pdf"), "classé")
+    classer_fichier_par_type(dossier)
+    classe = os.path.join(dossier, "Documents", "rapport.pdf")
+    ecrire(pdf, "autre fichier de l'utilisateur")  # Emplacement d'origine repris avant l'annulation
+
+    undo()
+    suffixe = os.path.join(dossier, "rapport_1.pdf")
+    assert open(suffixe).read() == "classé"
+
+    assert redo()["retablis"] == 1
+    assert open(classe).read() == "classé" and not os.path.exists(suffixe)
+    assert open(pdf).read() == "autre fichier de l'utilisateur"  # Jamais déplacé ni supprimé
+
+
+def test_retablir_une_suppression_restauree_sous_un_autre_nom(dossier_travail):
+    dossier = str(dossier_travail / "d")
+    chemins = [ecrire(os.path.join(dossier, nom), "même contenu") for nom in ("a.txt", "b.txt")]
+    supprimer_doublons(dossier, workers=1)
+    doublon, = [chemin for chemin in chemins if not os.path.exists(chemin)]
+    ecrire(doublon, "même contenu")  # Recréé par l'utilisateur avant l'annulation
+
+    undo()
+    base, extension = os.path.splitext(doublon)
+    restaure = f"{base}_1{extension}"
+    assert os.path.exists(restaure)
+
+    assert redo()["retablis"] == 1
+    assert not os.path.exists(restaure)
+    assert open(doublon).read() == "même contenu"  # Le fichier recréé reste en place
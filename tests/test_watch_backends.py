@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Tests des backends de surveillance : saturation de la file inotify.
+
+import os
+import time
+
+import pytest
+
+from conftest import ecrire
+from core.watch_backends import ObservateurInotify, inotify_disponible, EN_TETE, IN_Q_OVERFLOW
+from core.watcher import ServiceSurveillance
+
+inotify_requis = pytest.mark.skipif(not inotify_disponible(), reason="inotify indisponible")
+
+
+class HandlerResynchronise:
+    def __init__(self):
+        self.resynchronisations = 0
+
+    def dispatch(self, evenement):
+        pass
+
+    def resynchroniser(self):
+        self.resynchronisations += 1
+
+
+class HandlerSimple:
+    def __init__(self):
+        self.chemins = []
+
+    def dispatch(self, evenement):
+        self.chemins.append(evenement.src_path)
+
+
+def attendre(condition, delai=5.0):
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@inotify_requis
+def test_debordement_resynchronise_les_racines(dossier_travail):
+    racine = str(dossier_travail / "w")
+    ecrire(os.path.join(racine, "a.txt"), "a")
+    observateur = ObservateurInotify()
+    resynchronise, simple = HandlerResynchronise(), HandlerSimple()
+    observateur.schedule(resynchronise, racine, recursive=True)
+    autre = str(dossier_travail / "autre")
+    fichier = ecrire(os.path.join(autre, "b.txt"), "b")
+    observateur.schedule(simple, autre)
+    os.makedirs(os.path.join(racine, "cree_pendant_la_saturation"))
+
+    observateur._traiter_tampon(EN_TETE.pack(-1, IN_Q_OVERFLOW, 0, 0))
+
+    assert resynchronise.resynchronisations == 1
+    assert os.path.join(racine, "cree_pendant_la_saturation") in observateur.wds  # Watch reposé
+    assert simple.chemins == [fichier]  # Handler sans resynchroniser() : racine reparcourue
+    observateur.stop()
+    observateur.join()
+
+
+@inotify_requis
+def test_service_rattrape_les_evenements_perdus(dossier_travail):
+    racine = str(dossier_travail / "w")
+    os.makedirs(racine)
+    service = ServiceSurveillance(delai_stabilite=0.1, backend="inotify")
+    handler = service.ajouter_racine(racine, delai_execution=0, doublons=False)
+    service.demarrer()
+    try:
+        assert attendre(lambda: not service.en_cours)
+        # Événements perdus : le fichier arrive sans que l'observateur ne le voie
+        backend, surveillance, _ = service.surveillances[service._cle(racine)]
+        service.observateurs[backend].unschedule(surveillance)
+        ecrire(os.path.join(racine, "rapport.pdf"), "pdf")
+        time.sleep(0.2)
+        assert os.path.exists(os.path.join(racine, "rapport.pdf"))
+
+        handler.resynchroniser()
+        assert attendre(lambda: os.path.exists(os.path.join(racine, "Documents", "rapport.pdf")))
+    finally:
+        service.arreter()
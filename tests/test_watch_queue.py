@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Tests de la file d'événements de la surveillance : regroupement des rafales, attente de stabilité
+# des fichiers en cours d'écriture et suppressions.
+
+import time
+
+from conftest import ecrire
+from core.watcher import FileEvenements
+
+
+def test_rafale_regroupee_apres_stabilite(dossier_travail):
+    file = FileEvenements(delai_stabilite=0.2)
+    chemin = ecrire(dossier_travail / "telechargement.bin", b"x")
+    for _ in range(5):
+        file.signaler(chemin)
+    assert file.prets(timeout=0) == ([], set())  # Délai pas encore écoulé
+
+    debut = time.monotonic()
+    prets = []
+    while not prets and time.monotonic() - debut < 3:
+        prets, _ = file.prets(timeout=0.5)
+    assert prets == [chemin]
+    assert len(file) == 0
+
+
+def test_fichier_en_cours_d_ecriture_replanifie(dossier_travail):
+    file = FileEvenements(delai_stabilite=0.3)
+    chemin = ecrire(dossier_travail / "en_cours.bin", b"x")
+    file.signaler(chemin)
+    fin_ecriture = time.monotonic() + 0.8
+    with open(chemin, "ab") as f:
+        while time.monotonic() < fin_ecriture:
+            f.write(b"x")
+            f.flush()
+            assert file.prets(timeout=0.05)[0] == []  # Taille qui change : jamais rendu
+    prets = []
+    while not prets:
+        prets, _ = file.prets(timeout=0.5)
+    assert time.monotonic() >= fin_ecriture
+    assert prets == [chemin]
+
+
+def test_suppression_annule_le_traitement(dossier_travail):
+    file = FileEvenements(delai_stabilite=0.1)
+    chemin = ecrire(dossier_travail / "f.txt", "x")
+    file.signaler(chemin)
+    file.retirer(chemin)
+    time.sleep(0.15)
+    assert file.prets(timeout=0) == ([], {chemin})
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Tests de la surveillance : filtrage des événements, racines multiples et organisation des fichiers signalés.
+
+import os
+import time
+
+import pytest
+from watchdog.events import FileCreatedEvent, FileModifiedEvent, FileMovedEvent
+
+from conftest import ecrire
+from core.links import _temporaire
+from core.quarantine import NOM_QUARANTAINE
+from core.watcher import FileEvenements, FolderHandler, ServiceSurveillance
+
+
+def attendre(condition, delai=5.0):
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_filtrage_du_handler(dossier_travail):
+    racine = str(dossier_travail)
+    file = FileEvenements()
+    handler = FolderHandler(racine, file=file, catalogue=None)
+    env = os.path.join(racine, ".env")
+    handler.dispatch(FileCreatedEvent(env))
+    handler.dispatch(FileCreatedEvent(_temporaire(os.path.join(racine, "photo.jpg"))))
+    handler.dispatch(FileModifiedEvent(os.path.join(racine, NOM_QUARANTAINE, "objets", "x")))
+    handler.dispatch(FileMovedEvent(os.path.join(racine, "a.part"), os.path.join(racine, "a.zip")))
+
+    assert set(file.etats) == {env, os.path.join(racine, "a.zip")}
+    assert file.supprimes == {os.path.join(racine, "a.part")}
+
+
+def test_service_organise_les_nouveaux_fichiers(dossier_travail):
+    racine = str(dossier_travail / "w")
+    original = ecrire(os.path.join(racine, "Documents", "contrat.pdf"), "contrat")
+    service = ServiceSurveillance(delai_stabilite=0.2)
+    service.ajouter_racine(racine, delai_execution=0)
+    service.demarrer()
+    try:
+        assert attendre(lambda: not service.en_cours)
+        ecrire(os.path.join(racine, "rapport.pdf"), "rapport")
+        ecrire(os.path.join(racine, "copie du contrat.pdf"), "contrat")
+        assert attendre(lambda: os.path.exists(os.path.join(racine, "Documents", "rapport.pdf")))
+        assert attendre(lambda: not os.path.exists(os.path.join(racine, "copie du contrat.pdf")))
+        assert not os.path.exists(os.path.join(racine, "Documents", "copie du contrat.pdf"))  # Doublon écarté
+        assert os.path.exists(original)
+    finally:
+        service.arreter()
+
+
+def test_racines_multiples(dossier_travail):
+    racine, voisine = str(dossier_travail / "w"), str(dossier_travail / "v")
+    for dossier in ("a", os.path.join("a", "b"), "c"):
+        os.makedirs(os.path.join(racine, dossier))
+    os.makedirs(os.path.join(voisine, "sous"))
+    service = ServiceSurveillance(max_dossiers=5, backend="watchdog", reconciliation=False)
+    recursive = service.ajouter_racine(racine, recursif=True)
+    assert service.dossiers_surveilles == 4
+    assert not service.ajouter_racine(voisine, recursif=True).recursif  # 2 dossiers, 1 restant : premier niveau
+    imbriquee = service.ajouter_racine(os.path.join(racine, "c"))  # Règles propres à un sous-dossier
+    assert service.dossiers_surveilles == 6
+    with pytest.raises(ValueError):
+        service.ajouter_racine(racine)
+
+    # Chaque fichier revient à la racine la plus proche qui le couvre
+    assert service._racine_de(os.path.join(racine, "a", "b", "f.txt")) is recursive
+    assert service._racine_de(os.path.join(racine, "c", "f.txt")) is imbriquee
+    assert service._racine_de(os.path.join(voisine, "f.txt")).path == voisine
+    assert service._racine_de(os.path.join(voisine, "sous", "f.txt")) is None  # Racine limitée au premier niveau
+    assert service._racine_de(str(dossier_travail / "f.txt")) is None
+
+    service.retirer_racine(racine)
+    assert service._racine_de(os.path.join(racine, "a", "f.txt")) is None
+    assert service._racine_de(os.path.join(racine, "c", "f.txt")) is imbriquee
+    assert service.dossiers_surveilles == 2  # Budget de la racine retirée rendu